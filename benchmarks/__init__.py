@@ -0,0 +1,4 @@
+"""
+Benchmark suite for the Beijing Air Quality dashboard.
+Run with `python -m benchmarks`; see benchmarks/__main__.py for options.
+"""
@@ -0,0 +1,102 @@
+"""
+Run the benchmark suite.
+
+Examples:
+    python -m benchmarks                          # run and save results
+    python -m benchmarks --only charts            # cases matching a pattern
+    python -m benchmarks --save-baseline          # store a new baseline
+    python -m benchmarks --data-root /tmp/synth   # benchmark other data
+
+Results are written to benchmarks/results/<timestamp>.json. When a
+baseline exists (benchmarks/baseline.json) the run is compared with it and
+the exit code is 1 if any case regressed beyond the thresholds.
+"""
+
+from pathlib import Path
+import argparse
+import sys
+import time
+from benchmarks import cases as bench_cases
+from benchmarks.harness import (MEMORY_THRESHOLD, TIME_THRESHOLD, compare,
+                                load_results, run_cases, save_results)
+
+BENCH_DIR = Path(__file__).parent
+RESULTS_DIR = BENCH_DIR / "results"
+BASELINE_PATH = BENCH_DIR / "baseline.json"
+
+
+def parse_args(argv: list = None) -> argparse.Namespace:
+    """
+    Parse command line arguments.
+
+    Args:
+        argv (list): Arguments, defaults to sys.argv.
+    Returns:
+        argparse.Namespace: Parsed arguments.
+    """
+    parser = argparse.ArgumentParser(prog="python -m benchmarks",
+                                     description=__doc__.splitlines()[1])
+    parser.add_argument("--only", action="append", default=[],
+                        help="run cases whose name or group contains this "
+                             "text (repeatable)")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="warm calls per case (default 5)")
+    parser.add_argument("--data-root", type=Path,
+                        help="tree with data/, models/ and model_outputs/")
+    parser.add_argument("--output", type=Path,
+                        help="results file (default benchmarks/results/)")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH,
+                        help="baseline to compare against")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="store this run as the new baseline")
+    parser.add_argument("--time-threshold", type=float,
+                        default=TIME_THRESHOLD,
+                        help="allowed relative warm time increase")
+    parser.add_argument("--memory-threshold", type=float,
+                        default=MEMORY_THRESHOLD,
+                        help="allowed relative peak memory increase")
+    return parser.parse_args(argv)
+
+
+def main(argv: list = None) -> int:
+    """
+    Run the suite, save the results and compare them with the baseline.
+
+    Args:
+        argv (list): Command line arguments.
+    Returns:
+        int: Exit code, 1 when a regression was found.
+    """
+    args = parse_args(argv)
+    if args.data_root:
+        bench_cases.set_data_root(args.data_root)
+
+    selected = [case for case in bench_cases.all_cases()
+                if not args.only
+                or any(p in case.name or p == case.group for p in args.only)]
+    report = run_cases(selected, repeat=args.repeat)
+
+    output = args.output or RESULTS_DIR / \
+        f"{time.strftime('%Y%m%d-%H%M%S')}.json"
+    print("Saved results to:", save_results(report, output))
+
+    if args.save_baseline:
+        print("Saved baseline to:", save_results(report, args.baseline))
+        return 0
+    if not args.baseline.exists():
+        print("No baseline found; run with --save-baseline to create one.")
+        return 0
+
+    rows = compare(report, load_results(args.baseline),
+                   args.time_threshold, args.memory_threshold)
+    regressions = [row for row in rows if row["regression"]]
+    for row in regressions:
+        print(f"REGRESSION {row['case']} {row['metric']}: "
+              f"{row['baseline']:.4g} -> {row['current']:.4g} "
+              f"({row['change']:+.0%})")
+    print(f"{len(rows)} comparisons, {len(regressions)} regressions.")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,332 @@
+"""
+Benchmark cases for loaders, feature engineering, forecasting, hypothesis
+statistics and every chart builder.
+Inputs are read from a data root (the repository by default) and cached
+per process, so setup cost is never part of a measurement. Chart builders
+are called through __wrapped__ to bypass the on-disk figure cache.
+"""
+
+from pathlib import Path
+import functools
+import joblib
+import pandas as pd
+from benchmarks.harness import Case, MissingInput
+from utils import charts, clustering_charts, modelling_charts
+from utils.eta_squared import eta_squared_anova
+from utils.feature_engineering import (apply_forecasting_features,
+                                       dense_forecasting_features)
+from utils.forcast import encode_categoricals, forecast_horizon
+from utils.hypothesis_stats import (spatial_anova,
+                                    temporal_correlations,
+                                    weather_correlations)
+from utils.load_csv import load_csv
+from utils.pca_projection import load_pca_array, pca_frame
+from utils.prediction_store import PredictionStore, load_predictions
+from utils.residual_diagnostics import residual_bins, residual_histogram
+from utils.star_schema import StarSchema
+from utils.station_tensor import StationTensor
+from utils.time_pyramid import build_level
+
+ROOT = Path(__file__).parent.parent
+
+HORIZONS = [3, 6, 12, 18, 24, 48]
+WEATHER_VARS = ["temperature", "dew_point", "pressure", "rain",
+                "wind_speed", "relative_humidity"]
+TIME_VARS = ["hour", "day_of_week", "month", "year"]
+RADAR_FEATURES = ["pm25", "temperature", "pressure", "dew_point",
+                  "wind_speed", "dew_point_spread", "temp_pres_interaction"]
+
+_data_root = ROOT
+
+
+def set_data_root(path: Path) -> None:
+    """
+    Read benchmark inputs from another tree (e.g. synthetic data).
+
+    Args:
+        path (Path): Directory containing data/, model_outputs/, models/.
+    """
+    global _data_root
+    _data_root = Path(path)
+    _csv.cache_clear()
+    _predictions_store.cache_clear()
+    _joblib.cache_clear()
+
+
+def _path(relative: str) -> Path:
+    """
+    Resolve an input path, raising MissingInput when it does not exist.
+
+    Args:
+        relative (str): Path relative to the data root.
+    Returns:
+        Path: Absolute path.
+    """
+    path = _data_root / relative
+    if not path.exists():
+        raise MissingInput(f"{relative} not found")
+    return path
+
+
+@functools.cache
+def _csv(relative: str) -> pd.DataFrame:
+    """Load a CSV input once per process."""
+    return load_csv(_path(relative), optimise=True)
+
+
+@functools.cache
+def _predictions_store(model: str) -> PredictionStore:
+    """Memory map a model's stored predictions once per process."""
+    return load_predictions(_path(f"model_outputs/{model}/predictions"))
+
+
+@functools.cache
+def _joblib(relative: str) -> object:
+    """Load a joblib artefact once per process."""
+    return joblib.load(_path(relative))
+
+
+def engineered() -> pd.DataFrame:
+    """Engineered Beijing data."""
+    return _csv("data/engineered/beijing_engineered.csv")
+
+
+def one_station() -> pd.DataFrame:
+    """
+    Engineered rows of the first station.
+
+    Returns:
+        pd.DataFrame: One station's data.
+    """
+    df = engineered()
+    return df[df["station"] == df["station"].iloc[0]]
+
+
+def station_means() -> pd.DataFrame:
+    """
+    Mean PM2.5 per station, as the hypothesis 2 page maps it.
+
+    Returns:
+        pd.DataFrame: 'station' and 'pm25' columns.
+    """
+    return (engineered().groupby("station", observed=True)["pm25"]
+            .mean().reset_index())
+
+
+@functools.cache
+def tensor() -> StationTensor:
+    """
+    Dense station tensor of the engineered PM2.5.
+
+    Returns:
+        StationTensor: pm25 with area_type as a static attribute.
+    """
+    return StationTensor.from_frame(engineered(), ["pm25"],
+                                    static=["area_type"])
+
+
+@functools.cache
+def star() -> StarSchema:
+    """
+    Star schema of the engineered data.
+
+    Returns:
+        StarSchema: Fact, station and calendar tables.
+    """
+    return StarSchema.from_frame(engineered())
+
+
+@functools.cache
+def forecast_input() -> tuple:
+    """
+    Model, features and encoded input frame for one station.
+
+    Returns:
+        tuple: (model, features, station frame)
+    """
+    model = _joblib("models/regression/best_regression_model.joblib")
+    features = model.feature_names_in_.tolist()
+    encoders = [_joblib(f"model_outputs/regression/{name}_dtype.joblib")
+                for name in ("season", "area", "station")]
+
+    df = one_station()
+    required = set(features) | {"datetime", "pm25"}
+    df = df[[c for c in df.columns if c in required]]
+    df = apply_forecasting_features(df).ffill()
+    df = encode_categoricals(df, *encoders)
+    return model, features, df[features + ["datetime"]]
+
+
+def _args(*fixtures, **kwargs):
+    """
+    Build a setup function from fixture callables and constant kwargs.
+    Fixtures are callables evaluated at setup; other values pass through.
+
+    Returns:
+        callable: Setup returning (args, kwargs).
+    """
+    def setup():
+        return tuple(f() if callable(f) else f for f in fixtures), kwargs
+    return setup
+
+
+def loader_cases() -> list[Case]:
+    """
+    One load_csv case per CSV dataset under data/ and model_outputs/.
+
+    Returns:
+        list[Case]: Loader cases.
+    """
+    cases = []
+    for folder in ("data", "model_outputs"):
+        for path in sorted((_data_root / folder).rglob("*.csv")):
+            relative = path.relative_to(_data_root).as_posix()
+            cases.append(Case(f"load_csv[{relative}]", "loaders",
+                              load_csv, _args(path, optimise=True)))
+    return cases
+
+
+def _predictions(model: str, key: str):
+    """Fixture returning one array of a model's saved predictions."""
+    return lambda: _predictions_store(model)[key]
+
+
+def _residual_histogram():
+    """Residual distribution of the best regression model."""
+    return residual_histogram(_predictions_store("regression"),
+                              "normal_preds")
+
+
+def _residual_bins(kind: str):
+    """Fixture binning the best regression model's test set."""
+    return lambda: residual_bins(_predictions_store("regression"),
+                                 "normal_preds", kind)
+
+
+def _forecasts():
+    """A 24 hour forecast of one station."""
+    model, features, df = forecast_input()
+    return forecast_horizon(df, model, features, 24).assign(
+        station_name="station")
+
+
+def chart_cases() -> list[Case]:
+    """
+    One case per chart builder, bypassing the figure cache.
+
+    Returns:
+        list[Case]: Chart cases.
+    """
+    clustered = functools.partial(
+        _csv, "model_outputs/clustering/beijing_clustered.csv")
+    silhouette = functools.partial(
+        _csv, "model_outputs/clustering/silhouette_values.csv")
+    grid = functools.partial(
+        _csv, "model_outputs/regression/hyperparameter_results.csv")
+    importances = functools.partial(
+        _csv, "model_outputs/regression/feature_importances.csv")
+    h5_importances = functools.partial(
+        _csv, "model_outputs/h5/feature_importances.csv")
+    meta = functools.partial(_csv, "data/metadata/station_metadata.csv")
+
+    def daily_level():
+        return build_level(one_station(), "daily")
+
+    def pca():
+        return pca_frame(load_pca_array(
+            _path("model_outputs/clustering/pca_coords.npy")))
+
+    specs = [
+        (charts.pyramid_trend, _args(daily_level, "daily")),
+        (charts.seasonal_boxplot, _args(engineered)),
+        (charts.monthly_violin, _args(engineered)),
+        (charts.monthly_trend, _args(engineered)),
+        (charts.yearly_trend, _args(engineered)),
+        (charts.spatial_boxplot, _args(engineered)),
+        (charts.violin_by_station, _args(engineered)),
+        (charts.map_pm25_by_station, _args(station_means, meta)),
+        (charts.area_boxplot, _args(engineered)),
+        (charts.violin_by_area_type, _args(engineered)),
+        (charts.rolling_top_stations, _args(engineered)),
+        (charts.weather_distribution, _args(engineered, "temperature")),
+        (charts.weather_boxplot, _args(engineered, "temperature")),
+        (charts.corr_heatmap, _args(engineered)),
+        (charts.temperal_variation, _args(engineered, "hour")),
+        (charts.plot_actual_vs_pred,
+         _args(_predictions("h5", "y_true"),
+               _predictions("h5", "baseline_pred"),
+               _predictions("h5", "l_pred"))),
+        (charts.befere_vs_after, _args(42.2, 56.1, 0.38, 10.2, 16.6, 0.94)),
+        (charts.plot_lag_feature_importances, _args(h5_importances)),
+        (clustering_charts.make_cluster_radar,
+         _args(clustered, 0, RADAR_FEATURES)),
+        (clustering_charts.pca_cluster_scatter, _args(pca)),
+        (clustering_charts.plot_cluster_size, _args(clustered)),
+        (clustering_charts.silhouette_values_per_cluster, _args(silhouette)),
+        (clustering_charts.silhouette_plot, _args(silhouette, 0)),
+        (modelling_charts.bar_chart, _args(grid, "RMSE")),
+        (modelling_charts.prediction_vs_actual_chart,
+         _args(_residual_bins("prediction"))),
+        (modelling_charts.residuals_distribution_chart,
+         _args(_residual_histogram)),
+        (modelling_charts.residuals_vs_predicted_chart,
+         _args(_residual_bins("residual"))),
+        (modelling_charts.feature_importance_chart, _args(importances)),
+        (modelling_charts.forecast_line_chart, _args(_forecasts, 24)),
+    ]
+    return [Case(f"{func.__module__.split('.')[-1]}.{func.__name__}",
+                 "charts", func.__wrapped__, setup)
+            for func, setup in specs]
+
+
+def all_cases() -> list[Case]:
+    """
+    Every benchmark case, grouped by area.
+
+    Returns:
+        list[Case]: All cases.
+    """
+    def station_groups():
+        df = engineered()
+        return [g["pm25"].dropna().values
+                for _, g in df.groupby("station", observed=False)]
+
+    def forecast_setup(horizon):
+        def setup():
+            model, features, df = forecast_input()
+            return (df, model, features, horizon), {}
+        return setup
+
+    def tensor_pm25():
+        return tensor().variable("pm25")
+
+    cases = loader_cases()
+    cases += [
+        Case("apply_forecasting_features", "features",
+             apply_forecasting_features, _args(engineered)),
+        Case("StationTensor.from_frame", "features",
+             StationTensor.from_frame, _args(engineered, ["pm25"])),
+        Case("dense_forecasting_features", "features",
+             dense_forecasting_features, _args(tensor_pm25)),
+        Case("StarSchema.from_frame", "features",
+             StarSchema.from_frame, _args(engineered)),
+        Case("StarSchema.join[monthly]", "features", StarSchema.join,
+             _args(star, ["year", "month", "month_name", "pm25"])),
+    ]
+    cases += [Case(f"forecast_horizon[{h}h]", "forecasting",
+                   forecast_horizon, forecast_setup(h)) for h in HORIZONS]
+    cases += [
+        Case("eta_squared_anova", "statistics", eta_squared_anova,
+             _args(station_groups)),
+        Case("h2.spatial_anova", "statistics", spatial_anova,
+             _args(engineered)),
+        Case("h3.weather_correlations", "statistics", weather_correlations,
+             _args(engineered, WEATHER_VARS)),
+        Case("h4.temporal_correlations", "statistics",
+             temporal_correlations, _args(engineered, TIME_VARS)),
+        Case("h2.spatial_anova[tensor]", "statistics", spatial_anova,
+             _args(tensor)),
+        Case("h4.temporal_correlations[tensor]", "statistics",
+             temporal_correlations, _args(tensor, TIME_VARS)),
+    ]
+    return cases + chart_cases()
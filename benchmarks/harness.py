@@ -0,0 +1,226 @@
+"""
+Benchmark harness: timing, memory, result files and baseline comparison.
+Each case is timed cold (its first call in the process, after its setup)
+and warm (median of repeated calls), then run once more under tracemalloc
+to record its peak allocation without distorting the timings.
+"""
+
+from pathlib import Path
+import gc
+import json
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+
+ROOT = Path(__file__).parent.parent
+
+# Regression thresholds used when comparing against a baseline
+TIME_THRESHOLD = 0.20  # warm time may grow by 20 %
+MEMORY_THRESHOLD = 0.25  # peak memory may grow by 25 %
+MIN_TIME_DELTA = 0.005  # ignore time changes below 5 ms (timer noise)
+MIN_MEMORY_DELTA = 1.0  # ignore memory changes below 1 MB
+
+
+class MissingInput(Exception):
+    """Raised by a case setup when its input data is not available."""
+
+
+class Case:
+    """
+    A benchmark case: a setup returning the call arguments and the
+    function to measure.
+    """
+
+    def __init__(self, name: str, group: str, func, setup=None):
+        """
+        Args:
+            name (str): Unique case name, e.g. "load_csv[raw/dongsi.csv]".
+            group (str): Area the case belongs to (loaders, charts, ...).
+            func (callable): Function to measure.
+            setup (callable): Returns (args, kwargs) for func; may raise
+                MissingInput. Not timed.
+        """
+        self.name = name
+        self.group = group
+        self.func = func
+        self.setup = setup or (lambda: ((), {}))
+
+
+def _timed(func, args: tuple, kwargs: dict) -> float:
+    """
+    Time a single call.
+
+    Args:
+        func (callable): Function to call.
+        args (tuple): Positional arguments.
+        kwargs (dict): Keyword arguments.
+    Returns:
+        float: Elapsed wall time in seconds.
+    """
+    start = time.perf_counter()
+    func(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def measure(case: Case, repeat: int = 5) -> dict:
+    """
+    Measure one case.
+
+    Args:
+        case (Case): Case to run.
+        repeat (int): Number of warm calls.
+    Returns:
+        dict: Result with 'status' ('ok', 'skipped' or 'error'), and for
+        successful cases 'cold_s', 'warm_s', 'warm_min_s' and 'peak_mb'.
+    """
+    result = {"group": case.group}
+    try:
+        args, kwargs = case.setup()
+    except MissingInput as exc:
+        return {**result, "status": "skipped", "reason": str(exc)}
+    except Exception as exc:
+        return {**result, "status": "error",
+                "reason": f"setup {type(exc).__name__}: {exc}"}
+
+    try:
+        gc.collect()
+        cold = _timed(case.func, args, kwargs)
+        warm = [_timed(case.func, args, kwargs) for _ in range(repeat)]
+
+        gc.collect()
+        tracemalloc.start()
+        case.func(*args, **kwargs)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    except Exception as exc:
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        return {**result, "status": "error",
+                "reason": f"{type(exc).__name__}: {exc}"}
+
+    return {
+        **result,
+        "status": "ok",
+        "cold_s": cold,
+        "warm_s": statistics.median(warm),
+        "warm_min_s": min(warm),
+        "peak_mb": peak / 1024 ** 2,
+    }
+
+
+def _git_commit() -> str | None:
+    """
+    Current git commit of the repository, if available.
+
+    Returns:
+        str | None: Commit hash.
+    """
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_cases(cases: list, repeat: int = 5, log=print) -> dict:
+    """
+    Measure a list of cases.
+
+    Args:
+        cases (list[Case]): Cases to run.
+        repeat (int): Number of warm calls per case.
+        log (callable): Progress output.
+    Returns:
+        dict: {"meta": {...}, "results": {case name: result}}
+    """
+    results = {}
+    for case in cases:
+        results[case.name] = measure(case, repeat)
+        res = results[case.name]
+        if res["status"] == "ok":
+            log(f"{case.name:60s} cold {res['cold_s']:8.3f}s  "
+                f"warm {res['warm_s']:8.3f}s  peak {res['peak_mb']:8.1f}MB")
+        else:
+            log(f"{case.name:60s} {res['status']}: {res['reason']}")
+
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def save_results(report: dict, path: Path) -> Path:
+    """
+    Write a benchmark report as JSON.
+
+    Args:
+        report (dict): Output of run_cases.
+        path (Path): Output path.
+    Returns:
+        Path: Path written.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    return path
+
+
+def load_results(path: Path) -> dict:
+    """
+    Read a benchmark report written by save_results.
+
+    Args:
+        path (Path): Report path.
+    Returns:
+        dict: The report.
+    """
+    return json.loads(Path(path).read_text(encoding="utf-8"))
+
+
+def compare(report: dict, baseline: dict,
+            time_threshold: float = TIME_THRESHOLD,
+            memory_threshold: float = MEMORY_THRESHOLD) -> list[dict]:
+    """
+    Compare a report with a baseline.
+    A case regresses when its fastest warm time (the least noisy timing)
+    or its peak memory grows by more than the threshold and by more than
+    the minimum absolute delta.
+
+    Args:
+        report (dict): Current report.
+        baseline (dict): Baseline report.
+        time_threshold (float): Allowed relative warm time increase.
+        memory_threshold (float): Allowed relative peak memory increase.
+    Returns:
+        list[dict]: One row per case present in both reports with
+        'case', 'metric', 'baseline', 'current', 'change' and 'regression'.
+    """
+    rows = []
+    for name, current in report["results"].items():
+        base = baseline["results"].get(name)
+        if not base or base["status"] != "ok" or current["status"] != "ok":
+            continue
+        for metric, threshold, min_delta in (
+                ("warm_min_s", time_threshold, MIN_TIME_DELTA),
+                ("peak_mb", memory_threshold, MIN_MEMORY_DELTA)):
+            before, after = base[metric], current[metric]
+            change = (after - before) / before if before else 0.0
+            rows.append({
+                "case": name,
+                "metric": metric,
+                "baseline": before,
+                "current": after,
+                "change": change,
+                "regression": change > threshold
+                and after - before > min_delta,
+            })
+    return rows
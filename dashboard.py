@@ -1,4 +1,10 @@
 import streamlit as st
+from utils.data_loader import refresh_appended_data
+from utils.figure_payload import start_page_payloads, check_page_budget
+from utils.fragments import count_script_run, run_counts
+from utils.metrics import start_metrics_server, track_session
+from utils.profiling import (debug_enabled, memory_tracing_enabled,
+                             render_debug_panel, span, start_run)
 
 # Configure the Streamlit page
 st.set_page_config(
@@ -19,13 +25,6 @@ st.html("""
 </style>
 """)
 
-weather_vars = ["temperature",
-                "dew_point",
-                "pressure",
-                "rain",
-                "wind_speed",
-                "relative_humidity"]  # List of weather variables
-
 # Title of the dashboard
 st.title("🌆 Beijing Clean Air Dashboard")
 st.write("Analyze Beijing's air quality through\
@@ -92,43 +91,9 @@ nav = st.navigation({
 
 current_page = nav.title
 
-# Sidebar filters based on the current page
-if current_page == "Hypothesis 3":
-    st.sidebar.header("Filters for Hypothesis 3")
-    weather_filter = st.sidebar.radio(
-        "Select Meteorological Variable",
-        options=weather_vars,
-        index=0,
-        format_func=lambda w: w.replace("_", " ").title(),
-        key="weather_filter"
-    )
-if current_page == "Clustering Analysis":
-    st.sidebar.header("Cluster Profile")
-    cluster_ids = [0, 1, 2, 3, 4, 5, 6, 7]
-    default_cluster = cluster_ids[0] if cluster_ids else None
-
-    selected_cluster = st.sidebar.radio(
-        "Select a cluster:",
-        options=cluster_ids,
-        index=0,
-        format_func=lambda c: f"Cluster {c}",
-        key="selected_cluster"
-    )
-
-if current_page == "Air Quality Forecasting":
-    st.sidebar.header("Forecast Settings")
-    horizon_label = st.sidebar.radio(
-        "Select Forecast Horizon:",
-        [
-            "3 Hours",
-            "6 Hours",
-            "12 Hours",
-            "18 Hours",
-            "24 Hours",
-            "48 Hours"
-        ],
-        key="horizon_label"
-    )
+# Page selectors (weather variable, cluster, forecast horizon) live in
+# fragment panels on their pages, so changing them reruns only that panel
+count_script_run(current_page)
 
 # Include a footer in the sidebar
 st.sidebar.caption("""
@@ -138,5 +103,23 @@ st.sidebar.caption("""
     licensed under CC BY 4.0
 """)
 
-# Run the navigation
-nav.run()
+# Pick up readings appended since the last run (utils.incremental)
+refresh_appended_data()
+
+# Serve /metrics (once per process) when DASHBOARD_METRICS_PORT is set
+start_metrics_server()
+track_session()
+
+# Run the navigation, profiling the page and tracking its chart payload
+debug = debug_enabled()
+start_run(current_page, trace_memory=memory_tracing_enabled())
+start_page_payloads(current_page)
+with span(current_page, kind="page"):
+    nav.run()
+check_page_budget(current_page)
+
+# Show profiling spans and run counts with ?debug=1
+if debug:
+    render_debug_panel()
+    with st.sidebar.expander("Run counts"):
+        st.json(run_counts())
@@ -1,4 +1,6 @@
 import streamlit as st
+from utils.figure_payload import plotly_chart
+from utils.fragments import panel
 from utils.data_loader import (load_clustered,
                                load_pca_coords,
                                load_silhouette_values,
@@ -25,61 +27,38 @@ NUMERIC_FEATURES = [
     "temp_pres_interaction",
 ]
 
-# Get selected cluster from session state or default to 0
-selected_cluster = st.session_state.get("selected_cluster", 0)
-profile = cluster_profiles.get(selected_cluster, {})
+CLUSTER_IDS = [int(c) for c in sorted(df_clusters["cluster"].unique())]
 
 st.title(":material/hive: Clustering Analysis")
 
 col1, col2 = st.columns([1, 3])
 with col1:
-    tab1, tab2 = st.tabs([":material/bar_chart: Overview",
-                          ":material/book: Cluster Profile"])
-    with tab1:
-        st.subheader(":material/bar_chart: Overview")
-        st.markdown("""
-        This page summarises the clustering performed in **Notebook 10**:
-
-        - Visualising clusters in **PCA space**
-        - Understanding **cluster sizes** & **quality** (silhouette scores)
-        - Exploring **cluster-specific feature profiles**
-        - Providing **human-readable profiles** loaded from YAML
-        """)
-
-        m1, m2 = st.columns(2)
-        m3, _ = st.columns(2)
-        m1.metric("Total Observations", len(df_clusters))
-        m2.metric("Number of Clusters", df_clusters["cluster"].nunique())
-        m3.metric("Average Silhouette Score",
-                  f"{df_sil['silhouette'].mean():.3f}")
-    with tab2:
-        st.subheader(f":material/book:\
-                      {profile.get('name', f'Cluster {selected_cluster}')}")
-        st.write(profile.get("summary", "No profile description available."))
-
-        notes = profile.get("notes", [])
-        if notes:
-            st.markdown("**Key characteristics:**")
-            for item in notes:
-                st.markdown(f"- {item}")
-
-        st.markdown("---")
-        st.caption(
-            "Profiles are derived from cluster-level means of PM2.5 and key\
-                meteorological features."
-        )
+    st.subheader(":material/bar_chart: Overview")
+    st.markdown("""
+    This page summarises the clustering performed in **Notebook 10**:
+
+    - Visualising clusters in **PCA space**
+    - Understanding **cluster sizes** & **quality** (silhouette scores)
+    - Exploring **cluster-specific feature profiles**
+    - Providing **human-readable profiles** loaded from YAML
+    """)
+
+    m1, m2 = st.columns(2)
+    m3, _ = st.columns(2)
+    m1.metric("Total Observations", len(df_clusters))
+    m2.metric("Number of Clusters", df_clusters["cluster"].nunique())
+    m3.metric("Average Silhouette Score",
+              f"{df_sil['silhouette'].mean():.3f}")
 with col2:
     tab = st.tabs([":material/scatter_plot: PCA Visualisation",
                    ":material/bar_chart: Cluster Size",
-                   ":material/insights: Silhouette Values per Cluster",
-                   ":material/radar: Cluster Feature Profile",
-                   ":material/insights: Silhouette Plot"])
+                   ":material/insights: Silhouette Values per Cluster"])
     with tab[0]:
         st.header(":material/scatter_plot: PCA Cluster Visualisation")
         graph, info = st.columns([3, 2])
         with graph:
-            st.plotly_chart(pca_cluster_scatter(df_pca),
-                            use_container_width=True)
+            plotly_chart(pca_cluster_scatter(df_pca),
+                         use_container_width=True)
         with info:
             st.markdown("""
             **What this shows:**
@@ -103,8 +82,8 @@ with col2:
         graph, info = st.columns([3, 2])
         with graph:
             cluster_counts = df_clusters["cluster"].value_counts().sort_index()
-            st.plotly_chart(plot_cluster_size(df_clusters),
-                            use_container_width=True)
+            plotly_chart(plot_cluster_size(df_clusters),
+                         use_container_width=True)
         with info:
             st.markdown("""
             **What this shows:**
@@ -123,8 +102,8 @@ with col2:
         st.header(":material/insights: Silhouette Values per Cluster")
         graph, info = st.columns([3, 2])
         with graph:
-            st.plotly_chart(silhouette_values_per_cluster(df_sil),
-                            use_container_width=True)
+            plotly_chart(silhouette_values_per_cluster(df_sil),
+                         use_container_width=True)
         with info:
             st.markdown("""
             **What this shows:**
@@ -147,52 +126,97 @@ with col2:
             more distinct, while clusters with low or wide ranges of
             silhouette values may require re-evaluation.
             """)
-    with tab[3]:
-        st.header(":material/radar: Cluster Feature Profiles")
-        graph, info = st.columns([3, 2])
-        with graph:
-            st.plotly_chart(make_cluster_radar(df_clusters,
-                                               selected_cluster,
-                                               NUMERIC_FEATURES),
-                            use_container_width=True)
-        with info:
-            st.markdown("""
-            **What this shows:**
-            A radar chart comparing the normalised mean values of key features
-            within the selected cluster. Each spike represents a feature
-            relative to other clusters.
 
-            **Why it matters:**
-            Radar profiles clearly highlight what makes a cluster unique — for
-            example, higher PM2.5, lower wind speeds, or distinct temperature
-            patterns. This provides human-readable insight into the behaviour
-            of each cluster.
 
-            **Key takeaway:**
-            Radar charts show each cluster's defining characteristics, helping
-            interpret the environmental and pollution patterns that
-            differentiate one cluster from another.
-            """)
-    with tab[4]:
-        st.header(":material/insights: Silhouette Plot (Cluster Quality)")
-        graph, info = st.columns([3, 2])
-        with graph:
-            st.plotly_chart(silhouette_plot(df_sil, selected_cluster),
-                            use_container_width=True)
-        with info:
-            st.markdown("""
-            **What this shows:**
-            A classic silhouette plot showing individual silhouette scores for
-            each sample within each cluster, with an average silhouette
-            benchmark line.
+@panel("cluster_profile")
+def cluster_profile_panel():
+    """
+    Cluster selector with the profile, radar chart and silhouette plot of
+    the selected cluster. Changing the cluster reruns only this panel.
+    """
+    st.header(":material/book: Cluster Profile")
+    selected_cluster = st.radio(
+        "Select a cluster:",
+        options=CLUSTER_IDS,
+        index=0,
+        format_func=lambda c: f"Cluster {c}",
+        horizontal=True,
+        key="selected_cluster"
+    )
+    profile = cluster_profiles.get(selected_cluster, {})
+
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        name = profile.get("name", f"Cluster {selected_cluster}")
+        st.subheader(f":material/book: {name}")
+        st.write(profile.get("summary",
+                             "No profile description available."))
 
-            **Why it matters:**
-            This plot reveals how consistently each cluster is formed. Tall,
-            dense bands with high silhouette scores indicate strong clusters;
-            thin or low-value bands indicate weak or overlapping clusters.
+        notes = profile.get("notes", [])
+        if notes:
+            st.markdown("**Key characteristics:**")
+            for item in notes:
+                st.markdown(f"- {item}")
 
-            **Key takeaway:**
-            The silhouette plot provides a comprehensive view of cluster
-            cohesion and separation, highlighting which clusters are
-            well-defined and which may require further tuning.
-            """)
+        st.markdown("---")
+        st.caption(
+            "Profiles are derived from cluster-level means of PM2.5 and\
+                key meteorological features."
+        )
+    with col2:
+        tab = st.tabs([":material/radar: Cluster Feature Profile",
+                       ":material/insights: Silhouette Plot"])
+        with tab[0]:
+            st.header(":material/radar: Cluster Feature Profiles")
+            graph, info = st.columns([3, 2])
+            with graph:
+                plotly_chart(make_cluster_radar(df_clusters,
+                                                selected_cluster,
+                                                NUMERIC_FEATURES),
+                             use_container_width=True)
+            with info:
+                st.markdown("""
+                **What this shows:**
+                A radar chart comparing the normalised mean values of key
+                features within the selected cluster. Each spike represents a
+                feature relative to other clusters.
+
+                **Why it matters:**
+                Radar profiles clearly highlight what makes a cluster unique —
+                for example, higher PM2.5, lower wind speeds, or distinct
+                temperature patterns. This provides human-readable insight into
+                the behaviour of each cluster.
+
+                **Key takeaway:**
+                Radar charts show each cluster's defining characteristics,
+                helping interpret the environmental and pollution patterns that
+                differentiate one cluster from another.
+                """)
+        with tab[1]:
+            st.header(
+                ":material/insights: Silhouette Plot (Cluster Quality)")
+            graph, info = st.columns([3, 2])
+            with graph:
+                plotly_chart(silhouette_plot(df_sil, selected_cluster),
+                             use_container_width=True)
+            with info:
+                st.markdown("""
+                **What this shows:**
+                A classic silhouette plot showing individual silhouette scores
+                for each sample within each cluster, with an average silhouette
+                benchmark line.
+
+                **Why it matters:**
+                This plot reveals how consistently each cluster is formed.
+                Tall, dense bands with high silhouette scores indicate strong
+                clusters; thin or low-value bands indicate weak or overlapping
+                clusters.
+
+                **Key takeaway:**
+                The silhouette plot provides a comprehensive view of cluster
+                cohesion and separation, highlighting which clusters are
+                well-defined and which may require further tuning.
+                """)
+
+
+cluster_profile_panel()
@@ -1,53 +1,18 @@
 import streamlit as st
 import pandas as pd
+from utils.figure_payload import plotly_chart
+from utils.fragments import panel
+from utils.profiling import profiled
 from utils.model_loader import load_best_model, load_encoders
-from utils.data_loader import load_engineered
-from utils.feature_engineering import apply_forecasting_features
-from utils.forcast import forecast_horizon
+from utils.data_loader import engineered_dependent, load_station_tensor
+from utils.feature_registry import FEATURES, add_features
+from utils.forcast import encode_categoricals, forecast_horizon
 from utils.modelling_charts import forecast_line_chart
+from utils.station_tensor import StationTensor
 
 
 st.header(":material/online_prediction: PM2.5 Forecast — All Stations")
 
-model = load_best_model()
-features = model.feature_names_in_.tolist()
-season_dtype, area_dtype, station_dtype = load_encoders()
-
-
-# Helper — Apply SAME categorical encoding used during training
-def apply_model_dtypes(df):
-    df = df.copy()
-    df["season"] = df["season"]\
-        .astype(season_dtype).cat.codes.astype("int16")
-    df["area_type"] = df["area_type"]\
-        .astype(area_dtype).cat.codes.astype("int16")
-    df["station"] = df["station"]\
-        .astype(station_dtype).cat.codes.astype("int16")
-    return df
-
-
-df = load_engineered()  # Load engineered data
-
-# Keep only model features + datetime + pm25 (needed for lags)
-required_cols = set(features) | {"datetime", "pm25"}
-
-# Keep only required columns
-df = df[[col for col in df.columns if col in required_cols]]
-
-# Apply forecasting features per station, forward-fill missing values
-df_list = []
-for st_name in df["station"].unique():
-    d = df[df["station"] == st_name].copy()
-    d = apply_forecasting_features(d).fillna(method="ffill")
-    if not d.empty:
-        df_list.append(d)
-
-df = pd.concat(df_list, ignore_index=True)
-
-# Drop pm25 if not used in features
-if "pm25" in df.columns and "pm25" not in features:
-    df.drop(columns=["pm25"], inplace=True)
-
 # Horizon mapping
 horizon_map = {"3 Hours": 3,
                "6 Hours": 6,
@@ -56,44 +21,109 @@ horizon_map = {"3 Hours": 3,
                "24 Hours": 24,
                "48 Hours": 48}
 
-# Select forecast horizon
-horizon = horizon_map.get(st.session_state.get("horizon_label", "3 Hours"), 3)
-
-# Forecast all stations
-forcast_list = []
-
-# Generate forecasts for each station
-for st_name in df["station"].unique():
-    # Filter data for the station
-    df_station = df[df["station"] == st_name].copy()
-
-    # Apply categorical dtypes
-    df_station = apply_model_dtypes(df_station)
-
-    # keep only model features + datetime
-    df_station = df_station[features + ["datetime"]]
-    forecast_df = forecast_horizon(df_station,
-                                   model,
-                                   features,
-                                   horizon)  # Generate forecast
-    forecast_df["station_name"] = st_name  # Add station name
-    forcast_list.append(forecast_df)  # Collect forecast
-
-# Combine all forecasts
-all_forecasts = pd.concat(forcast_list, ignore_index=True)  # Combi
-
-
-# display forecasts
-if forcast_list:
+# Hours of history behind the latest reading needed for the features
+HISTORY_HOURS = 48
+
+
+@engineered_dependent
+@profiled(kind="section",
+          cache=st.cache_data(
+              show_spinner="Preparing forecasting features..."))
+def prepare_station_inputs() -> dict:
+    """
+    Build the encoded model inputs of every station once per session
+    server, independent of the selected horizon.
+    The forecast starts from each station's latest hour, so only a short
+    window of the dense station tensor is needed: the registered features
+    the model uses are computed over it, then forward filled.
+
+    Returns:
+        dict: Station name -> one-row DataFrame of model features +
+        datetime.
+    """
+    features = load_best_model().feature_names_in_.tolist()
+    derived = [name for name in features + ["season"] if name in FEATURES]
+    tensor = load_station_tensor()
+    last = tensor.last_valid("pm25")
+
+    inputs = {}
+    for i, st_name in enumerate(tensor.stations):
+        if last[i] < 0:
+            continue
+        first = max(last[i] + 1 - HISTORY_HOURS, 0)
+        window = StationTensor(tensor.values[i:i + 1, first:last[i] + 1],
+                               [st_name], tensor.times[first],
+                               tensor.variables, tensor.freq, tensor.static)
+
+        # Latest values plus derived features, forward filled
+        d = add_features(window.to_frame(dropna=False), derived)
+        d = d.ffill().tail(1).reset_index(drop=True)
+        d["station"] = st_name
+
+        # Apply categorical dtypes, keep only model features + datetime
+        d = encode_categoricals(d, *load_encoders())
+        inputs[st_name] = d[features + ["datetime"]]
+    return inputs
+
+
+@engineered_dependent
+@profiled(kind="section",
+          cache=st.cache_data(show_spinner="Forecasting..."))
+def forecast_all_stations(horizon: int) -> pd.DataFrame:
+    """
+    Forecast every station for a horizon.
+
+    Args:
+        horizon (int): Number of hours to forecast.
+    Returns:
+        pd.DataFrame: Forecasts with a 'station_name' column.
+    """
+    model = load_best_model()
+    features = model.feature_names_in_.tolist()
+
+    forcast_list = []
+    for st_name, df_station in prepare_station_inputs().items():
+        forecast_df = forecast_horizon(df_station,
+                                       model,
+                                       features,
+                                       horizon)  # Generate forecast
+        forecast_df["station_name"] = st_name  # Add station name
+        forcast_list.append(forecast_df)  # Collect forecast
+
+    if not forcast_list:
+        return pd.DataFrame()
+    return pd.concat(forcast_list, ignore_index=True)
+
+
+@panel("forecast")
+def forecast_panel():
+    """
+    Horizon selector with the forecast chart and table. Changing the
+    horizon reruns only this panel.
+    """
+    horizon_label = st.radio("Select Forecast Horizon:",
+                             list(horizon_map),
+                             horizontal=True,
+                             key="horizon_label")
+    horizon = horizon_map.get(horizon_label, 3)
+
+    all_forecasts = forecast_all_stations(horizon)
+
+    # display forecasts
+    if all_forecasts.empty:
+        return
     col1, col2 = st.columns([3, 2])
     # Plotting
     with col1:
         st.subheader(f":material/trending_up:\
                       PM2.5 Forecast for Next {horizon} Hours")
-        st.plotly_chart(forecast_line_chart(all_forecasts, horizon),
-                        use_container_width=True)
+        plotly_chart(forecast_line_chart(all_forecasts, horizon),
+                     use_container_width=True)
     with col2:
         # Data display
         st.subheader(":material/assignment: Forecast Data")
         st.write("Forecast table for selected stations:")
         st.dataframe(all_forecasts)
+
+
+forecast_panel()
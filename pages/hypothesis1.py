@@ -4,14 +4,17 @@ This page analyzes the seasonal variation in PM2.5 levels in Beijing.
 """
 
 import streamlit as st
-from utils.data_loader import load_engineered
+from utils.figure_payload import plotly_chart
+from utils.data_loader import load_engineered_stats, load_star
 from utils.charts import (monthly_violin,
                           seasonal_boxplot,
                           monthly_trend,
                           yearly_trend)
 import pingouin as pg
 
-df = load_engineered()
+# Charts read only their columns, joined from the shared star schema;
+# month labels come from the calendar dimension
+df = load_star().join(["season", "year", "month", "month_name", "pm25"])
 
 st.title(":material/ac_unit: Hypothesis 1")
 st.latex(r"""
@@ -29,7 +32,9 @@ with col1:
     # Summary Metrics
     # -----------------------------------------------------
     st.subheader(":material/thermostat: Season Averages")
-    seasonal_avg = df.groupby("season")["pm25"].mean().round(1)
+    seasons = load_engineered_stats()["groups"]["season"]["pm25"]
+    seasonal_avg = {season: round(summary["mean"], 1)
+                    for season, summary in seasons.items()}
     colA, colB = st.columns(2)
     colA.metric("Winter avg PM2.5", f"{seasonal_avg['winter']}")
     colB.metric("Spring avg PM2.5", f"{seasonal_avg['spring']}")
@@ -56,7 +61,7 @@ with col1:
                          Seasonal PM2.5 Distribution")
             graph, info = st.columns([3, 2])
             with graph:
-                st.plotly_chart(seasonal_boxplot(df), use_container_width=True)
+                plotly_chart(seasonal_boxplot(df), use_container_width=True)
             with info:
                 st.markdown("""
                     **What this shows:**
@@ -81,7 +86,7 @@ with col1:
                          Monthly PM2.5 Distribution")
             graph, info = st.columns([3, 2])
             with graph:
-                st.plotly_chart(monthly_violin(df), use_container_width=True)
+                plotly_chart(monthly_violin(df), use_container_width=True)
             with info:
                 st.markdown("""
                     **What this shows:**
@@ -103,7 +108,7 @@ with col1:
             st.subheader(":material/calendar_month: Monthly PM2.5 Trend")
             graph, info = st.columns([3, 2])
             with graph:
-                st.plotly_chart(monthly_trend(df), use_container_width=True)
+                plotly_chart(monthly_trend(df), use_container_width=True)
             with info:
                 st.markdown("""
                     **What this shows:**
@@ -125,7 +130,7 @@ with col1:
             st.subheader(":material/calendar_today: Yearly PM2.5 Trend")
             graph, info = st.columns([3, 2])
             with graph:
-                st.plotly_chart(yearly_trend(df), use_container_width=True)
+                plotly_chart(yearly_trend(df), use_container_width=True)
             with info:
                 st.markdown("""
                     **What this shows:**
@@ -5,71 +5,45 @@ stations in Beijing using average PM2.5 levels and a map visualization.
 """
 
 import streamlit as st
-from utils.data_loader import load_engineered, load_station_meta
-from scipy import stats
+from utils.figure_payload import plotly_chart
+from utils.data_loader import (load_engineered, load_engineered_stats,
+                               load_station_meta, load_station_tensor)
 import numpy as np
 import pandas as pd
 from utils.charts import (spatial_boxplot,
                           map_pm25_by_station,
                           violin_by_station,
                           area_boxplot,
-                          violin_by_area_type)
-from utils.eta_squared import eta_squared_anova
+                          violin_by_area_type,
+                          rolling_top_stations)
+from utils.hypothesis_stats import spatial_anova
 
 
 # Load data
 df = load_engineered()
 meta = load_station_meta()
-
-# Prepare data for ANOVA
-station_means = df.groupby("station")["pm25"].mean().reset_index()
-
-# ANOVA for stations and area types
-station_groups = [group["pm25"].dropna().values
-                  for _, group in df.groupby("station", observed=False)
-                  if group["pm25"].notna().sum() > 0]
-area_groups = [
-    group["pm25"].dropna().values
-    for _, group in df.groupby("area_type", observed=False)
-    if group["pm25"].notna().sum() > 0
-    ]
-
-# Perform ANOVA
-f_stat_station, p_value_station = stats.f_oneway(*station_groups)
-f_stat_area, p_value_area = stats.f_oneway(*area_groups)
-
-# Calculate eta-squared effect sizes
-eta_station = np.nan
-eta_area = np.nan
-eta_station = eta_squared_anova(station_groups)
-eta_area = eta_squared_anova(area_groups)
-
-# Compute station statistics
-station_stats = df.groupby("station")["pm25"].agg(
-            Mean="mean",
-            Median="median",
-            Std_Dev="std",
-            Max="max",
-            Min="min"
-        ).reset_index()
-# Prepare ANOVA results for display
-anova_results = {
-            "Stations": {
-                "type": "Stations",
-                "F-statistic": f_stat_station,
-                "p-value": p_value_station,
-                "eta-squared": eta_station
-            },
-            "Area Types": {
-                "type": "Area Types",
-                "F-statistic": f_stat_area,
-                "p-value": p_value_area,
-                "eta-squared": eta_area
-            }
-        }
-
-# Compute area-type means
-area_means = df.groupby("area_type")["pm25"].mean()
+tensor = load_station_tensor()
+
+# Station statistics along the time axis of each station row
+pm25 = tensor.variable("pm25")
+station_stats = pd.DataFrame({
+    "station": tensor.stations,
+    "Mean": np.nanmean(pm25, axis=1),
+    "Median": np.nanmedian(pm25, axis=1),
+    "Std_Dev": np.nanstd(pm25, axis=1, ddof=1),
+    "Max": np.nanmax(pm25, axis=1),
+    "Min": np.nanmin(pm25, axis=1),
+})
+station_means = station_stats[["station", "Mean"]].rename(
+    columns={"Mean": "pm25"})
+
+# ANOVA with eta-squared effect sizes for stations and area types
+anova_results = spatial_anova(tensor)
+
+# Area-type means from the column statistics written with the data
+area_means = pd.Series({
+    area: summary["mean"] for area, summary
+    in load_engineered_stats()["groups"]["area_type"]["pm25"].items()})
 urban_mean = area_means.get("urban", float("nan"))
 suburban_mean = area_means.get("suburban", float("nan"))
 residential_mean = area_means.get("residential", float("nan"))
@@ -134,6 +108,7 @@ with col2:
                    ":material/map: Station Map",
                    ":material/bar_chart: Plot Area Boxplot",
                    ":material/bar_chart: Area Violin Plot",
+                   ":material/show_chart: 7-Day Rolling Trend",
                    ":material/analytics: ANOVA & Eta Squared"])
     with tab[0]:
         st.subheader(":material/bar_chart_4_bars:\
@@ -173,7 +148,7 @@ with col2:
                      Plot PM2.5 Variation Across 12 Stations")
         graph, info = st.columns([3, 2])
         with graph:
-            st.plotly_chart(spatial_boxplot(df), use_container_width=True)
+            plotly_chart(spatial_boxplot(df), use_container_width=True)
         with info:
             st.markdown("""
                 **What this shows:**
@@ -197,7 +172,7 @@ with col2:
         st.subheader(":material/bar_chart: PM2.5 Distribution by Station")
         graph, info = st.columns([3, 2])
         with graph:
-            st.plotly_chart(violin_by_station(df), use_container_width=True)
+            plotly_chart(violin_by_station(df), use_container_width=True)
         with info:
             st.markdown("""
                 **What this shows:**
@@ -221,8 +196,8 @@ with col2:
         st.subheader(":material/map: Average PM2.5 by Station on Map")
         graph, info = st.columns([3, 2])
         with graph:
-            st.plotly_chart(map_pm25_by_station(station_means, meta),
-                            use_container_width=True)
+            plotly_chart(map_pm25_by_station(station_means, meta),
+                         use_container_width=True)
         with info:
             st.markdown("""
                         **What this shows:**
@@ -245,7 +220,7 @@ with col2:
         st.subheader(":material/bar_chart: PM2.5 Variation Across Areas")
         graph, info = st.columns([3, 2])
         with graph:
-            st.plotly_chart(area_boxplot(df), use_container_width=True)
+            plotly_chart(area_boxplot(df), use_container_width=True)
         with info:
             st.markdown("""
                 **What this shows:**
@@ -267,7 +242,7 @@ with col2:
         st.subheader(":material/bar_chart: PM2.5 Distribution by Area")
         graph, info = st.columns([3, 2])
         with graph:
-            st.plotly_chart(violin_by_area_type(df), use_container_width=True)
+            plotly_chart(violin_by_area_type(df), use_container_width=True)
         with info:
             st.markdown("""
                 **What this shows:**
@@ -285,6 +260,26 @@ with col2:
                 strengthening evidence that spatial characteristics are a
                 major factor in pollution exposure.""")
     with tab[6]:
+        st.subheader(":material/show_chart: 7-Day Rolling PM2.5 —\
+                      Top 4 Stations")
+        graph, info = st.columns([3, 2])
+        with graph:
+            plotly_chart(rolling_top_stations(df), use_container_width=True)
+        with info:
+            st.markdown("""
+                **What this shows:**
+                The 7-day rolling mean of PM2.5 for the four stations with
+                the highest average pollution, across the full study period.
+
+                **Why it matters:**
+                Smoothing hourly noise reveals how the most polluted
+                stations move together through pollution episodes and
+                seasons, and whether any station diverges from the others.
+
+                **Key takeaway:**
+                The most polluted stations rise and fall together, showing
+                that city-wide episodes drive much of the spatial pattern.""")
+    with tab[7]:
         st.subheader(":material/analytics: ANOVA & Effect Size")
         st.dataframe(pd.DataFrame(anova_results).T.style.format({
             "type": "{}",
@@ -6,10 +6,13 @@ correlation.
 """
 
 import streamlit as st
-from utils.data_loader import load_engineered
+from utils.figure_payload import plotly_chart
+from utils.fragments import panel
+from utils.profiling import profiled
+from utils.data_loader import engineered_dependent, load_engineered
+from utils import hypothesis_stats
 from utils.charts import weather_distribution, weather_boxplot, corr_heatmap
 import numpy as np
-from scipy import stats
 import json
 from pathlib import Path
 
@@ -32,7 +35,6 @@ def get_weather_explanation(weather_var: str) -> dict:
     return WEATHER_EXPLANATIONS.get(weather_var, None)
 
 
-weather_var = st.session_state.get("weather_filter", "temperature")
 weather_vars = [
     "temperature",
     "dew_point",
@@ -42,15 +44,22 @@ weather_vars = [
     "relative_humidity",
 ]
 
-# Compute simple Pearson correlations against pm25
-corrs = {}
-pvals = {}
 
-for var in weather_vars:
-    valid = df[[var, "pm25"]].dropna()
-    r, p = stats.pearsonr(valid[var], valid["pm25"])
-    corrs[var] = r
-    pvals[var] = p
+@engineered_dependent
+@profiled(kind="section", cache=st.cache_data(show_spinner=False))
+def weather_correlations(weather_vars: list) -> tuple[dict, dict]:
+    """
+    Compute simple Pearson correlations of weather variables against pm25.
+    Args:
+        weather_vars (list): Weather variable names.
+    Returns:
+        tuple[dict, dict]: Correlation coefficients and p-values per variable.
+    """
+    return hypothesis_stats.weather_correlations(load_engineered(),
+                                                 weather_vars)
+
+
+corrs, pvals = weather_correlations(weather_vars)
 
 # Strongest positive and negative
 strongest_pos = max(corrs, key=lambda v: corrs[v])
@@ -63,6 +72,43 @@ n_sig = len(sig_vars)
 avg_abs_corr = np.mean([abs(corrs[v]) for v in weather_vars])
 
 
+@panel("weather_variable")
+def weather_panel():
+    """
+    Weather variable selector with its distribution and box plots.
+    Changing the variable reruns only this panel.
+    """
+    st.subheader(":material/weather_mix: Weather Variable Analysis")
+    weather_var = st.radio(
+        "Select Meteorological Variable",
+        options=weather_vars,
+        index=0,
+        format_func=lambda w: w.replace("_", " ").title(),
+        horizontal=True,
+        key="weather_filter"
+    )
+    col1, col2 = st.columns([3, 2])
+    with col1:
+        tabA, tabB = st.tabs([":material/bar_chart: Distribution Plot",
+                              ":material/bar_chart: Box Plot"])
+        with tabA:
+            plotly_chart(weather_distribution(df, weather_var),
+                         use_container_width=True)
+        with tabB:
+            plotly_chart(weather_boxplot(df, weather_var),
+                         use_container_width=True)
+    with col2:
+        explanation = get_weather_explanation(weather_var)
+        if explanation:
+            st.markdown(f"""
+            **What this shows:** {explanation["what"]}
+
+            **Why it matters:** {explanation["why"]}
+
+            **Key takeaway:** {explanation["takeaway"]}
+            """)
+
+
 st.title(":material/weather_mix: Hypothesis 3")
 st.latex(r"""
     \begin{aligned}
@@ -102,33 +148,13 @@ with col2:
     tab1, tab2 = st.tabs([":material/finance_mode: Weather Variable Analysis",
                          ":material/scatter_plot: Correlation Matrix"])
     with tab1:
-        st.subheader(":material/weather_mix: Weather Variable Analysis")
-        col1, col2 = st.columns([3, 2])
-        with col1:
-            tabA, tabB = st.tabs([":material/bar_chart: Distribution Plot",
-                                  ":material/bar_chart: Box Plot"])
-            with tabA:
-                st.plotly_chart(weather_distribution(df, weather_var),
-                                use_container_width=True)
-            with tabB:
-                st.plotly_chart(weather_boxplot(df, weather_var),
-                                use_container_width=True)
-        with col2:
-            explanation = get_weather_explanation(weather_var)
-            if explanation:
-                st.markdown(f"""
-                **What this shows:** {explanation["what"]}
-
-                **Why it matters:** {explanation["why"]}
-
-                **Key takeaway:** {explanation["takeaway"]}
-                """)
+        weather_panel()
     with tab2:
         # ------------------------- Correlation Heatmap ------------------
         st.subheader(":material/scatter_plot: Correlation Matrix")
         col1, col2 = st.columns([3, 2])
         with col1:
-            st.plotly_chart(corr_heatmap(df), use_container_width=True)
+            plotly_chart(corr_heatmap(df), use_container_width=True)
         with col2:
             st.markdown("""
                         **What this shows:**
@@ -4,10 +4,11 @@ This page examines the temporal dependence in PM2.5 levels in Beijing.
 """
 
 import streamlit as st
-from utils.data_loader import load_engineered
-from scipy.stats import spearmanr
+from utils.figure_payload import plotly_chart
+from utils.data_loader import load_engineered, load_station_tensor
 import pandas as pd
 from utils.charts import temperal_variation
+from utils.hypothesis_stats import temporal_correlations
 
 df = load_engineered()
 
@@ -27,14 +28,9 @@ with col1:
     # Spearman correlations for temporal variables
     time_vars = ["hour", "day_of_week", "month", "year"]
 
-    # Calculate Spearman correlations
-    results = {}
-    sig_count = 0
-    for var in time_vars:
-        coef, p = spearmanr(df["pm25"], df[var])
-        results[var] = {"coef": coef, "p": p}
-        if p < 0.05:
-            sig_count += 1
+    # Calculate Spearman correlations on the dense station tensor
+    results = temporal_correlations(load_station_tensor(), time_vars)
+    sig_count = sum(results[var]["p"] < 0.05 for var in time_vars)
 
     # strongest + weakest correlations
     strongest_var = max(results.keys(), key=lambda v: abs(results[v]["coef"]))
@@ -76,8 +72,8 @@ with col2:
         colA, colB = st.columns([3, 2])
         with colA:
             st.subheader(":material/hourglass: Hourly Trends in PM2.5")
-            st.plotly_chart(temperal_variation(df, "hour"),
-                            use_container_width=True)
+            plotly_chart(temperal_variation(df, "hour"),
+                         use_container_width=True)
         with colB:
             st.markdown("""
             **What this shows:**
@@ -99,8 +95,8 @@ with col2:
         with colA:
             st.subheader(":material/calendar_today:\
                           Day-of-Week Trends in PM2.5")
-            st.plotly_chart(temperal_variation(df, "day_of_week"),
-                            use_container_width=True)
+            plotly_chart(temperal_variation(df, "day_of_week"),
+                         use_container_width=True)
         with colB:
             st.markdown("""
             **What this shows:**
@@ -120,8 +116,8 @@ with col2:
         colA, colB = st.columns([3, 2])
         with colA:
             st.subheader(":material/calendar_month: Monthly Trends in PM2.5")
-            st.plotly_chart(temperal_variation(df, "month"),
-                            use_container_width=True)
+            plotly_chart(temperal_variation(df, "month"),
+                         use_container_width=True)
         with colB:
             st.markdown("""
             **What this shows:**
@@ -140,8 +136,8 @@ with col2:
         colA, colB = st.columns([3, 2])
         with colA:
             st.subheader(":material/calendar_today: Yearly Trends in PM2.5")
-            st.plotly_chart(temperal_variation(df, "year"),
-                            use_container_width=True)
+            plotly_chart(temperal_variation(df, "year"),
+                         use_container_width=True)
         with colB:
             st.markdown("""
             **What this shows:**
@@ -161,15 +157,12 @@ with col2:
         with colA:
             st.subheader(":material/analytics:\
                           Spearman Correlations with Temporal Variables")
-            results = []
-            # Calculate Spearman correlations
-            for var in time_vars:
-                coef, p = spearmanr(df["pm25"], df[var])
-                results.append({"Variable": var,
-                                "Spearman ρ": coef, "p-value": p})
-
-            # Create DataFrame
-            spearman_time_df = pd.DataFrame(results)
+            # Reuse the Spearman correlations from the key metrics
+            spearman_time_df = pd.DataFrame([
+                {"Variable": var,
+                 "Spearman ρ": results[var]["coef"],
+                 "p-value": results[var]["p"]}
+                for var in time_vars])
 
             # Display the DataFrame
             st.dataframe(spearman_time_df.style.format({"Spearman ρ": "{:.3f}",
@@ -4,10 +4,14 @@ This page evaluates whether including lag features in the model
 improves PM2.5 forecasting accuracy.
 """
 
+import pandas as pd
 import streamlit as st
+from utils.figure_payload import plotly_chart
 from utils.data_loader import (load_engineered,
                                load_model_predictions,
-                               load_feature_importance)
+                               load_feature_importance,
+                               load_slice_metrics)
+from utils.model_evaluation import available_slices, format_metrics
 from utils.charts import (plot_actual_vs_pred,
                           befere_vs_after,
                           plot_lag_feature_importances)
@@ -31,47 +35,80 @@ baseline_pred = predictions["baseline_pred"]
 lag_pred = predictions["l_pred"]
 feature_importance = load_feature_importance("h5")
 
-# Model performance metrics from notebook evaluation
-baseline_mae = 42.163872063135194  # obtained from notebook
-baseline_rmse = 56.09295025109381  # obtained from notebook
-baseline_r2 = 0.37973956724526914  # obtained from notebook
-lag_mae = 10.227534681736866  # obtained from notebook
-lag_rmse = 16.55474291376961  # obtained from notebook
-lag_r2 = 0.9395242494495807  # obtained from notebook
+# Model performance metrics with 95% bootstrap intervals, computed from
+# the stored predictions
+lag = load_slice_metrics("h5", "l_pred").iloc[0]
+aligned = len(baseline_pred) == len(y_true)
+if aligned:
+    baseline = load_slice_metrics("h5", "baseline_pred").iloc[0]
+else:
+    # Predictions converted from the old export hold the baseline for
+    # every test row but y_true only for the rows the lag model kept, so
+    # the baseline cannot be scored on the same rows: notebook 09's
+    # figures are shown as reported, without intervals, and left out of
+    # the comparisons until it is re-run
+    baseline_pred = None
+    baseline = pd.Series({"MAE": 42.163872063135194,
+                          "RMSE": 56.09295025109381,
+                          "R2": 0.37973956724526914})
+
+
+def interval(metrics: pd.Series, name: str) -> str | None:
+    """95% bootstrap interval of a metric, when it was computed."""
+    if f"{name}_low" not in metrics:
+        return None
+    return (f"95% CI {metrics[f'{name}_low']:.3f}–"
+            f"{metrics[f'{name}_high']:.3f}")
+
 
 col1, col2 = st.columns([1, 3])
 with col1:
     st.subheader(":material/key: Key Metrics")
     colA, colB = st.columns(2)
     with colA:
-        st.markdown("**Baseline Model**")
-        st.metric(label="MAE", value=f"{baseline_mae:.2f}")
-        st.metric(label="RMSE", value=f"{baseline_rmse:.2f}")
-        st.metric(label="R2", value=f"{baseline_r2:.4f}")
+        st.markdown("**Baseline Model**" if aligned
+                    else "**Baseline Model** (notebook 09)")
+        st.metric(label="MAE", value=f"{baseline['MAE']:.2f}",
+                  help=interval(baseline, "MAE"))
+        st.metric(label="RMSE", value=f"{baseline['RMSE']:.2f}",
+                  help=interval(baseline, "RMSE"))
+        st.metric(label="R2", value=f"{baseline['R2']:.4f}",
+                  help=interval(baseline, "R2"))
+        if not aligned:
+            st.caption("As reported by notebook 09 on its own test rows, "
+                       "without intervals. The stored baseline predictions "
+                       "are not aligned with the lag model's test rows, so "
+                       "they are left out of the comparisons until notebook "
+                       "09 is re-run.")
     with colB:
         st.markdown("**Lag-Based Model**")
-        st.metric(label="MAE", value=f"{lag_mae:.2f}")
-        st.metric(label="RMSE", value=f"{lag_rmse:.2f}")
-        st.metric(label="R2", value=f"{lag_r2:.4f}")
+        st.metric(label="MAE", value=f"{lag['MAE']:.2f}",
+                  help=interval(lag, "MAE"))
+        st.metric(label="RMSE", value=f"{lag['RMSE']:.2f}",
+                  help=interval(lag, "RMSE"))
+        st.metric(label="R2", value=f"{lag['R2']:.4f}",
+                  help=interval(lag, "R2"))
 
     st.success("✔ **Conclusion:** H5 is supported —  \
                     lag features significantly improve forecasting accuracy.")
 with col2:
-    tab1, tab2, tab3 = st.tabs([":material/trending_up:\
+    tab1, tab2, tab3, tab4 = st.tabs([":material/trending_up:\
                                  Actual vs Lag-Based Predictions",
-                                ":material/bar_chart:\
+                                      ":material/bar_chart:\
                                  Model Performance Comparison",
-                                ":material/insights:\
-                                 Feature Importance Analysis"])
+                                      ":material/insights:\
+                                 Feature Importance Analysis",
+                                      ":material/filter_alt:\
+                                 Metrics by Slice"])
     with tab1:
         graph, info = st.columns([3, 2])
         with graph:
             st.subheader(":material/trending_up:\
                           Actual vs Lag-Based Model Predictions")
-            st.plotly_chart(plot_actual_vs_pred(y_true,
-                                                baseline_pred,
-                                                lag_pred),
-                            use_container_width=True)
+            plotly_chart(plot_actual_vs_pred(y_true,
+                                             baseline_pred,
+                                             lag_pred),
+                         use_container_width=True)
         with info:
             st.markdown("""
             **What this shows:**
@@ -93,13 +130,18 @@ with col2:
         graph, info = st.columns([3, 2])
         with graph:
             st.subheader(":material/bar_chart: Model Performance Comparison")
-            st.plotly_chart(befere_vs_after(baseline_mae,
-                                            baseline_rmse,
-                                            baseline_r2,
-                                            lag_mae,
-                                            lag_rmse,
-                                            lag_r2),
-                            use_container_width=True)
+            if aligned:
+                plotly_chart(befere_vs_after(baseline["MAE"],
+                                             baseline["RMSE"],
+                                             baseline["R2"],
+                                             lag["MAE"],
+                                             lag["RMSE"],
+                                             lag["R2"]),
+                             use_container_width=True)
+            else:
+                st.info("The baseline's stored predictions are not aligned "
+                        "with the lag model's test rows. Re-run notebook 09 "
+                        "to compare both models on the same rows.")
         with info:
             st.markdown("""
             **What this shows:**
@@ -122,8 +164,8 @@ with col2:
         with graph:
             st.subheader(":material/insights:\
                           Lag-Based Model Feature Importance")
-            st.plotly_chart(plot_lag_feature_importances(feature_importance),
-                            use_container_width=True)
+            plotly_chart(plot_lag_feature_importances(feature_importance),
+                         use_container_width=True)
         with info:
             st.markdown("""
             **What this shows:**
@@ -140,3 +182,33 @@ with col2:
             Lag features dominate the model’s decision-making process,
             demonstrating that short-term pollutant persistence is the
             key driver of PM2.5 forecasting accuracy.""")
+    with tab4:
+        graph, info = st.columns([3, 2])
+        with graph:
+            st.subheader(":material/filter_alt: Metrics by Slice")
+            by = st.selectbox("Slice the test set by",
+                              available_slices(predictions),
+                              format_func=str.title, key="h5_slice")
+            models = {"Lag-Based": "l_pred"}
+            if aligned:
+                models = {"Baseline": "baseline_pred", **models}
+            for label, prediction in models.items():
+                st.markdown(f"**{label} Model**")
+                st.dataframe(format_metrics(load_slice_metrics(
+                    "h5", prediction, by)), use_container_width=True)
+        with info:
+            st.markdown("""
+            **What this shows:**
+            MAE, RMSE, R² and bias (mean of predicted minus actual) for each
+            slice of the test set, with 95% bootstrap intervals in brackets.
+            PM2.5 bands follow China's air quality index.
+
+            **Why it matters:**
+            A single test-set score can hide where a model struggles. Slices
+            show whether the lag-based model holds up during heavy pollution
+            episodes, when accurate forecasts matter most.
+
+            **Key takeaway:**
+            Errors grow with the PM2.5 level and the model under-predicts
+            the most polluted hours, so forecasts of severe episodes should
+            be read as lower bounds.""")
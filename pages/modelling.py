@@ -1,9 +1,15 @@
 import pandas as pd
 import streamlit as st
+from utils.figure_payload import plotly_chart
 from utils.model_loader import load_best_model, load_metadata
 from utils.data_loader import (load_feature_importance,
                                load_hyperparameter_results,
-                               load_model_predictions)
+                               load_model_predictions,
+                               load_residual_bins,
+                               load_residual_histogram,
+                               load_slice_metrics)
+from utils.model_evaluation import (available_slices, format_metrics,
+                                    slice_codes)
 from utils.modelling_charts import (bar_chart,
                                     prediction_vs_actual_chart,
                                     residuals_distribution_chart,
@@ -17,9 +23,25 @@ feature_imp = load_feature_importance("regression")
 grid_results = load_hyperparameter_results()
 predictions = load_model_predictions("regression")
 
-best_preds = predictions["normal_preds"]
-y_true = predictions["y_true"]
-residuals = y_true - best_preds
+
+def slice_filter(key: str) -> tuple:
+    """
+    Slice and slice label pickers for the residual charts.
+
+    Args:
+        key (str): Widget key prefix.
+    Returns:
+        tuple: (slice, label), label None for the whole test set.
+    """
+    by, pick = st.columns(2)
+    by = by.selectbox("Slice the test set by",
+                      available_slices(predictions),
+                      format_func=str.title, key=f"{key}_by")
+    if by == "all":
+        return by, None
+    return by, pick.selectbox("Show", slice_codes(predictions, by)[1],
+                              key=f"{key}_label")
+
 
 st.title(":material/psychology: Regression Modelling & Hyperparameter Search")
 
@@ -63,13 +85,14 @@ with col2:
                     ":material/insights: Residuals",
                     ":material/insights: Residuals vs Predicted",
                     ":material/bar_chart: Feature Importance",
-                    ":material/insights: Hyperparameter Search Results"])
+                    ":material/insights: Hyperparameter Search Results",
+                    ":material/filter_alt: Metrics by Slice"])
     with tabs[0]:
         st.subheader(":material/bar_chart: RMSE Ranking")
         grid, info = st.columns([3, 2])
         with grid:
-            st.plotly_chart(bar_chart(grid_results.sort_values("RMSE"),
-                                      "RMSE"), use_container_width=True)
+            plotly_chart(bar_chart(grid_results.sort_values("RMSE"),
+                                   "RMSE"), use_container_width=True)
         with info:
             st.markdown("""
             **What this shows:**
@@ -91,8 +114,8 @@ with col2:
         st.subheader(":material/bar_chart: MAE Ranking")
         graph, info = st.columns([3, 2])
         with graph:
-            st.plotly_chart(bar_chart(grid_results.sort_values("MAE"),
-                                      "MAE"), use_container_width=True)
+            plotly_chart(bar_chart(grid_results.sort_values("MAE"),
+                                   "MAE"), use_container_width=True)
         with info:
             st.markdown("""
             **What this shows:**
@@ -113,7 +136,7 @@ with col2:
         st.subheader(":material/bar_chart: R² Ranking")
         graph, info = st.columns([3, 2])
         with graph:
-            st.plotly_chart(bar_chart(
+            plotly_chart(bar_chart(
                 grid_results.sort_values("R2", ascending=False), "R2"),
                 use_container_width=True)
         with info:
@@ -135,30 +158,36 @@ with col2:
         st.subheader(":material/scatter_plot: Prediction vs Actual Values")
         graph, info = st.columns([3, 2])
         with graph:
-            st.plotly_chart(prediction_vs_actual_chart(y_true, best_preds),
-                            use_container_width=True)
+            by, label = slice_filter("pred_actual")
+            plotly_chart(prediction_vs_actual_chart(load_residual_bins(
+                "regression", "normal_preds", "prediction", by, label)),
+                use_container_width=True)
         with info:
             st.markdown("""
             **What this shows:**
-            This scatter plot compares the model's predicted PM2.5 values
-            against the actual observed values.
+            This density heatmap compares the model's predicted PM2.5 values
+            against the actual observed values for every row of the test set,
+            coloured by the number of rows in each cell.
 
             **Why it matters:**
             - Visualises how closely predictions align with reality.
-            - The trendline indicates overall prediction accuracy.
+            - The red line (mean prediction per actual value) indicates
+              overall prediction accuracy.
             - Helps identify systematic biases in predictions.
 
             **How to interpret:**
-            - Points close to the diagonal line indicate accurate predictions.
+            - Cells close to the dashed diagonal indicate accurate predictions.
             - Deviations from the line highlight prediction errors.
-            - The slope of the trendline reflects prediction bias.
+            - The slope of the red line reflects prediction bias.
+            - Values beyond the axes are counted in the edge cells.
             """)
     with tabs[4]:
         st.subheader(":material/insights: Residuals Distribution")
         graph, info = st.columns([3, 2])
         with graph:
-            st.plotly_chart(residuals_distribution_chart(residuals),
-                            use_container_width=True)
+            plotly_chart(residuals_distribution_chart(
+                load_residual_histogram("regression", "normal_preds")),
+                use_container_width=True)
         with info:
             st.markdown("""
             **What this shows:**
@@ -179,14 +208,15 @@ with col2:
         st.subheader(":material/insights: Residuals vs Predicted Values")
         graph, info = st.columns([3, 2])
         with graph:
-            st.plotly_chart(
-                residuals_vs_predicted_chart(residuals, best_preds),
+            by, label = slice_filter("resid_pred")
+            plotly_chart(residuals_vs_predicted_chart(load_residual_bins(
+                "regression", "normal_preds", "residual", by, label)),
                 use_container_width=True)
         with info:
             st.markdown("""
             **What this shows:**
-            This scatter plot visualises the relationship between residuals
-            and predicted PM2.5 values.
+            This density heatmap visualises the relationship between residuals
+            and predicted PM2.5 values for every row of the test set.
 
             **Why it matters:**
             - Helps identify patterns or biases in prediction errors.
@@ -194,7 +224,8 @@ with col2:
             - Useful for assessing model assumptions.
 
             **How to interpret:**
-            - A random scatter around zero indicates good model fit.
+            - A band centred on the zero line, with the red mean line flat,
+              indicates good model fit.
             - Patterns or funnels suggest systematic errors or
                         heteroscedasticity.
             - Large residuals at certain predicted values highlight weaknesses
@@ -204,8 +235,8 @@ with col2:
         st.subheader(":material/bar_chart: Feature Importance")
         graph, info = st.columns([3, 2])
         with graph:
-            st.plotly_chart(feature_importance_chart(feature_imp),
-                            use_container_width=True)
+            plotly_chart(feature_importance_chart(feature_imp),
+                         use_container_width=True)
         with info:
             st.markdown("""
             **What this shows:**
@@ -241,3 +272,32 @@ with col2:
             - Aids in understanding the sensitivity of models to hyperparameter
               changes.
             """)
+    with tabs[8]:
+        st.subheader(":material/filter_alt: Best Model Metrics by Slice")
+        graph, info = st.columns([3, 2])
+        with graph:
+            by = st.selectbox("Slice the test set by",
+                              available_slices(predictions),
+                              format_func=str.title, key="model_slice")
+            st.dataframe(format_metrics(load_slice_metrics(
+                "regression", "normal_preds", by)),
+                use_container_width=True)
+        with info:
+            st.markdown("""
+            **What this shows:**
+            MAE, RMSE, R² and bias (mean of predicted minus actual) of the
+            best model for each slice of the test set, with 95% bootstrap
+            intervals in brackets.
+
+            **Why it matters:**
+            - Shows where the model is reliable and where it struggles.
+            - PM2.5 bands follow China's air quality index, so errors can be
+              read against the levels that trigger health advice.
+
+            **How to interpret:**
+            - Overlapping intervals mean two slices are not clearly
+              different.
+            - A positive bias means the model over-predicts in that slice.
+            - R² within a narrow band is low by construction, as the band
+              removes most of the variance; compare MAE and RMSE instead.
+            """)
@@ -2,17 +2,36 @@
 
 import streamlit as st
 import pandas as pd
-from utils.data_loader import load_engineered, load_station_meta
-from utils.charts import seasonal_boxplot, monthly_trend, spatial_boxplot
+from utils.figure_payload import plotly_chart
+from utils.data_loader import (load_engineered_stats,
+                               load_station_meta,
+                               load_pyramid_level,
+                               load_star)
+from utils.charts import (seasonal_boxplot,
+                          monthly_trend,
+                          spatial_boxplot,
+                          pyramid_trend)
+from utils.time_pyramid import select_level, query
+from utils.profiling import span
 import plotly.express as px
 
 # ------------------------- Page Header -------------------------
 st.title(":material/home: Overview")
 
 # ------------------------- Load Data -------------------------
-df = load_engineered()
+# Charts read only their columns, joined from the shared star schema
+star = load_star()
+df = star.join(["station", "season", "year", "month", "pm25"])
 meta = load_station_meta()
 
+# Headline numbers come from the column statistics written with the data
+stats = load_engineered_stats()
+columns = stats["columns"]
+station_means = pd.Series({
+    station: summary["mean"]
+    for station, summary in stats["groups"]["station"]["pm25"].items()},
+    name="pm25")
+
 
 col1, col2 = st.columns([1, 2])
 with col1:
@@ -28,15 +47,16 @@ with col1:
         k3, k4 = st.columns(2)  # second row
 
         # metrics showing no records, unique stations, year range, no features
-        k1.metric("Rows", f"{len(df):,}")
-        k2.metric("Stations", df["station"].nunique())
-        k3.metric("Years Covered", f"{df['year'].min()}-{df['year'].max()}")
-        k4.metric("Features", df.shape[1])
+        k1.metric("Rows", f"{stats['rows']:,}")
+        k2.metric("Stations", columns["station"]["distinct"])
+        k3.metric("Years Covered",
+                  f"{columns['year']['min']}-{columns['year']['max']}")
+        k4.metric("Features", len(stats["column_names"]))
     with tab[1]:
         # ------------------------- Time Coverage -------------------------
         st.subheader(":material/access_time: Time Coverage")
-        first_date = df['datetime'].min().date()
-        last_date = df['datetime'].max().date()
+        first_date = pd.Timestamp(columns["datetime"]["min"]).date()
+        last_date = pd.Timestamp(columns["datetime"]["max"]).date()
         date_range = last_date - first_date
         st.metric("First Date", str(first_date))
         st.metric("Last Date", str(last_date))
@@ -46,11 +66,9 @@ with col1:
         st.subheader(":material/air: PM2.5 Summary")
 
         # compute statistics
-        mean_pm25 = df["pm25"].mean()
-        max_pm25 = df["pm25"].max()
-        min_pm25 = df["pm25"].min()
+        mean_pm25 = columns["pm25"]["mean"]
+        max_pm25 = columns["pm25"]["max"]
 
-        station_means = df.groupby("station")["pm25"].mean()
         worst_station = station_means.idxmax()
         best_station = station_means.idxmin()
 
@@ -63,8 +81,8 @@ with col1:
         pm4.metric("Best Station", f"{best_station}")
 
         who_limit = 25
-        exceed_hours = (df["pm25"] > who_limit).sum()
-        pct_exceed = exceed_hours / len(df) * 100
+        exceed_hours = stats["above"][f"pm25>{who_limit}"]
+        pct_exceed = exceed_hours / stats["rows"] * 100
 
         pm5, pm6 = st.columns(2)
         pm5.metric("Hours Above WHO Guideline", f"{exceed_hours:,}")
@@ -75,6 +93,7 @@ with col2:
     tab = st.tabs([
         ":material/partly_cloudy_day: Seasonal Trends",
         ":material/calendar_month: Monthly Trends",
+        ":material/show_chart: Trend Explorer",
         ":material/location_on: Spatial Variation",
         ":material/map: Station Map",
         ":material/assessment: Hypothesis Results"
@@ -82,18 +101,51 @@ with col2:
 
     with tab[0]:
         st.subheader(":material/partly_cloudy_day: Seasonal & Monthly Trends")
-        st.plotly_chart(seasonal_boxplot(df), use_container_width=True)
+        plotly_chart(seasonal_boxplot(df), use_container_width=True)
     with tab[1]:
         st.subheader(":material/calendar_month: Monthly PM2.5 Trends")
-        st.plotly_chart(monthly_trend(df), use_container_width=True)
+        plotly_chart(monthly_trend(df), use_container_width=True)
     with tab[2]:
+        st.subheader(":material/show_chart: PM2.5 Trend Explorer")
+
+        # The monthly level is tiny and gives the full range and stations
+        monthly = load_pyramid_level("monthly")
+        first = monthly["datetime"].min().to_pydatetime()
+        last = star.calendar["datetime"].max().to_pydatetime()
+
+        station_options = sorted(monthly["station"].astype(str).unique())
+        stations = st.multiselect(
+            "Stations",
+            options=station_options,
+            default=station_options[:1],
+            key="trend_stations"
+        )
+        start, end = st.slider(
+            "Visible range",
+            min_value=first,
+            max_value=last,
+            value=(first, last),
+            format="YYYY-MM-DD",
+            key="trend_range"
+        )
+
+        # Zooming in selects a finer level, loaded only on demand
+        level = select_level(start, end)
+        with span("trend_explorer.query") as record:
+            level_df = query(load_pyramid_level(level), start, end, stations)
+            record["rows"] = len(level_df)
+        st.caption(f"Showing {level} aggregates "
+                   f"({len(level_df):,} points).")
+        plotly_chart(pyramid_trend(level_df, level),
+                     use_container_width=True)
+    with tab[3]:
         st.subheader(":material/location_on:\
                      Spatial Variation Across Stations")
-        st.plotly_chart(spatial_boxplot(df), use_container_width=True)
-    with tab[3]:
+        plotly_chart(spatial_boxplot(df), use_container_width=True)
+    with tab[4]:
         st.subheader(":material/map: Interactive Station Map")
-        station_means = df.groupby("station")["pm25"].mean().reset_index()
-        meta_map = meta.merge(station_means, on="station")
+        meta_map = meta.merge(station_means.rename_axis("station")
+                              .reset_index(), on="station")
 
         # More mobile-friendly + no Mapbox token needed
         fig_map = px.scatter_mapbox(
@@ -112,8 +164,8 @@ with col2:
 
         fig_map.update_layout(margin=dict(l=0, r=0, t=40, b=0))
 
-        st.plotly_chart(fig_map, use_container_width=True)
-    with tab[4]:
+        plotly_chart(fig_map, use_container_width=True)
+    with tab[5]:
         st.subheader("📊 Hypothesis Results Summary")
 
         results = [
@@ -0,0 +1,63 @@
+"""
+Incremental appends must match cleaning the full history in one go.
+"""
+
+from pathlib import Path
+import pandas as pd
+import pytest
+from utils.cleaning import STATION_META_PATH, clean_station
+from utils.incremental import append_readings, read_engineered
+from utils.ingest import RAW_DTYPES
+
+ROOT = Path(__file__).parent.parent
+RAW = ROOT / "data" / "raw" / "dongsi.csv"
+SPLIT = pd.Timestamp("2016-03-07 11:00")  # Inside a PM2.5 gap
+CHECKED = ["datetime", "pm25", "temperature", "pressure", "dew_point",
+           "rain", "wind_speed"]
+
+
+@pytest.fixture(scope="module")
+def raw() -> pd.DataFrame:
+    """Raw readings of one station."""
+    if not RAW.exists():
+        pytest.skip(f"{RAW} not available")
+    return pd.read_csv(RAW, dtype=RAW_DTYPES)
+
+
+def _append(raw: pd.DataFrame, parts: list, tmp_path: Path,
+            until: str = None) -> pd.DataFrame:
+    """Append raw readings in parts and read the engineered dataset."""
+    paths = {"dataset": tmp_path / "engineered",
+             "combined": tmp_path / "combined",
+             "watermark_path": tmp_path / "_watermarks.json",
+             "pyramid": tmp_path / "pyramid",
+             "pending": tmp_path / "_pending"}
+    times = pd.to_datetime(raw[["year", "month", "day", "hour"]])
+    for start, end in parts:
+        rows = raw[(times > start) if start else times.notna()]
+        if end is not None:
+            rows = rows[times[rows.index] <= end]
+        append_readings(rows, until=until, **paths)
+    return read_engineered(paths["dataset"], paths["watermark_path"])
+
+
+def test_split_inside_gap_matches_full_history(raw, tmp_path):
+    times = pd.to_datetime(raw[["year", "month", "day", "hour"]])
+    assert raw.loc[times == SPLIT, "PM2.5"].isna().all()
+
+    appended = _append(raw, [(None, SPLIT), (SPLIT, None)], tmp_path)
+    full = clean_station(raw, "dongsi", pd.read_csv(STATION_META_PATH))
+    pd.testing.assert_frame_equal(appended[CHECKED], full[CHECKED],
+                                  check_dtype=False)
+    assert not (tmp_path / "_pending" / "dongsi.parquet").exists()
+
+
+def test_cut_off_matches_published_rows(raw, tmp_path):
+    until = "2017-01-01"
+    appended = _append(raw, [(None, SPLIT), (SPLIT, None)], tmp_path,
+                       until)
+    full = clean_station(raw, "dongsi", pd.read_csv(STATION_META_PATH))
+    full = full[full["datetime"] < pd.Timestamp(until)]
+    pd.testing.assert_frame_equal(appended[CHECKED],
+                                  full[CHECKED].reset_index(drop=True),
+                                  check_dtype=False)
@@ -5,47 +5,189 @@ import plotly.express as px
 import plotly.graph_objects as go
 import plotly.figure_factory as ff
 import numpy as np
+from utils.downsample import downsample, DEFAULT_POINTS
+from utils.figure_cache import cached_figure
+from utils.star_schema import MONTH_NAMES, month_names
 
 MARGINS = {"r": 0,
            "t": 30,
            "l": 0,
            "b": 0}  # Common margin settings for all charts
+VIOLIN_POINTS = 5000  # Points per group behind a violin's density
+
+
+# Overview Charts #
+@cached_figure
+def pyramid_trend(level_df: pd.DataFrame, level: str,
+                  max_points: int = DEFAULT_POINTS) -> go.Figure:
+    """
+    Create a line plot of PM2.5 per station from one time-pyramid level.
+    A single station also gets its min/max range as a shaded band.
+    Parameters:
+        level_df (pd.DataFrame): Pyramid level with 'station', 'datetime',
+                                 'mean', 'min' and 'max' columns
+        level (str): Name of the pyramid level being shown
+        max_points (int): Maximum number of points drawn per station
+    Returns:
+        go.Figure: Plotly line plot figure
+    """
+
+    fig = go.Figure()
+    stations = level_df["station"].astype(str).unique()
+
+    for station in stations:
+        d = level_df[level_df["station"].astype(str) == station]
+        x, y = downsample(d["datetime"].values, d["mean"].values, max_points)
+
+        # Shade the min/max envelope when only one station is shown
+        if len(stations) == 1:
+            fig.add_trace(go.Scattergl(
+                x=np.concatenate([d["datetime"].values,
+                                  d["datetime"].values[::-1]]),
+                y=np.concatenate([d["max"].values, d["min"].values[::-1]]),
+                fill="toself",
+                line=dict(width=0),
+                opacity=0.3,
+                name="Min / Max",
+                hoverinfo="skip"
+            ))
+
+        fig.add_trace(go.Scattergl(x=x, y=y, mode="lines", name=station,
+                                   line=dict(width=1)))
+
+    # Update layout
+    fig.update_layout(
+        title=f"PM2.5 Trend ({level.capitalize()} Resolution)",
+        xaxis_title="Date",
+        yaxis_title="PM2.5 Levels (µg/m³)",
+        legend_title_text="Station",
+        height=400,
+        margin=MARGINS
+    )
+
+    return fig
 
 
 # Hypothesis 1 Charts #
-def seasonal_boxplot(df: pd.DataFrame) -> px.box:
+def _month_name(df: pd.DataFrame) -> pd.Categorical:
+    """
+    Month names of the rows: the calendar's 'month_name' column when the
+    frame was joined from the star schema, else a lookup of the month
+    number (no per-row date formatting).
+    Parameters:
+        df (pd.DataFrame): DataFrame containing a 'month' column
+    Returns:
+        pd.Categorical: Month name per row
+    """
+    if "month_name" in df.columns:
+        return df["month_name"]
+    return month_names(df["month"])
+
+
+def box_stats(df: pd.DataFrame, by: str,
+              value: str = "pm25") -> pd.DataFrame:
+    """
+    Box plot statistics per group, as Plotly computes them from the
+    points: linear quartiles and whiskers at the furthest values within
+    1.5 IQR of the box. Groups keep their order of appearance.
+    Parameters:
+        df (pd.DataFrame): DataFrame containing the group and value columns
+        by (str): Group column
+        value (str): Value column
+    Returns:
+        pd.DataFrame: 'q1', 'median', 'q3', 'lowerfence', 'upperfence'
+                      and 'mean' per group
+    """
+    rows = {}
+    for key, values in df.groupby(by, observed=True, sort=False)[value]:
+        v = values.dropna().to_numpy(dtype="float64")
+        if not len(v):
+            continue
+        q1, median, q3 = np.quantile(v, [0.25, 0.5, 0.75])
+        reach = 1.5 * (q3 - q1)
+        inside = v[(v >= q1 - reach) & (v <= q3 + reach)]
+        rows[str(key)] = {"q1": q1, "median": median, "q3": q3,
+                          "lowerfence": inside.min(),
+                          "upperfence": inside.max(), "mean": v.mean()}
+    return pd.DataFrame.from_dict(rows, orient="index")
+
+
+def group_sample(df: pd.DataFrame, by: str,
+                 n: int = VIOLIN_POINTS) -> pd.DataFrame:
+    """
+    Random rows of each group, at most n per group (fixed seed, so the
+    same data gives the same figure).
+    Parameters:
+        df (pd.DataFrame): DataFrame containing the group column
+        by (str): Group column
+        n (int): Maximum rows per group
+    Returns:
+        pd.DataFrame: Sampled rows in their original order
+    """
+    keys = pd.Series(np.random.default_rng(0).random(len(df)),
+                     index=df.index)
+    rank = keys.groupby(df[by], observed=True).rank(method="first")
+    return df[rank <= n]
+
+
+def _box_trace(stats: pd.DataFrame, **kwargs) -> go.Box:
+    """
+    Box trace drawn from precomputed statistics: the browser receives a
+    handful of numbers per box instead of every point (outliers are not
+    drawn).
+    Parameters:
+        stats (pd.DataFrame): Rows of box_stats
+        **kwargs: Other go.Box attributes
+    Returns:
+        go.Box: Plotly box trace
+    """
+    return go.Box(x=list(stats.index),
+                  **{col: stats[col].tolist() for col in stats.columns},
+                  **kwargs)
+
+
+@cached_figure
+def seasonal_boxplot(df: pd.DataFrame) -> go.Figure:
     """
     Create a box plot of PM2.5 levels by season.
     Parameters:
         df (pd.DataFrame): DataFrame containing 'season' and 'pm25' columns
     Returns:
-        px.box: Plotly box plot figure
+        go.Figure: Plotly box plot figure
     """
 
-    # Create box plot
-    fig = px.box(
-        df, x="season", y="pm25", color="season",
-        labels={"season": "Season", "pm25": "PM2.5 Levels (µg/m³)"},
-        title="PM2.5 Distribution by Season"
-    )
+    # One coloured box per season, from precomputed statistics
+    stats = box_stats(df, "season")
+    colors = px.colors.qualitative.Plotly
+    fig = go.Figure([
+        _box_trace(stats.loc[[season]], name=season,
+                   marker_color=colors[i % len(colors)])
+        for i, season in enumerate(stats.index)])
 
     # Update layout
-    fig.update_layout(showlegend=False,
+    fig.update_layout(title="PM2.5 Distribution by Season",
+                      xaxis_title="Season",
+                      yaxis_title="PM2.5 Levels (µg/m³)",
+                      showlegend=False,
                       margin=MARGINS)
     return fig
 
 
+@cached_figure
 def monthly_violin(df: pd.DataFrame) -> px.violin:
     """
     Create a violin plot of PM2.5 levels by month.
     Parameters:
-        df (pd.DataFrame): DataFrame containing 'month' and 'pm25' columns
+        df (pd.DataFrame): DataFrame containing 'month' and 'pm25' columns,
+                           and 'month_name' when joined from the calendar
     Returns:
         px.violin: Plotly violin plot figure
     """
 
-    # Convert month number to name
-    df["month_name"] = df["datetime"].dt.strftime("%B")
+    # A sample per month carries the same density; month names from the
+    # calendar, or looked up from the month number
+    df = group_sample(df, "month")
+    df = df.assign(month_name=_month_name(df))
 
     # Create violin plot
     fig = px.violin(
@@ -61,21 +203,21 @@ def monthly_violin(df: pd.DataFrame) -> px.violin:
     return fig
 
 
+@cached_figure
 def monthly_trend(df: pd.DataFrame) -> px.line:
     """
     Create a line plot showing the monthly trend of PM2.5 levels.
     Parameters:
-        df (pd.DataFrame): DataFrame containing 'month' and 'pm25' columns
+        df (pd.DataFrame): DataFrame containing 'year', 'month' and 'pm25'
+                           columns
     Returns:
         px.line: Plotly line plot figure
     """
 
-    # Convert month number to name
-    df["month_name"] = df["datetime"].dt.strftime("%B")
-
-    # Create monthly trend line plot
-    monthly_trend = df.groupby(["year", "month", "month_name"],
+    # Aggregate on the month number, then name the 12 months once
+    monthly_trend = df.groupby(["year", "month"],
                                as_index=False)["pm25"].mean()
+    monthly_trend["month_name"] = month_names(monthly_trend["month"])
 
     # Create line plot
     fig = px.line(monthly_trend,
@@ -89,13 +231,7 @@ def monthly_trend(df: pd.DataFrame) -> px.line:
                       "pm25": "PM2.5 Levels (µg/m³)",
                       "year": "Year"
                       },
-                  category_orders={
-                      "month_name": [
-                          "January", "February", "March",
-                          "April", "May", "June",
-                          "July", "August", "September",
-                          "October", "November", "December"
-                          ]})
+                  category_orders={"month_name": MONTH_NAMES})
 
     # Update layout
     fig.update_layout(
@@ -108,6 +244,7 @@ def monthly_trend(df: pd.DataFrame) -> px.line:
     return fig
 
 
+@cached_figure
 def yearly_trend(df: pd.DataFrame) -> px.line:
     """
     Create a line plot showing the yearly trend of PM2.5 levels.
@@ -145,26 +282,30 @@ def yearly_trend(df: pd.DataFrame) -> px.line:
 
 
 # Hypothesis 2 Charts #
-def spatial_boxplot(df: pd.DataFrame) -> px.box:
+@cached_figure
+def spatial_boxplot(df: pd.DataFrame) -> go.Figure:
     """
     Create a box plot of PM2.5 levels across different stations.
     Parameters:
         df (pd.DataFrame): DataFrame containing 'station' and 'pm25' columns
     Returns:
-        px.box: Plotly box plot figure
+        go.Figure: Plotly box plot figure
     """
 
-    # Create box plot
-    fig = px.box(df, x="station", y="pm25",
-                 title="PM2.5 Variation Across Stations")
+    # One box per station, from precomputed statistics
+    fig = go.Figure(_box_trace(box_stats(df, "station")))
 
     # Update layout
-    fig.update_layout(showlegend=False,
+    fig.update_layout(title="PM2.5 Variation Across Stations",
+                      xaxis_title="station",
+                      yaxis_title="pm25",
+                      showlegend=False,
                       margin=MARGINS)
 
     return fig
 
 
+@cached_figure
 def violin_by_station(df: pd.DataFrame) -> px.violin:
     """
     Create a violin plot of PM2.5 levels across different stations.
@@ -174,9 +315,10 @@ def violin_by_station(df: pd.DataFrame) -> px.violin:
         px.violin: Plotly violin plot figure
     """
 
-    # Create violin plot
+    # Create violin plot; the density of a sample per station looks the
+    # same and keeps the payload small
     fig = px.violin(
-        df, x="station", y="pm25", color="station",
+        group_sample(df, "station"), x="station", y="pm25", color="station",
         labels={"station": "Station", "pm25": "PM2.5 Levels (µg/m³)"},
         title="PM2.5 Distribution by Station"
     )
@@ -188,6 +330,7 @@ def violin_by_station(df: pd.DataFrame) -> px.violin:
     return fig
 
 
+@cached_figure
 def map_pm25_by_station(df: pd.DataFrame,
                         meta: pd.DataFrame) -> px.scatter_mapbox:
     """
@@ -226,28 +369,29 @@ def map_pm25_by_station(df: pd.DataFrame,
     return fig
 
 
-def area_boxplot(df: pd.DataFrame) -> px.box:
+@cached_figure
+def area_boxplot(df: pd.DataFrame) -> go.Figure:
     """
     Create a box plot of PM2.5 levels across different area types.
     Parameters:
         df (pd.DataFrame): DataFrame containing 'area_type' and 'pm25' columns
     Returns:
-        px.box: Plotly box plot figure
+        go.Figure: Plotly box plot figure
     """
 
-    # Create box plot
-    fig = px.box(
-        df, x="area_type", y="pm25",
-        labels={"area_type": "Area Type", "pm25": "PM2.5 Levels (µg/m³)"},
-        title="PM2.5 Variation Across Area Types"
-    )
+    # One box per area type, from precomputed statistics
+    fig = go.Figure(_box_trace(box_stats(df, "area_type")))
 
     # Update layout
-    fig.update_layout(showlegend=False,
+    fig.update_layout(title="PM2.5 Variation Across Area Types",
+                      xaxis_title="Area Type",
+                      yaxis_title="PM2.5 Levels (µg/m³)",
+                      showlegend=False,
                       margin=MARGINS)
     return fig
 
 
+@cached_figure
 def violin_by_area_type(df: pd.DataFrame) -> px.violin:
     """
     Create a violin plot of PM2.5 levels across different area types.
@@ -257,9 +401,10 @@ def violin_by_area_type(df: pd.DataFrame) -> px.violin:
         px.violin: Plotly violin plot figure
     """
 
-    # Create violin plot
+    # Create violin plot from a sample per area type
     fig = px.violin(
-        df, x="area_type", y="pm25", color="area_type",
+        group_sample(df, "area_type"), x="area_type", y="pm25",
+        color="area_type",
         labels={"area_type": "Area Type", "pm25": "PM2.5 Levels (µg/m³)"},
         title="PM2.5 Distribution by Area Type"
     )
@@ -270,7 +415,55 @@ def violin_by_area_type(df: pd.DataFrame) -> px.violin:
     return fig
 
 
+@cached_figure
+def rolling_top_stations(df: pd.DataFrame,
+                         top_n: int = 4,
+                         window: str = "7D",
+                         max_points: int = DEFAULT_POINTS) -> go.Figure:
+    """
+    Create a line plot of rolling mean PM2.5 for the most polluted stations.
+    Each station's series is downsampled with LTTB before plotting.
+    Parameters:
+        df (pd.DataFrame): DataFrame containing 'station', 'datetime' and
+                           'pm25' columns
+        top_n (int): Number of stations with the highest mean PM2.5 to show
+        window (str): Rolling window as a pandas offset string
+        max_points (int): Maximum number of points drawn per station
+    Returns:
+        go.Figure: Plotly line plot figure
+    """
+
+    # Pick the stations with the highest average PM2.5
+    top = (df.groupby("station", observed=True)["pm25"].mean()
+             .nlargest(top_n).index)
+
+    fig = go.Figure()
+    for station in top:
+        series = (df.loc[df["station"] == station, ["datetime", "pm25"]]
+                    .set_index("datetime")["pm25"]
+                    .sort_index()
+                    .rolling(window).mean())
+        x, y = downsample(series.index.values, series.values, max_points)
+
+        # Add one line per station
+        fig.add_trace(go.Scattergl(x=x, y=y, mode="lines",
+                                   name=str(station), line=dict(width=1)))
+
+    # Update layout
+    fig.update_layout(
+        title=f"{window} Rolling Mean PM2.5 — Top {top_n} Stations",
+        xaxis_title="Date",
+        yaxis_title="PM2.5 Levels (µg/m³)",
+        legend_title_text="Station",
+        height=400,
+        margin=MARGINS
+    )
+
+    return fig
+
+
 # Hypothesis 3 Charts #
+@cached_figure
 def weather_distribution(df: pd.DataFrame,
                          weather_var: str) -> px.histogram:
     """
@@ -312,6 +505,7 @@ def weather_distribution(df: pd.DataFrame,
     return fig
 
 
+@cached_figure
 def weather_boxplot(df: pd.DataFrame, weather_var: str) -> px.box:
     """
     Create a single boxplot showing the distribution of one weather variable.
@@ -347,6 +541,7 @@ def weather_boxplot(df: pd.DataFrame, weather_var: str) -> px.box:
     return fig
 
 
+@cached_figure
 def corr_heatmap(df: pd.DataFrame) -> go.Figure:
     """
     Create a heatmap of the correlation matrix for the DataFrame.
@@ -386,6 +581,7 @@ def corr_heatmap(df: pd.DataFrame) -> go.Figure:
 # Hypothesis 4 Charts #
 
 
+@cached_figure
 def temperal_variation(df: pd.DataFrame, value: str) -> px.line:
     """
     Create a line plot showing the hourly trend of PM2.5 levels.
@@ -423,46 +619,50 @@ def temperal_variation(df: pd.DataFrame, value: str) -> px.line:
 
 
 # Hypothesis 5 Charts #
+@cached_figure
 def plot_actual_vs_pred(y_true: list,
-                        baseline_pred: list,
-                        lag_pred: list, n=300) -> go.Figure:
+                        baseline_pred: list | None,
+                        lag_pred: list, n: int = None,
+                        max_points: int = DEFAULT_POINTS) -> go.Figure:
     """Reproduce the Matplotlib actual vs predicted plot using Plotly.
+    Each series is downsampled with LTTB so the full test set can be shown
+    without losing pollution spikes.
      Parameters:
         y_true (array-like): Actual PM2.5 values
-        baseline_pred (array-like): Baseline model predictions
+        baseline_pred (array-like): Baseline model predictions, None to
+            leave them out (e.g. when they are not aligned with y_true)
         lag_pred (array-like): Lag-based model predictions
-        n (int): Number of samples to plot
+        n (int): Number of samples to plot (default: all aligned samples)
+        max_points (int): Maximum number of points drawn per series
     Returns:
         go.Figure: Plotly figure object
     """
 
-    fig = go.Figure()
+    series = [
+        (y_true, "Actual", dict(color="green", width=2), 1.0),
+        (baseline_pred, "Baseline Prediction",
+         dict(color="blue", width=2), 0.8),
+        (lag_pred, "Lag Model Prediction",
+         dict(color="orange", width=2), 0.8),
+    ]  # (values, name, line style, opacity)
+    series = [s for s in series if s[0] is not None]
 
-    # Actual
-    fig.add_trace(go.Scatter(
-        y=y_true[:n],
-        mode="lines",
-        name="Actual",
-        line=dict(color="green", width=2)
-    ))
+    # Only plot the samples shared by every series
+    n = min(*(len(values) for values, *_ in series), n or np.inf)
+    index = np.arange(n)
 
-    # Baseline prediction
-    fig.add_trace(go.Scatter(
-        y=baseline_pred[:n],
-        mode="lines",
-        name="Baseline Prediction",
-        line=dict(color="blue", width=2),
-        opacity=0.8
-    ))
+    fig = go.Figure()
 
-    # Lag-based prediction
-    fig.add_trace(go.Scatter(
-        y=lag_pred[:n],
-        mode="lines",
-        name="Lag Model Prediction",
-        line=dict(color="orange", width=2),
-        opacity=0.8
-    ))
+    for values, name, line, opacity in series:
+        x, y = downsample(index, np.asarray(values)[:n], max_points)
+        fig.add_trace(go.Scattergl(
+            x=x,
+            y=y,
+            mode="lines",
+            name=name,
+            line=line,
+            opacity=opacity
+        ))
 
     # Update layout
     fig.update_layout(
@@ -478,6 +678,7 @@ def plot_actual_vs_pred(y_true: list,
     return fig
 
 
+@cached_figure
 def befere_vs_after(baseline_mae: float,
                     baseline_rmse: float,
                     baseline_r2: float,
@@ -528,6 +729,7 @@ def befere_vs_after(baseline_mae: float,
     return fig
 
 
+@cached_figure
 def plot_lag_feature_importances(fi: pd.DataFrame) -> px.bar:
     """
     Create a horizontal bar chart of lag feature importances.
@@ -0,0 +1,412 @@
+"""
+Per-station cleaning of raw readings, following notebook 02.
+Cleaning one station at a time keeps interpolation inside that station's
+own time series (notebook 02 interpolated the concatenated frame, filling
+gaps across the end of one station and the start of the next). An
+already-cleaned context (the tail of previously cleaned rows) can be
+prepended so new rows are interpolated across the boundary without
+re-cleaning the history, which lets stations be streamed in chunks and
+cleaned in parallel.
+
+Usage:
+    python -m utils.cleaning
+    python -m utils.cleaning --source data/combined/beijing_combined
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import argparse
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+from utils.column_stats import DatasetStats
+from utils.metadata_builder import MetadataBuilder, stage_is_current
+
+ROOT = Path(__file__).parent.parent
+RAW_PATH = ROOT / "data" / "raw"
+CLEANED_PATH = ROOT / "data" / "cleaned" / "beijing_cleaned.csv"
+STATION_META_PATH = ROOT / "data" / "metadata" / "station_metadata.csv"
+
+CLEANED_UNTIL = "2017-01-01"  # The published dataset drops 2017
+CHUNK_ROWS = 8760  # Rows streamed per chunk (a year of hourly readings)
+CONTEXT_ROWS = 24  # Cleaned rows carried into the next chunk
+MAX_PENDING_CHUNKS = 4  # Held-back rows beyond this are cleaned anyway
+
+# Raw column -> cleaned column (after lower-casing)
+RENAME_MAP = {
+    "pm2.5": "pm25",
+    "temp": "temperature",
+    "pres": "pressure",
+    "dewp": "dew_point",
+    "wd": "wind_direction",
+    "wspm": "wind_speed",
+}
+
+WEATHER_COLS = ["temperature", "pressure", "dew_point", "wind_speed"]
+FILL_COLS = WEATHER_COLS + ["pm25"]  # Interpolated in time
+DROP_COLS = ["no", "pm10", "so2", "no2", "co", "o3"]
+
+SEASONS = {12: "winter", 1: "winter", 2: "winter",
+           3: "spring", 4: "spring", 5: "spring",
+           6: "summer", 7: "summer", 8: "summer",
+           9: "autumn", 10: "autumn", 11: "autumn"}
+
+# Column order of data/cleaned/beijing_cleaned.csv
+CLEANED_COLUMNS = ["datetime", "year", "month", "day", "hour", "pm25",
+                   "temperature", "pressure", "dew_point", "rain",
+                   "wind_direction", "wind_speed", "station", "latitude",
+                   "longitude", "area_type", "season", "day_of_week"]
+
+# Cleaned columns before station metadata and calendar columns are added
+READING_COLUMNS = CLEANED_COLUMNS[:13]
+
+
+def standardise_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Lower-case and rename raw columns, drop unused pollutants and add the
+    datetime column.
+
+    Args:
+        df (pd.DataFrame): Raw readings.
+    Returns:
+        pd.DataFrame: Readings with cleaned column names.
+    """
+    df = df.rename(columns=lambda c: c.strip().lower())
+    df = df.rename(columns=RENAME_MAP)
+    df = df.drop(columns=[c for c in DROP_COLS if c in df.columns])
+    df["datetime"] = pd.to_datetime(df[["year", "month", "day", "hour"]],
+                                    errors="coerce")
+    return df
+
+
+def clean_station(raw: pd.DataFrame,
+                  station: str,
+                  station_meta: pd.DataFrame = None,
+                  context: pd.DataFrame = None) -> pd.DataFrame:
+    """
+    Clean the raw readings of one station.
+    Weather and PM2.5 gaps are interpolated in time, rain gaps set to 0
+    and wind direction forward filled; repeated timestamps keep the last
+    reading. The notebook's cut-off of 2017 readings is a choice for the
+    published dataset and is left to the caller.
+
+    Args:
+        raw (pd.DataFrame): Raw readings of the station (data/raw schema).
+        station (str): Station name, as in station_metadata.csv.
+        station_meta (pd.DataFrame): Station metadata to merge
+            (latitude, longitude, area_type).
+        context (pd.DataFrame): Cleaned rows preceding raw, used only to
+            fill gaps at the start of raw; not returned.
+    Returns:
+        pd.DataFrame: Cleaned rows in the CLEANED_COLUMNS layout.
+    """
+    df = standardise_columns(raw)
+    df["station"] = station
+    df = df[READING_COLUMNS]
+
+    if context is not None and len(context):
+        df = pd.concat([context[READING_COLUMNS], df], ignore_index=True)
+
+    # Interpolate within this station only
+    df = (df.dropna(subset=["datetime"])
+            .drop_duplicates(subset="datetime", keep="last")
+            .sort_values("datetime")
+            .set_index("datetime"))
+    df[FILL_COLS] = df[FILL_COLS].interpolate(method="time")
+    df["rain"] = df["rain"].fillna(0)
+    df["wind_direction"] = df["wind_direction"].ffill()
+    df = df.reset_index()
+
+    if context is not None and len(context):
+        df = df[df["datetime"] > context["datetime"].max()]
+
+    if station_meta is not None:
+        df = df.merge(station_meta, on="station", how="left")
+    else:
+        df = df.assign(latitude=float("nan"), longitude=float("nan"),
+                       area_type=None)
+
+    df["season"] = df["month"].map(SEASONS)
+    df["day_of_week"] = df["datetime"].dt.dayofweek
+
+    for col in ("wind_direction", "station", "area_type", "season"):
+        df[col] = df[col].astype("category")
+    return df[CLEANED_COLUMNS].reset_index(drop=True)
+
+
+def _station_batches(source: Path, chunk_rows: int):
+    """
+    Read a station's raw readings in chunks.
+
+    Args:
+        source (Path): A raw station CSV or a station partition directory
+            of the combined parquet dataset.
+        chunk_rows (int): Rows per chunk.
+    Yields:
+        pd.DataFrame: Consecutive chunks of raw readings.
+    """
+    source = Path(source)
+    if source.suffix == ".csv":
+        yield from pd.read_csv(source, chunksize=chunk_rows)
+        return
+    for part in sorted(source.glob("*.parquet")):
+        for batch in pq.ParquetFile(part).iter_batches(chunk_rows):
+            yield batch.to_pandas()
+
+
+def complete_rows(raw: pd.DataFrame) -> int:
+    """
+    Number of leading rows whose gaps can be interpolated from raw alone:
+    everything up to the last row where every interpolated column has a
+    reading.
+
+    Args:
+        raw (pd.DataFrame): Raw readings.
+    Returns:
+        int: Row count.
+    """
+    cols = [c for c in raw.columns
+            if RENAME_MAP.get(c.strip().lower()) in FILL_COLS]
+    valid = raw[cols].notna().all(axis=1).to_numpy()
+    return int(np.flatnonzero(valid)[-1]) + 1 if valid.any() else 0
+
+
+def clean_station_stream(source: Path,
+                         station: str,
+                         station_meta: pd.DataFrame = None,
+                         chunk_rows: int = CHUNK_ROWS):
+    """
+    Clean one station chunk by chunk in bounded memory.
+    Rows after a chunk's last complete reading are carried into the next
+    chunk, so every gap is interpolated from its true neighbours, and the
+    tail of the cleaned output is the context of the next chunk. The
+    result equals clean_station on the whole station.
+
+    Args:
+        source (Path): Raw station CSV or combined dataset partition.
+        station (str): Station name.
+        station_meta (pd.DataFrame): Station metadata to merge.
+        chunk_rows (int): Rows read per chunk.
+    Yields:
+        pd.DataFrame: Cleaned chunks in time order.
+    """
+    context, pending = None, None
+    for batch in _station_batches(source, chunk_rows):
+        raw = batch if pending is None else pd.concat([pending, batch],
+                                                      ignore_index=True)
+
+        # Hold back rows still waiting for a later reading, unless the
+        # backlog outgrows the memory bound
+        ready = complete_rows(raw)
+        if len(raw) - ready > MAX_PENDING_CHUNKS * chunk_rows:
+            ready = len(raw)
+        if ready == 0:
+            pending = raw
+            continue
+
+        last = raw.iloc[ready - 1]
+        last = pd.Timestamp(year=int(last["year"]), month=int(last["month"]),
+                            day=int(last["day"]), hour=int(last["hour"]))
+        cleaned = clean_station(raw, station, station_meta, context)
+        cleaned = cleaned[cleaned["datetime"] <= last]
+        yield cleaned
+        context = cleaned.tail(CONTEXT_ROWS)
+        pending = raw.iloc[ready:]
+
+    if pending is not None and len(pending):
+        yield clean_station(pending, station, station_meta, context)
+
+
+def _clean_station_file(source: Path, station: str, part: Path,
+                        until: str, chunk_rows: int,
+                        station_meta: Path = STATION_META_PATH) -> dict:
+    """
+    Stream one station into a headerless CSV part.
+
+    Args:
+        source (Path): Raw station CSV or combined dataset partition.
+        station (str): Station name.
+        part (Path): Output part.
+        until (str): Keep readings before this timestamp (None for all).
+        chunk_rows (int): Rows read per chunk.
+        station_meta (Path): Station metadata CSV.
+    Returns:
+        dict: 'station' and 'records' written, and the column 'stats'
+        accumulated from the written chunks.
+    """
+    station_meta = pd.read_csv(station_meta)
+    records, stats = 0, DatasetStats(partition_by="station")
+    with open(part, "w", encoding="utf-8", newline="") as f:
+        for chunk in clean_station_stream(source, station, station_meta,
+                                          chunk_rows):
+            if until is not None:
+                chunk = chunk[chunk["datetime"] < pd.Timestamp(until)]
+            chunk.to_csv(f, header=False, index=False)
+            stats.update(chunk)
+            records += len(chunk)
+    return {"station": station, "records": records, "stats": stats}
+
+
+def station_sources(source: Path) -> dict:
+    """
+    Find the station inputs of a raw folder or combined dataset.
+
+    Args:
+        source (Path): Folder of raw station CSVs, or the combined parquet
+            dataset written by utils.ingest.
+    Returns:
+        dict: Station -> raw CSV or partition directory.
+    """
+    source = Path(source)
+    partitions = sorted(source.glob("station=*"))
+    if partitions:
+        return {p.name.split("=", 1)[1]: p for p in partitions}
+    return {p.stem: p for p in sorted(source.glob("*.csv"))}
+
+
+def clean_dataset(source: Path = RAW_PATH,
+                  output: Path = CLEANED_PATH,
+                  until: str = CLEANED_UNTIL,
+                  workers: int = None,
+                  chunk_rows: int = CHUNK_ROWS,
+                  station_meta: Path = STATION_META_PATH) -> list[dict]:
+    """
+    Clean every station in parallel, each streamed in bounded memory, and
+    write the cleaned dataset in the layout of notebook 02, grouped by
+    station, with its column statistics and per-station zone maps.
+
+    Args:
+        source (Path): Raw station folder or combined parquet dataset.
+        output (Path): Cleaned CSV to write.
+        until (str): Keep readings before this timestamp (None for all).
+        workers (int): Worker processes, defaults to the CPU count.
+        chunk_rows (int): Rows read per chunk.
+        station_meta (Path): Station metadata CSV.
+    Returns:
+        list[dict]: Records written per station.
+    """
+    sources = station_sources(source)
+    if not sources:
+        raise FileNotFoundError(f"No station data in {source}")
+
+    output = Path(output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=output.parent) as tmp:
+        parts = [Path(tmp) / f"{station}.csv" for station in sources]
+        with ProcessPoolExecutor(max_workers=workers
+                                 or os.cpu_count()) as pool:
+            stats = list(pool.map(_clean_station_file, sources.values(),
+                                  sources.keys(), parts,
+                                  [until] * len(parts),
+                                  [chunk_rows] * len(parts),
+                                  [station_meta] * len(parts)))
+
+        # Concatenate the parts without loading them
+        with open(output, "w", encoding="utf-8", newline="") as out:
+            out.write(",".join(CLEANED_COLUMNS) + "\n")
+            for part in parts:
+                with open(part, encoding="utf-8") as f:
+                    shutil.copyfileobj(f, out)
+
+    column_stats = DatasetStats(partition_by="station")
+    for station_stats in stats:
+        column_stats.merge(station_stats.pop("stats"))
+    column_stats.write(output)
+    return stats
+
+
+def stage_inputs(source: Path) -> list[Path]:
+    """
+    Files the cleaned dataset depends on.
+
+    Args:
+        source (Path): Raw station folder or combined dataset.
+    Returns:
+        list[Path]: Source and station metadata.
+    """
+    return [Path(source), STATION_META_PATH]
+
+
+def write_metadata(stats: list[dict], output: Path, until: str,
+                   source: Path = RAW_PATH, seconds: float = None) -> None:
+    """
+    Document the cleaned dataset with MetadataBuilder, as notebook 02.
+
+    Args:
+        stats (list[dict]): Output of clean_dataset.
+        output (Path): Cleaned CSV.
+        until (str): Cut-off applied.
+        source (Path): Raw station folder or combined dataset read.
+        seconds (float): Cleaning time.
+    """
+    builder = MetadataBuilder(
+        "data/cleaned/beijing_cleaned.csv",
+        "Beijing Air Quality – Cleaned Dataset",
+        "Cleaned dataset including timestamp repair, type correction, "
+        "missing value handling, and column reduction.")
+    builder.add_licence()
+    builder.add_creation_script("utils/cleaning.py")
+    builder.add_step("Standardised and renamed columns")
+    builder.add_step("Created datetime column from year/month/day/hour")
+    builder.add_step("Interpolated weather and PM2.5 gaps in time within "
+                     "each station, streamed in chunks")
+    builder.add_step("Handled missing values in rain and wd columns")
+    builder.add_step("Dropped unused pollutant columns and index column")
+    if until is not None:
+        builder.add_step(f"Filtered out data from {until} onwards")
+    builder.add_step("Removed duplicate timestamps per station")
+    builder.add_step("Merged spatial metadata and added season and "
+                     "day_of_week")
+    builder.add_columns(CLEANED_COLUMNS)
+    builder.metadata["record_count"] = sum(s["records"] for s in stats)
+    builder.add_record_stats(output)
+    builder.add_lineage(stage_inputs(source), [output], [__file__],
+                        {"until": until}, seconds)
+    builder.write(Path(output).parent / "_metadata.yml")
+
+
+def parse_args(argv: list = None) -> argparse.Namespace:
+    """
+    Parse command line arguments.
+
+    Args:
+        argv (list): Arguments, defaults to sys.argv.
+    Returns:
+        argparse.Namespace: Parsed arguments.
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m utils.cleaning",
+        description="Clean raw station data per station in parallel.")
+    parser.add_argument("--source", type=Path, default=RAW_PATH,
+                        help="raw station folder or combined dataset")
+    parser.add_argument("--output", type=Path, default=CLEANED_PATH)
+    parser.add_argument("--until", default=CLEANED_UNTIL,
+                        help="drop readings from this timestamp on")
+    parser.add_argument("--all", action="store_true",
+                        help="keep every reading (no --until cut-off)")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--force", action="store_true",
+                        help="rebuild even if the inputs are unchanged")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    until = None if args.all else args.until
+    if not args.force and stage_is_current(
+            args.output.parent / "_metadata.yml", stage_inputs(args.source),
+            [args.output], [__file__], {"until": until}):
+        print("Inputs and code unchanged, skipping:", args.output)
+        raise SystemExit(0)
+    start = time.perf_counter()
+    stats = clean_dataset(args.source, args.output, until, args.workers,
+                          args.chunk_rows)
+    write_metadata(stats, args.output, until, args.source,
+                   time.perf_counter() - start)
+    print(f"Saved {sum(s['records'] for s in stats):,} cleaned rows to:",
+          args.output)
@@ -2,6 +2,7 @@ import plotly.express as px
 import plotly.graph_objects as go
 import pandas as pd
 from utils.charts import MARGINS
+from utils.figure_cache import cached_figure
 
 CLUSTER_COLORS_INT = {
     0: "#1f77b4",
@@ -18,6 +19,7 @@ CLUSTER_COLORS_INT = {
 CLUSTER_COLORS_STR = {str(k): v for k, v in CLUSTER_COLORS_INT.items()}
 
 
+@cached_figure
 def make_cluster_radar(df: pd.DataFrame, cluster_id: int,
                        features: list[str]) -> go.Figure:
     """
@@ -84,6 +86,7 @@ def make_cluster_radar(df: pd.DataFrame, cluster_id: int,
     return fig
 
 
+@cached_figure
 def pca_cluster_scatter(df: pd.DataFrame) -> go.Figure:
     """
     Creates a PCA scatter plot colored by cluster.
@@ -118,6 +121,7 @@ def pca_cluster_scatter(df: pd.DataFrame) -> go.Figure:
     return fig
 
 
+@cached_figure
 def plot_cluster_size(df: pd.DataFrame) -> go.Figure:
     """
     Plots the size of each cluster as a bar chart.
@@ -148,6 +152,7 @@ def plot_cluster_size(df: pd.DataFrame) -> go.Figure:
     return fig
 
 
+@cached_figure
 def silhouette_values_per_cluster(df: pd.DataFrame) -> go.Figure:
     """
     Creates a silhouette plot highlighting the selected cluster.
@@ -176,6 +181,7 @@ def silhouette_values_per_cluster(df: pd.DataFrame) -> go.Figure:
     return fig
 
 
+@cached_figure
 def silhouette_plot(df_sil: pd.DataFrame,
                     selected_cluster: int) -> go.Figure:
     """
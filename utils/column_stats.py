@@ -0,0 +1,613 @@
+"""
+One-pass column statistics and zone maps of written datasets.
+Statistics are accumulated chunk by chunk while a dataset is written, so
+no extra scan is needed: null counts, min/max, mean/variance (merged with
+Chan's parallel formula), approximate quantiles from a bottom-k row
+sample and approximate distinct counts from a k-minimum-values sketch of
+value hashes. The PM2.5 measure also gets per-group summaries (station,
+season, area type) and counts above thresholds, which give the dashboard
+its headline numbers without scanning the data.
+Per-partition min/max zone maps let readers skip partitions (parquet
+files or stations) that cannot match a time range or threshold.
+They are stored in _<dataset>_stats.yml next to the dataset; datasets
+that grow by appended parts also keep the mergeable accumulator state in
+_<dataset>_stats.pkl, so new parts are merged without rescanning.
+
+Usage:
+    python -m utils.column_stats data/engineered/beijing_engineered.csv
+"""
+
+from pathlib import Path
+import argparse
+import datetime
+import pickle
+import numpy as np
+import pandas as pd
+import yaml
+from utils.metadata_builder import file_stat
+
+SKETCH_SIZE = 2048  # Rows sampled for quantiles and hashes kept for KMV
+QUANTILES = [0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99]
+GROUP_BY = ["station", "season", "area_type"]
+MEASURES = ["pm25"]
+THRESHOLDS = {"pm25": [25]}  # WHO guideline used by the overview page
+
+
+def _plain(value):
+    """
+    Convert a numpy scalar or timestamp to a YAML-safe value.
+
+    Args:
+        value: Value to convert.
+    Returns:
+        int | float | str | None: Plain value.
+    """
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return None
+    if isinstance(value, (np.integer, np.bool_)):
+        return int(value)
+    if isinstance(value, np.floating):
+        return float(value)
+    if isinstance(value, (pd.Timestamp, np.datetime64)):
+        return str(pd.Timestamp(value))
+    return value
+
+
+def _smallest(keys: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices of the k smallest keys.
+
+    Args:
+        keys (np.ndarray): Keys.
+        k (int): Number to keep.
+    Returns:
+        np.ndarray: Indices, all of them when there are at most k keys.
+    """
+    if len(keys) <= k:
+        return np.arange(len(keys))
+    return np.argpartition(keys, k - 1)[:k]
+
+
+def _mix(bits: np.ndarray) -> np.ndarray:
+    """
+    Hash 64-bit values with the splitmix64 finaliser, so the k smallest
+    hashes are a uniform sample of the distinct values.
+
+    Args:
+        bits (np.ndarray): uint64 bit patterns of the values.
+    Returns:
+        np.ndarray: uint64 hashes.
+    """
+    with np.errstate(over="ignore"):
+        z = bits + np.uint64(0x9E3779B97F4A7C15)
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return z ^ (z >> np.uint64(31))
+
+
+class ColumnSummary:
+    """
+    Mergeable one-pass summary of one column.
+    """
+
+    def __init__(self, k: int = SKETCH_SIZE, seed: int = 0):
+        """
+        Args:
+            k (int): Sample and distinct sketch size.
+            seed (int): Seed of the row sample priorities.
+        """
+        self.k = k
+        self.rng = np.random.default_rng(seed)
+        self.kind = None
+        self.count = 0
+        self.nulls = 0
+        self.min = None
+        self.max = None
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.sample_keys = np.empty(0)
+        self.sample = np.empty(0)
+        self.hashes = np.empty(0, dtype="uint64")
+
+    def update(self, values: pd.Series) -> "ColumnSummary":
+        """
+        Add a chunk of values.
+
+        Args:
+            values (pd.Series): Values of the column.
+        Returns:
+            ColumnSummary: self.
+        """
+        missing = values.isna().to_numpy()
+        self.nulls += int(missing.sum())
+        if self.kind is None:
+            self.kind = ("datetime" if values.dtype.kind == "M" else
+                         "numeric" if values.dtype.kind in "biuf" else
+                         "other")
+        if missing.all():
+            return self
+
+        if self.kind == "other":
+            present = values[~missing]
+            self._add_hashes(pd.util.hash_pandas_object(
+                present, index=False).to_numpy())
+            self.count += len(present)
+            return self
+
+        native = values.to_numpy()[~missing]
+        if self.kind == "datetime":
+            native = native.astype("datetime64[ns]")
+            bits = native.view("int64").view("uint64")
+        else:
+            x = native.astype("float64")
+            bits = x.view("uint64")  # ints and floats hash alike
+        self._add_hashes(_mix(bits))
+
+        # Bounds in the column's own dtype, so integers stay integers
+        low, high = native.min(), native.max()
+        self.min = low if self.min is None else min(self.min, low)
+        self.max = high if self.max is None else max(self.max, high)
+        if self.kind == "numeric":
+            chunk_mean = x.mean()
+            self._combine(len(x), chunk_mean,
+                          ((x - chunk_mean) ** 2).sum())
+            self._add_sample(self.rng.random(len(x)), x)
+        else:
+            self.count += len(native)
+        return self
+
+    def _combine(self, n: int, mean: float, m2: float) -> None:
+        """
+        Merge count, mean and sum of squared deviations (Chan et al.).
+
+        Args:
+            n (int): Count of the other part.
+            mean (float): Mean of the other part.
+            m2 (float): Sum of squared deviations of the other part.
+        """
+        total = self.count + n
+        delta = mean - self.mean
+        self.m2 += m2 + delta ** 2 * self.count * n / total
+        self.mean += delta * n / total
+        self.count = total
+
+    def _add_sample(self, keys: np.ndarray, values: np.ndarray) -> None:
+        """
+        Keep the rows with the k smallest random priorities.
+
+        Args:
+            keys (np.ndarray): Priorities of the new rows.
+            values (np.ndarray): Values of the new rows.
+        """
+        keys = np.concatenate([self.sample_keys, keys])
+        values = np.concatenate([self.sample, values])
+        keep = _smallest(keys, self.k)
+        self.sample_keys, self.sample = keys[keep], values[keep]
+
+    def _add_hashes(self, hashes: np.ndarray) -> None:
+        """
+        Keep the k smallest distinct value hashes.
+
+        Args:
+            hashes (np.ndarray): uint64 hashes, possibly repeated.
+        """
+        if len(self.hashes) >= self.k:
+            hashes = hashes[hashes < self.hashes[-1]]
+        if not len(hashes):
+            return
+        hashes = np.sort(np.concatenate([self.hashes, hashes]))
+        hashes = hashes[np.r_[True, hashes[1:] != hashes[:-1]]]
+        self.hashes = hashes[:self.k]
+
+    def merge(self, other: "ColumnSummary") -> "ColumnSummary":
+        """
+        Merge the summary of another chunk or partition of the column.
+
+        Args:
+            other (ColumnSummary): Summary to merge.
+        Returns:
+            ColumnSummary: self.
+        """
+        self.kind = self.kind or other.kind
+        self.nulls += other.nulls
+        self._add_hashes(other.hashes)
+        if other.min is not None:
+            self.min = (other.min if self.min is None
+                        else min(self.min, other.min))
+            self.max = (other.max if self.max is None
+                        else max(self.max, other.max))
+        if self.kind == "numeric" and other.count:
+            self._combine(other.count, other.mean, other.m2)
+            self._add_sample(other.sample_keys, other.sample)
+        else:
+            self.count += other.count
+        return self
+
+    def distinct(self) -> int:
+        """
+        Distinct count: exact below k values, else the KMV estimate.
+
+        Returns:
+            int: Number of distinct non-null values.
+        """
+        if len(self.hashes) < self.k:
+            return len(self.hashes)
+        return int((self.k - 1) / (float(self.hashes[-1]) / 2.0 ** 64))
+
+    def result(self) -> dict:
+        """
+        Summary as plain values.
+
+        Returns:
+            dict: count, nulls and distinct; min and max for numbers and
+            datetimes; mean, std and quantiles for numbers.
+        """
+        out = {"count": self.count, "nulls": self.nulls,
+               "distinct": self.distinct()}
+        if self.kind == "datetime" and self.min is not None:
+            out["min"] = str(pd.Timestamp(self.min))
+            out["max"] = str(pd.Timestamp(self.max))
+        elif self.kind == "numeric" and self.count:
+            out["min"] = _plain(self.min)
+            out["max"] = _plain(self.max)
+            out["mean"] = float(self.mean)
+            out["std"] = (float(np.sqrt(self.m2 / (self.count - 1)))
+                          if self.count > 1 else None)
+            out["quantiles"] = {
+                f"p{round(q * 100)}": float(v) for q, v in zip(
+                    QUANTILES, np.quantile(self.sample, QUANTILES))}
+        return out
+
+
+class DatasetStats:
+    """
+    Column summaries, zone maps, group summaries and threshold counts of
+    a dataset, accumulated chunk by chunk.
+    """
+
+    def __init__(self, partition_by: str = None,
+                 group_by: list = GROUP_BY, measures: list = MEASURES,
+                 thresholds: dict = THRESHOLDS):
+        """
+        Args:
+            partition_by (str): Column naming the zone map partition of
+                each row, for datasets not written as separate files.
+            group_by (list): Columns to summarise the measures by.
+            measures (list): Columns summarised per group.
+            thresholds (dict): Column -> values to count rows above.
+        """
+        self.partition_by = partition_by
+        self.group_by = group_by
+        self.measures = measures
+        self.thresholds = thresholds
+        self.rows = 0
+        self.columns = {}
+        self.groups = {}
+        self.above = {}
+        self.zones = {}
+
+    def update(self, chunk: pd.DataFrame,
+               partition: str = None) -> "DatasetStats":
+        """
+        Add a chunk of rows.
+
+        Args:
+            chunk (pd.DataFrame): Rows of the dataset.
+            partition (str): Partition the rows were written to (e.g. a
+                parquet file); defaults to the partition_by column.
+        Returns:
+            DatasetStats: self.
+        """
+        self.rows += len(chunk)
+        for col in chunk.columns:
+            self.columns.setdefault(col, ColumnSummary()).update(chunk[col])
+
+        for col in self.measures:
+            if col not in chunk.columns:
+                continue
+            values = chunk[col]
+            for value in self.thresholds.get(col, []):
+                key = f"{col}>{value}"
+                self.above[key] = (self.above.get(key, 0)
+                                   + int((values > value).sum()))
+            for by in self.group_by:
+                if by not in chunk.columns:
+                    continue
+                groups = self.groups.setdefault(by, {}).setdefault(col, {})
+                for key, rows in values.groupby(chunk[by].astype(str),
+                                                observed=True):
+                    groups.setdefault(key, ColumnSummary()).update(rows)
+
+        if partition is not None:
+            self._update_zone(str(partition), chunk)
+        elif self.partition_by in chunk.columns:
+            for key, rows in chunk.groupby(
+                    chunk[self.partition_by].astype(str), observed=True):
+                self._update_zone(key, rows)
+        return self
+
+    def _update_zone(self, partition: str, rows: pd.DataFrame) -> None:
+        """
+        Widen a partition's zone map with rows.
+
+        Args:
+            partition (str): Partition key.
+            rows (pd.DataFrame): Rows of the partition.
+        """
+        zone = self.zones.setdefault(partition, {"rows": 0, "columns": {}})
+        zone["rows"] += len(rows)
+        for col in rows.columns:
+            if rows[col].dtype.kind not in "biufM":
+                continue
+            values = rows[col]
+            entry = zone["columns"].setdefault(
+                col, {"min": None, "max": None, "nulls": 0})
+            entry["nulls"] += int(values.isna().sum())
+            low, high = values.min(), values.max()
+            if pd.isna(low):
+                continue
+            entry["min"] = low if entry["min"] is None else min(entry["min"],
+                                                                 low)
+            entry["max"] = (high if entry["max"] is None
+                            else max(entry["max"], high))
+
+    def merge(self, other: "DatasetStats") -> "DatasetStats":
+        """
+        Merge the statistics of another part of the dataset, e.g. one
+        computed by another worker.
+
+        Args:
+            other (DatasetStats): Statistics to merge.
+        Returns:
+            DatasetStats: self.
+        """
+        self.rows += other.rows
+        for col, summary in other.columns.items():
+            self.columns.setdefault(col, ColumnSummary()).merge(summary)
+        for by, measures in other.groups.items():
+            for col, groups in measures.items():
+                mine = self.groups.setdefault(by, {}).setdefault(col, {})
+                for key, summary in groups.items():
+                    mine.setdefault(key, ColumnSummary()).merge(summary)
+        for key, count in other.above.items():
+            self.above[key] = self.above.get(key, 0) + count
+        for partition, zone in other.zones.items():
+            if partition not in self.zones:
+                self.zones[partition] = zone
+                continue
+            mine = self.zones[partition]
+            mine["rows"] += zone["rows"]
+            for col, entry in zone["columns"].items():
+                if col not in mine["columns"]:
+                    mine["columns"][col] = entry
+                    continue
+                current = mine["columns"][col]
+                current["nulls"] += entry["nulls"]
+                for bound, pick in (("min", min), ("max", max)):
+                    values = [v for v in (current[bound], entry[bound])
+                              if v is not None]
+                    current[bound] = pick(values) if values else None
+        return self
+
+    def result(self) -> dict:
+        """
+        Statistics as plain values.
+
+        Returns:
+            dict: rows, column_names, columns, groups, above and zones.
+        """
+        return {
+            "rows": self.rows,
+            "column_names": list(self.columns),
+            "columns": {col: s.result() for col, s in self.columns.items()},
+            "groups": {by: {col: {key: s.result()
+                                  for key, s in sorted(groups.items())}
+                            for col, groups in measures.items()}
+                       for by, measures in self.groups.items()},
+            "above": dict(self.above),
+            "zones": {partition: {
+                "rows": zone["rows"],
+                "columns": {col: {k: _plain(v) for k, v in entry.items()}
+                            for col, entry in zone["columns"].items()}}
+                for partition, zone in sorted(self.zones.items())},
+        }
+
+    def write(self, dataset: Path, state: bool = False) -> Path:
+        """
+        Write the statistics next to the dataset, stamped with the
+        dataset's size and mtime so stale files are detected.
+
+        Args:
+            dataset (Path): Dataset file or directory.
+            state (bool): Also write the accumulator state, for
+                read_state when parts are appended later.
+        Returns:
+            Path: File written.
+        """
+        path = stats_path(dataset)
+        source = file_stat(dataset)
+        stats = {"dataset": Path(dataset).name, "source": source,
+                 **self.result()}
+        with open(path, "w", encoding="utf-8") as f:
+            yaml.safe_dump(stats, f, sort_keys=False, allow_unicode=True)
+        if state:
+            with open(state_path(dataset), "wb") as f:
+                pickle.dump({"source": source, "stats": self}, f)
+        return path
+
+
+def stats_path(dataset: Path) -> Path:
+    """
+    Statistics file of a dataset.
+
+    Args:
+        dataset (Path): Dataset file or directory.
+    Returns:
+        Path: _<dataset>_stats.yml next to the dataset, so a CSV and a
+        parquet dataset of the same folder keep separate files.
+    """
+    dataset = Path(dataset)
+    return dataset.parent / f"_{dataset.stem}_stats.yml"
+
+
+def state_path(dataset: Path) -> Path:
+    """
+    Accumulator state file of a dataset.
+
+    Args:
+        dataset (Path): Dataset file or directory.
+    Returns:
+        Path: _<dataset>_stats.pkl next to the dataset.
+    """
+    return stats_path(dataset).with_suffix(".pkl")
+
+
+def read_state(dataset: Path) -> DatasetStats | None:
+    """
+    Read the accumulator state of a dataset if it describes its current
+    data, to merge the statistics of new parts into.
+
+    Args:
+        dataset (Path): Dataset file or directory.
+    Returns:
+        DatasetStats | None: Statistics, None when missing or stale.
+    """
+    try:
+        with open(state_path(dataset), "rb") as f:
+            state = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    if state["source"] != file_stat(dataset):
+        return None
+    return state["stats"]
+
+
+def read_stats(dataset: Path) -> dict:
+    """
+    Read the statistics of a dataset if they describe its current data.
+
+    Args:
+        dataset (Path): Dataset file or directory.
+    Returns:
+        dict: Statistics, empty when missing or stale.
+    """
+    try:
+        with open(stats_path(dataset), "r", encoding="utf-8") as f:
+            stats = yaml.safe_load(f) or {}
+    except FileNotFoundError:
+        return {}
+    if (stats.get("dataset") != Path(dataset).name
+            or stats.get("source") != file_stat(dataset)):
+        return {}
+    return stats
+
+
+def _bound(value):
+    """
+    Zone map bound or query value in a comparable form: datetimes (stored
+    as text or parsed by YAML) become timestamps.
+
+    Args:
+        value: Bound.
+    Returns:
+        Comparable value.
+    """
+    if isinstance(value, (str, datetime.datetime, np.datetime64)):
+        return pd.Timestamp(value)
+    return value
+
+
+def matching_partitions(stats: dict, column: str, low=None,
+                        high=None) -> list[str]:
+    """
+    Partitions whose zone map overlaps a range of a column, e.g. the
+    parquet files holding a time range or stations exceeding a threshold.
+
+    Args:
+        stats (dict): Output of read_stats.
+        column (str): Column of the range.
+        low: Smallest value of interest, None for no lower bound.
+        high: Largest value of interest, None for no upper bound.
+    Returns:
+        list[str]: Partition keys that may hold matching rows.
+    """
+    keys = []
+    for partition, zone in stats.get("zones", {}).items():
+        entry = zone["columns"].get(column)
+        if entry is None or entry["min"] is None:
+            continue
+        if low is not None and _bound(entry["max"]) < _bound(low):
+            continue
+        if high is not None and _bound(entry["min"]) > _bound(high):
+            continue
+        keys.append(partition)
+    return keys
+
+
+def parts_stats(dataset: Path, parts: list) -> DatasetStats:
+    """
+    Statistics of some parquet parts of a dataset, one zone map per part,
+    with the hive partition columns (e.g. station=<name>) restored.
+
+    Args:
+        dataset (Path): Parquet dataset directory.
+        parts (list): Part files below it.
+    Returns:
+        DatasetStats: Accumulated statistics.
+    """
+    stats = DatasetStats()
+    for part in parts:
+        rows = pd.read_parquet(part)
+        for key in Path(part).relative_to(dataset).parent.parts:
+            name, _, value = key.partition("=")
+            rows[name] = value
+        stats.update(rows, Path(part).relative_to(dataset).as_posix())
+    return stats
+
+
+def dataset_stats(dataset: Path, partition_by: str = "station",
+                  chunk_rows: int = 100_000) -> DatasetStats:
+    """
+    Statistics of an existing CSV (streamed in chunks) or parquet
+    dataset (one zone map per file).
+
+    Args:
+        dataset (Path): CSV file or parquet dataset directory.
+        partition_by (str): Zone map column for CSV files.
+        chunk_rows (int): Rows per CSV chunk.
+    Returns:
+        DatasetStats: Accumulated statistics.
+    """
+    dataset = Path(dataset)
+    if dataset.is_dir():
+        return parts_stats(dataset, sorted(dataset.rglob("*.parquet")))
+
+    header = pd.read_csv(dataset, nrows=0).columns
+    dates = ["datetime"] if "datetime" in header else None
+    stats = DatasetStats(partition_by=partition_by)
+    for chunk in pd.read_csv(dataset, chunksize=chunk_rows,
+                             parse_dates=dates):
+        stats.update(chunk)
+    return stats
+
+
+def parse_args(argv: list = None) -> argparse.Namespace:
+    """
+    Parse command line arguments.
+
+    Args:
+        argv (list): Arguments, defaults to sys.argv.
+    Returns:
+        argparse.Namespace: Parsed arguments.
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m utils.column_stats",
+        description="Write column statistics and zone maps of a dataset.")
+    parser.add_argument("datasets", nargs="+", type=Path,
+                        help="CSV files or parquet dataset directories")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    for path in parse_args().datasets:
+        print("Statistics written to:", dataset_stats(path).write(path))
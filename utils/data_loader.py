@@ -3,32 +3,187 @@ Utility functions to load data for Streamlit app.
 """
 
 from pathlib import Path
+import os
 import pandas as pd
 import streamlit as st
 import yaml
 import numpy as np
-from utils.load_csv import load_csv
+from utils.column_stats import DatasetStats, read_stats
+from utils.incremental import read_engineered
+from utils.feature_registry import FEATURES
+from utils.load_csv import load_csv, load_schema, optimise_dtypes
+from utils.metadata_builder import content_hash
+from utils.model_evaluation import slice_metrics
+from utils.profiling import profiled
+from utils.pca_projection import load_pca_array, pca_frame
+from utils.prediction_store import (PredictionStore, load_predictions,
+                                    predictions_path)
+from utils.residual_diagnostics import residual_bins, residual_histogram
+from utils.star_schema import StarSchema
+from utils.station_tensor import StationTensor
+from utils.time_pyramid import build_level, read_level
 
 # Define the root data path
 ROOT = Path(__file__).parent.parent
 
-# Define the data directory
-DATA_PATH = ROOT / "data"
+# Define the data directory; DASHBOARD_DATA_ROOT points it at another tree
+# with the same layout (e.g. data/synthetic/10x), model outputs stay here
+DATA_ROOT_ENV = "DASHBOARD_DATA_ROOT"
+DATA_PATH = Path(os.environ.get(DATA_ROOT_ENV, ROOT)) / "data"
 MODEL_OUTPUT = ROOT / "model_outputs"
+ENGINEERED_DATASET = DATA_PATH / "engineered" / "beijing_engineered"
+WATERMARK_PATH = DATA_PATH / "engineered" / "_watermarks.json"
+STAR_PATH = DATA_PATH / "engineered" / "star"
+PREDICTION_VERSIONS = 4  # Memory-mapped prediction versions kept
 
-@st.cache_data
+# Cached functions derived from the engineered data, cleared after an
+# incremental append (name -> function)
+_dependents = {}
+_data_version = None
+
+
+def engineered_dependent(func):
+    """
+    Register a cached function (with .clear) whose result is derived from
+    the engineered data, so it is cleared when new readings are appended.
+
+    Args:
+        func (callable): Cached function.
+    Returns:
+        callable: The same function.
+    """
+    _dependents[f"{func.__module__}.{func.__qualname__}"] = func
+    return func
+
+
+@profiled(cache=st.cache_data)
 def load_engineered() -> pd.DataFrame:
     """
-    Load feature engineered Beijing air quality data.
+    Load feature engineered Beijing air quality data, from the
+    incrementally appended parquet dataset when it exists.
 
     Returns:
         pd.DataFrame: Feature engineered Beijing air quality data.
     """
 
-    return load_csv(DATA_PATH / "engineered" / "beijing_engineered.csv")
+    if ENGINEERED_DATASET.exists() and WATERMARK_PATH.exists():
+        return optimise_dtypes(read_engineered(ENGINEERED_DATASET,
+                                               WATERMARK_PATH),
+                               load_schema())
+    return load_csv(DATA_PATH / "engineered" / "beijing_engineered.csv",
+                    optimise=True)
+
+
+@profiled(cache=st.cache_data)
+def load_engineered_stats() -> dict:
+    """
+    Column statistics of the engineered data (utils.column_stats): the
+    file written with the dataset when it is current, otherwise computed
+    from the loaded frame.
+
+    Returns:
+        dict: rows, column summaries, per-group PM2.5 summaries and
+        threshold counts.
+    """
+
+    if ENGINEERED_DATASET.exists() and WATERMARK_PATH.exists():
+        dataset = ENGINEERED_DATASET
+    else:
+        dataset = DATA_PATH / "engineered" / "beijing_engineered.csv"
+    stats = read_stats(dataset)
+    if stats:
+        return stats
+    return DatasetStats(partition_by="station").update(
+        load_engineered()).result()
+
+
+@profiled(cache=st.cache_data)
+def load_pyramid_level(level: str) -> pd.DataFrame:
+    """
+    Load one level of the PM2.5 time pyramid, building it from the
+    engineered data if it has not been written to disk.
+
+    Args:
+        level (str): Pyramid level name (hourly, 6-hourly, daily, weekly
+            or monthly).
+    Returns:
+        pd.DataFrame: Per-station mean/min/max/count for each bucket.
+    """
+
+    path = DATA_PATH / "pyramid" / f"{level}.npz"
+    if path.exists():
+        return read_level(path)
+    return build_level(load_engineered(), level)
+
+
+@profiled(cache=st.cache_resource)
+def load_station_tensor() -> StationTensor:
+    """
+    Dense station x hour x variable view of the engineered data, built
+    once per process and shared read-only by every session.
 
+    Registered features (utils.feature_registry) are left out, as they
+    are derived from the stored variables when requested.
 
-@st.cache_data
+    Returns:
+        StationTensor: Every stored numeric variable, with area_type,
+        latitude and longitude as static attributes.
+    """
+
+    df = load_engineered()
+    static = ["area_type", "latitude", "longitude"]
+    variables = [col for col in df.columns
+                 if col not in static and col not in FEATURES
+                 and df[col].dtype.kind in "fi"]
+    return StationTensor.from_frame(df, variables, static=static)
+
+
+@profiled(cache=st.cache_resource)
+def load_star() -> StarSchema:
+    """
+    Star-schema view of the engineered data (narrow fact table with
+    station and calendar dimensions), built once per process and shared
+    read-only by every session. Written tables are used unless readings
+    have been appended since.
+
+    Returns:
+        StarSchema: Fact, station and calendar tables.
+    """
+
+    if STAR_PATH.exists() and not WATERMARK_PATH.exists():
+        return StarSchema.load(STAR_PATH)
+    return StarSchema.from_frame(load_engineered())
+
+
+def refresh_appended_data() -> bool:
+    """
+    Clear the engineered data caches once an incremental append has
+    advanced the watermarks since this process last checked. The pyramid
+    files themselves are updated by the append for affected buckets only.
+
+    Returns:
+        bool: True when caches were cleared.
+    """
+    global _data_version
+    try:
+        version = WATERMARK_PATH.stat().st_mtime_ns
+    except FileNotFoundError:
+        version = None
+
+    changed = _data_version is not None and version != _data_version
+    _data_version = version
+    if changed:
+        load_engineered.clear()
+        load_engineered_stats.clear()
+        load_station_tensor.clear()
+        load_star.clear()
+        load_pyramid_level.clear()
+        for func in _dependents.values():
+            func.clear()
+    return changed
+
+
+@profiled(cache=st.cache_data)
 def load_station_meta() -> pd.DataFrame:
     """
     Load station metadata.
@@ -37,10 +192,11 @@ def load_station_meta() -> pd.DataFrame:
         pd.DataFrame: Station metadata.
     """
 
-    return load_csv(DATA_PATH / "metadata" / "station_metadata.csv")
+    return load_csv(DATA_PATH / "metadata" / "station_metadata.csv",
+                    optimise=True)
 
 
-@st.cache_data
+@profiled(cache=st.cache_data)
 def load_clustered() -> pd.DataFrame:
     """
     Load clustered Beijing air quality data.
@@ -49,22 +205,35 @@ def load_clustered() -> pd.DataFrame:
         pd.DataFrame: Clustered Beijing air quality data.
     """
 
-    return load_csv(MODEL_OUTPUT / "clustering" / "beijing_clustered.csv")
+    return load_csv(MODEL_OUTPUT / "clustering" / "beijing_clustered.csv",
+                    optimise=True)
 
 
-@st.cache_data
+@profiled(cache=st.cache_resource)
+def load_pca_memmap() -> np.ndarray:
+    """
+    Memory map the binary PCA coordinates once per process.
+
+    Returns:
+        np.ndarray: Read-only (rows, 4) float32 array.
+    """
+
+    return load_pca_array(MODEL_OUTPUT / "clustering" / "pca_coords.npy")
+
+
+@profiled()
 def load_pca_coords() -> pd.DataFrame:
     """
-    Load PCA coordinates data.
+    Load PCA coordinates data as a DataFrame over the memory map.
 
     Returns:
         pd.DataFrame: PCA coordinates data.
     """
 
-    return load_csv(MODEL_OUTPUT / "clustering" / "pca_coords.csv")
+    return pca_frame(load_pca_memmap())
 
 
-@st.cache_data
+@profiled(cache=st.cache_data)
 def load_silhouette_values() -> pd.DataFrame:
     """
     Load silhouette values for clusters.
@@ -72,10 +241,11 @@ def load_silhouette_values() -> pd.DataFrame:
     Returns:
         pd.DataFrame: Silhouette values data.
     """
-    return load_csv(MODEL_OUTPUT / "clustering" / "silhouette_values.csv")
+    return load_csv(MODEL_OUTPUT / "clustering" / "silhouette_values.csv",
+                    optimise=True)
 
 
-@st.cache_data
+@profiled(cache=st.cache_data)
 def load_cluster_profiles() -> dict:
     """
     Load cluster profiles from a YAML file.
@@ -100,7 +270,7 @@ def load_cluster_profiles() -> dict:
     return normalised
 
 
-@st.cache_data
+@profiled(cache=st.cache_data)
 def load_feature_importance(model: str) -> pd.DataFrame:
     """
     Load feature importance data.
@@ -110,10 +280,11 @@ def load_feature_importance(model: str) -> pd.DataFrame:
         pd.DataFrame: Feature importance data.
     """
 
-    return load_csv(MODEL_OUTPUT / model / "feature_importances.csv")
+    return load_csv(MODEL_OUTPUT / model / "feature_importances.csv",
+                    optimise=True)
 
 
-@st.cache_data
+@profiled(cache=st.cache_data)
 def load_hyperparameter_results() -> pd.DataFrame:
     """
     Load hyperparameter tuning results.
@@ -122,16 +293,142 @@ def load_hyperparameter_results() -> pd.DataFrame:
         pd.DataFrame: Hyperparameter tuning results.
     """
     return load_csv(MODEL_OUTPUT / "regression" /
-                    "hyperparameter_results.csv")
+                    "hyperparameter_results.csv", optimise=True)
+
+
+@profiled(cache=st.cache_resource(max_entries=PREDICTION_VERSIONS))
+def _model_predictions(model: str, artefact: str) -> PredictionStore:
+    """
+    Memory map a version of a model's stored predictions once per
+    process.
 
+    Args:
+        model (str): Model name.
+        artefact (str): Content hash of the predictions folder, so arrays
+            rewritten by np.save are mapped again instead of served from
+            the old maps.
+    Returns:
+        PredictionStore: Stored predictions.
+    """
+    return load_predictions(predictions_path(model))
 
-@st.cache_resource
-def load_model_predictions(model: str) -> pd.DataFrame:
+
+def load_model_predictions(model: str) -> PredictionStore:
     """
-    Load model predictions data.
+    Memory map a model's stored predictions once per artefact version.
     args:
         model (str): Model name.
     Returns:
-        pd.DataFrame: Model predictions data.
+        PredictionStore: Prediction arrays by name (e.g. "y_true"),
+        sliceable and filterable by station and time when indexed.
+    """
+    return _model_predictions(model, content_hash(predictions_path(model)))
+
+
+@profiled(cache=st.cache_data)
+def _slice_metrics(model: str, prediction: str, by: str,
+                   artefact: str) -> pd.DataFrame:
+    """
+    Cached slice metrics of a prediction artefact version.
+
+    Args:
+        model (str): Model name.
+        prediction (str): Array of predicted values.
+        by (str): Slice, see utils.model_evaluation.available_slices.
+        artefact (str): Content hash of the predictions folder, so new
+            predictions are evaluated again.
+    Returns:
+        pd.DataFrame: Metrics with bootstrap intervals per slice.
+    """
+    return slice_metrics(_model_predictions(model, artefact), prediction,
+                         by)
+
+
+def load_slice_metrics(model: str, prediction: str,
+                       by: str = "all") -> pd.DataFrame:
+    """
+    MAE, RMSE, R² and bias of a model's stored predictions per slice,
+    with 95% bootstrap intervals, computed once per artefact version.
+
+    Args:
+        model (str): Model name.
+        prediction (str): Array of predicted values, e.g. "l_pred".
+        by (str): 'all', 'station', 'season', 'hour' or 'band'.
+    Returns:
+        pd.DataFrame: Metrics per slice.
+    """
+    artefact = content_hash(predictions_path(model))
+    return _slice_metrics(model, prediction, by, artefact)
+
+
+@profiled(cache=st.cache_data)
+def _residual_bins(model: str, prediction: str, kind: str, by: str,
+                   label: str, artefact: str) -> dict:
+    """
+    Cached residual histogram of a prediction artefact version.
+
+    Args:
+        model (str): Model name.
+        prediction (str): Array of predicted values.
+        kind (str): 'prediction' or 'residual'.
+        by (str): Slice, see utils.model_evaluation.available_slices.
+        label (str): Slice label, None for every row.
+        artefact (str): Content hash of the predictions folder.
+    Returns:
+        dict: See utils.residual_diagnostics.residual_bins.
+    """
+    return residual_bins(_model_predictions(model, artefact), prediction,
+                         kind, by=by, label=label)
+
+
+def load_residual_bins(model: str, prediction: str, kind: str = "residual",
+                       by: str = "all", label: str = None) -> dict:
+    """
+    Predicted-vs-actual or residual counts of a model's stored predictions
+    on a fixed grid, binned once per artefact version so the charts draw
+    every test row at a constant payload size.
+
+    Args:
+        model (str): Model name.
+        prediction (str): Array of predicted values, e.g. "normal_preds".
+        kind (str): 'prediction' for predicted vs actual, 'residual' for
+            residuals vs predicted.
+        by (str): 'all', 'station', 'season', 'hour' or 'band'.
+        label (str): Slice label to keep, None for every row.
+    Returns:
+        dict: Bin edges, counts, mean per x bin, axis labels and rows.
+    """
+    artefact = content_hash(predictions_path(model))
+    return _residual_bins(model, prediction, kind, by, label, artefact)
+
+
+@profiled(cache=st.cache_data)
+def _residual_histogram(model: str, prediction: str,
+                        artefact: str) -> dict:
+    """
+    Cached residual density histogram of a prediction artefact version.
+
+    Args:
+        model (str): Model name.
+        prediction (str): Array of predicted values.
+        artefact (str): Content hash of the predictions folder.
+    Returns:
+        dict: See utils.residual_diagnostics.residual_histogram.
+    """
+    return residual_histogram(_model_predictions(model, artefact),
+                              prediction)
+
+
+def load_residual_histogram(model: str, prediction: str) -> dict:
+    """
+    Residual distribution of a model's stored predictions, binned once
+    per artefact version.
+
+    Args:
+        model (str): Model name.
+        prediction (str): Array of predicted values, e.g. "normal_preds".
+    Returns:
+        dict: Bin centres and width, density and KDE per bin, and rows.
     """
-    return np.load(MODEL_OUTPUT / model / "predictions.npz")
+    artefact = content_hash(predictions_path(model))
+    return _residual_histogram(model, prediction, artefact)
@@ -0,0 +1,128 @@
+"""
+Utility functions for downsampling long time series before charting.
+Implements Largest-Triangle-Three-Buckets (LTTB) and a min/max envelope so
+that peaks survive the reduction to a pixel-sized point budget.
+"""
+
+import numpy as np
+
+DEFAULT_POINTS = 2000  # Roughly two points per horizontal pixel of a chart
+
+
+def _as_float(x: np.ndarray) -> np.ndarray:
+    """
+    Convert numeric or datetime values to float64 for geometry.
+
+    Args:
+        x (np.ndarray): Input values.
+    Returns:
+        np.ndarray: float64 representation of the values.
+    """
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype("datetime64[ns]").astype("int64").astype("float64")
+    return x.astype("float64")
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Select point indices with the Largest-Triangle-Three-Buckets algorithm.
+    The first and last points are always kept; each bucket in between
+    contributes the point forming the largest triangle with the previously
+    selected point and the mean of the next bucket.
+
+    Args:
+        x (np.ndarray): x values (numeric or datetime), sorted ascending.
+        y (np.ndarray): y values, NaNs are ignored.
+        n_out (int): Maximum number of points to keep.
+    Returns:
+        np.ndarray: Sorted integer indices into the original arrays.
+    """
+    x = _as_float(x)
+    y = np.asarray(y, dtype="float64")
+    valid = np.flatnonzero(~np.isnan(y))  # LTTB only works on real values
+
+    if n_out >= len(valid) or n_out < 3:
+        return valid
+
+    xv, yv = x[valid], y[valid]
+    # Bucket edges for the n_out - 2 interior buckets
+    edges = np.linspace(1, len(valid) - 1, n_out - 1).astype(int)
+
+    selected = np.empty(n_out, dtype=int)
+    selected[0], selected[-1] = 0, len(valid) - 1
+    a = 0  # Index of the previously selected point
+
+    for i in range(n_out - 2):
+        start, stop = edges[i], edges[i + 1]
+
+        # Average point of the following bucket (or the last point)
+        if i + 2 < len(edges):
+            nxt = slice(edges[i + 1], edges[i + 2])
+            avg_x, avg_y = xv[nxt].mean(), yv[nxt].mean()
+        else:
+            avg_x, avg_y = xv[-1], yv[-1]
+
+        # Twice the triangle area for every candidate in this bucket
+        area = np.abs((xv[a] - avg_x) * (yv[start:stop] - yv[a])
+                      - (xv[a] - xv[start:stop]) * (avg_y - yv[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+
+    return valid[selected]
+
+
+def minmax_indices(y: np.ndarray, n_buckets: int) -> np.ndarray:
+    """
+    Keep the minimum and maximum of each bucket (a min/max envelope).
+
+    Args:
+        y (np.ndarray): y values, NaNs are ignored.
+        n_buckets (int): Number of equal-width buckets.
+    Returns:
+        np.ndarray: Sorted integer indices into the original array.
+    """
+    y = np.asarray(y, dtype="float64")
+    n = len(y)
+
+    if n <= 2 * n_buckets:
+        return np.flatnonzero(~np.isnan(y))
+
+    # Pad to a whole number of buckets and view as (buckets, size)
+    size = int(np.ceil(n / n_buckets))
+    padded = np.full(n_buckets * size, np.nan)
+    padded[:n] = y
+    grid = padded.reshape(n_buckets, size)
+
+    filled = ~np.isnan(grid).all(axis=1)  # buckets with at least one value
+    offsets = np.arange(n_buckets) * size
+    lo = np.where(np.isnan(grid), np.inf, grid).argmin(axis=1) + offsets
+    hi = np.where(np.isnan(grid), -np.inf, grid).argmax(axis=1) + offsets
+
+    return np.unique(np.concatenate([lo[filled], hi[filled]]))
+
+
+def downsample(x: np.ndarray, y: np.ndarray,
+               n_out: int = DEFAULT_POINTS,
+               method: str = "lttb") -> tuple[np.ndarray, np.ndarray]:
+    """
+    Reduce a series to at most n_out points while preserving its shape.
+
+    Args:
+        x (np.ndarray): x values (numeric or datetime), sorted ascending.
+        y (np.ndarray): y values.
+        n_out (int): Point budget for the series.
+        method (str): "lttb" or "minmax" (envelope, two points per bucket).
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Downsampled x and y values.
+    """
+    x, y = np.asarray(x), np.asarray(y)
+
+    if method == "lttb":
+        idx = lttb_indices(x, y, n_out)
+    elif method == "minmax":
+        idx = minmax_indices(y, max(n_out // 2, 1))
+    else:
+        raise ValueError(f"Unknown downsampling method: {method}")
+
+    return x[idx], y[idx]
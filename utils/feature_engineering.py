@@ -1,10 +1,32 @@
 """
 Module for feature engineering functions.
-Includes functions to create lag and rolling features for time series
-forecasting.
+Includes the row-wise features of notebook 04 and functions to create lag
+and rolling features for time series forecasting. The definitions live in
+utils.feature_registry; these functions add fixed groups of them.
 """
 
+import numpy as np
 import pandas as pd
+# LAGS, WINDOWS and compute_relative_humidity are re-exported
+from utils.feature_registry import (  # noqa: F401
+    ENGINEERED_FEATURES, FEATURES, LAGS, LAG_FEATURES, ROLLING_FEATURES,
+    WINDOWS, add_features, compute_relative_humidity)
+
+
+def add_engineered_features(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Add the engineered dataset's features to cleaned data: cyclical hour
+    and month encodings, dew point spread, temperature-pressure
+    interaction, binary rain and relative humidity.
+    Every feature depends on its own row only, so new rows can be
+    engineered without the history.
+
+    Args:
+        df (pd.DataFrame): Cleaned data.
+    Returns:
+        pd.DataFrame: DataFrame with added features.
+    """
+    return add_features(df, ENGINEERED_FEATURES)
 
 
 def apply_forecasting_features(df: pd.DataFrame,
@@ -13,6 +35,8 @@ def apply_forecasting_features(df: pd.DataFrame,
     """
     Apply lag and rolling features safely AFTER splitting train/test.
     This prevents data leakage from future data points.
+    Lags and windows are in hours of the same station, so missing hours
+    are not skipped over and windows never cross stations.
     Args:
         df (pd.DataFrame): Input dataframe with time series data.
         add_lags (bool): Whether to add lag features.
@@ -20,26 +44,26 @@ def apply_forecasting_features(df: pd.DataFrame,
     Returns:
         pd.DataFrame: DataFrame with added features.
     """
+    names = (LAG_FEATURES if add_lags else []) + \
+        (ROLLING_FEATURES if add_rollings else [])
+    return add_features(df, names)
+
 
-    # Create a copy to avoid modifying the original dataframe
-    df = df.copy()
-
-    # Add lag features
-    if add_lags:
-        for lag in [1, 3, 6, 12, 18]:
-            df[f"pm25_lag_{lag}h"] = (
-                df.groupby("station", observed=False)["pm25"].shift(lag)
-            )
-
-    # Add rolling mean features
-    if add_rollings:
-        for w in [3, 6, 12, 18]:
-            df[f"pm25_roll_{w}h_mean"] = (
-                df.groupby("station", observed=False)["pm25"]
-                  .shift(1)
-                  .rolling(w)
-                  .mean()
-                  .reset_index(level=0, drop=True)
-            )
-
-    return df
+def dense_forecasting_features(pm25: np.ndarray,
+                               add_lags=True,
+                               add_rollings=True) -> dict:
+    """
+    Lag and rolling mean features of apply_forecasting_features on dense
+    hourly PM2.5 (see utils.station_tensor): lags are slices along the
+    time axis and windows never cross stations.
+
+    Args:
+        pm25 (np.ndarray): (stations, times) or (times,) PM2.5 values.
+        add_lags (bool): Whether to add lag features.
+        add_rollings (bool): Whether to add rolling mean features.
+    Returns:
+        dict: Feature name -> float32 array shaped like pm25.
+    """
+    names = (LAG_FEATURES if add_lags else []) + \
+        (ROLLING_FEATURES if add_rollings else [])
+    return {name: FEATURES[name].kernel(pm25) for name in names}
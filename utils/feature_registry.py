@@ -0,0 +1,290 @@
+"""
+Declarative registry of the engineered features.
+Each feature declares the columns it reads and a vectorised kernel. A
+consumer asks for feature names and a FeatureStore computes only the
+dependency subgraph the data does not already hold, caches each result
+and can persist it as .npy per data version. Row-wise kernels take whole
+columns; temporal kernels (lags, rolling means) take (stations, times)
+arrays from a StationTensor, so they never cross stations or rely on row
+order. Training, forecasting and the dashboard share these definitions.
+"""
+
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from utils.cleaning import SEASONS
+from utils.figure_cache import dataset_token
+from utils.station_tensor import StationTensor, lag, rolling_mean
+
+LAGS = [1, 3, 6, 12, 18]  # Lag features in hours
+WINDOWS = [3, 6, 12, 18]  # Rolling mean windows in hours
+
+
+class Feature:
+    """
+    A named feature: the columns it reads and the kernel computing it.
+    """
+
+    def __init__(self, name: str, inputs: tuple, kernel,
+                 temporal: bool = False):
+        """
+        Args:
+            name (str): Column name of the feature.
+            inputs (tuple): Columns or features the kernel reads, passed
+                positionally as arrays.
+            kernel (callable): Vectorised function of the inputs.
+            temporal (bool): Whether the kernel works along the time axis
+                of (stations, times) arrays.
+        """
+        self.name = name
+        self.inputs = tuple(inputs)
+        self.kernel = kernel
+        self.temporal = temporal
+
+
+FEATURES = {}
+
+
+def register(name: str, inputs: list, temporal: bool = False):
+    """
+    Decorator registering a kernel as a feature.
+
+    Args:
+        name (str): Feature name.
+        inputs (list): Input columns or features.
+        temporal (bool): Whether the kernel works along the time axis.
+    Returns:
+        callable: Decorator returning the kernel unchanged.
+    """
+    def decorator(kernel):
+        FEATURES[name] = Feature(name, inputs, kernel, temporal)
+        return kernel
+    return decorator
+
+
+def compute_relative_humidity(temp, dewp):
+    """
+    Compute relative humidity from temperature and dew point.
+
+    Args:
+        temp (array-like): Temperature in degrees Celsius.
+        dewp (array-like): Dew point in degrees Celsius.
+    Returns:
+        array-like: Relative humidity in percentage, clipped to 0-100.
+    """
+    temp = np.asarray(temp, dtype=float)
+    dewp = np.asarray(dewp, dtype=float)
+
+    a = 17.625
+    b = 243.04
+
+    alpha = (a * dewp) / (b + dewp)
+    beta = (a * temp) / (b + temp)
+
+    return np.clip(100 * np.exp(alpha - beta), 0, 100)
+
+
+# Calendar features
+register("hour_sin", ["hour"])(lambda h: np.sin(2 * np.pi * h / 24))
+register("hour_cos", ["hour"])(lambda h: np.cos(2 * np.pi * h / 24))
+register("month_sin", ["month"])(lambda m: np.sin(2 * np.pi * m / 12))
+register("month_cos", ["month"])(lambda m: np.cos(2 * np.pi * m / 12))
+register("season", ["month"])(
+    lambda m: pd.Categorical(pd.Series(m).map(SEASONS)))
+register("day_of_week", ["datetime"])(
+    lambda t: pd.DatetimeIndex(t).dayofweek.to_numpy())
+
+# Weather features
+register("dew_point_spread", ["temperature", "dew_point"])(np.subtract)
+register("temp_pres_interaction", ["temperature", "pressure"])(np.multiply)
+register("rain_binary", ["rain"])(
+    lambda r: (np.asarray(r) > 0).astype(int))
+register("relative_humidity", ["temperature", "dew_point"])(
+    compute_relative_humidity)
+
+# Temporal PM2.5 features: the previous hours of the same station
+for _hours in LAGS:
+    register(f"pm25_lag_{_hours}h", ["pm25"], temporal=True)(
+        lambda pm25, hours=_hours: lag(pm25, hours))
+for _window in WINDOWS:
+    register(f"pm25_roll_{_window}h_mean", ["pm25"], temporal=True)(
+        lambda pm25, window=_window: rolling_mean(pm25, window, shift=1))
+
+# Named groups of features
+ENGINEERED_FEATURES = ["hour_sin", "hour_cos", "month_sin", "month_cos",
+                       "dew_point_spread", "temp_pres_interaction",
+                       "rain_binary", "relative_humidity"]
+LAG_FEATURES = [f"pm25_lag_{h}h" for h in LAGS]
+ROLLING_FEATURES = [f"pm25_roll_{w}h_mean" for w in WINDOWS]
+
+
+def resolve(names: list, available: list = ()) -> list[Feature]:
+    """
+    Features to compute, in dependency order, to obtain the requested
+    names from the available columns.
+
+    Args:
+        names (list): Requested columns or features.
+        available (list): Columns already present.
+    Returns:
+        list[Feature]: Only the needed subgraph, inputs before consumers.
+    Raises:
+        KeyError: When a name is neither available nor registered.
+    """
+    available, order = set(available), []
+
+    def visit(name):
+        if name in available:
+            return
+        if name not in FEATURES:
+            raise KeyError(f"Unknown column or feature: {name}")
+        for dependency in FEATURES[name].inputs:
+            visit(dependency)
+        available.add(name)
+        order.append(FEATURES[name])
+
+    for name in names:
+        visit(name)
+    return order
+
+
+def base_inputs(names: list) -> list:
+    """
+    Stored columns the requested names ultimately read.
+
+    Args:
+        names (list): Requested columns or features.
+    Returns:
+        list: Non-registered columns in first-use order.
+    """
+    inputs = []
+
+    def visit(name):
+        if name in FEATURES:
+            for dependency in FEATURES[name].inputs:
+                visit(dependency)
+        elif name not in inputs:
+            inputs.append(name)
+
+    for name in names:
+        visit(name)
+    return inputs
+
+
+class FeatureStore:
+    """
+    Lazily computed features over one frame of hourly station data.
+    Columns the frame holds are used as they are; other requested
+    features are computed once, kept in memory and, with a persist
+    directory, stored as .npy files keyed by the data version.
+    """
+
+    def __init__(self, df: pd.DataFrame, persist_dir: Path = None):
+        """
+        Args:
+            df (pd.DataFrame): Base data with 'station' and 'datetime'.
+            persist_dir (Path): Directory to persist computed features.
+        """
+        self.df = df
+        self.persist_dir = None
+        if persist_dir is not None:
+            self.persist_dir = Path(persist_dir) / dataset_token(df)
+        self._computed = {}
+        self._tensors = {}
+
+    def get(self, name: str):
+        """
+        A column of the frame or a computed feature.
+
+        Args:
+            name (str): Column or feature name.
+        Returns:
+            np.ndarray | pd.Series | pd.Categorical: Values aligned with
+            the frame's rows.
+        """
+        if name in self.df.columns:
+            return self.df[name]
+        if name not in self._computed:
+            for feature in resolve([name], list(self.df.columns)
+                                   + list(self._computed)):
+                self._computed[feature.name] = self._load_or_compute(
+                    feature)
+        return self._computed[name]
+
+    def _load_or_compute(self, feature: Feature):
+        """
+        Read a persisted feature or run its kernel.
+
+        Args:
+            feature (Feature): Feature whose inputs are available.
+        Returns:
+            Feature values aligned with the frame's rows.
+        """
+        path = (self.persist_dir / f"{feature.name}.npy"
+                if self.persist_dir is not None else None)
+        if path is not None and path.exists():
+            return np.load(path, allow_pickle=False)
+
+        inputs = [self.get(col) for col in feature.inputs]
+        if feature.temporal:
+            values = self._temporal(feature, inputs)
+        else:
+            values = feature.kernel(*[np.asarray(v) if not isinstance(
+                v.dtype, pd.CategoricalDtype) else v for v in inputs])
+
+        if path is not None and not isinstance(values, pd.Categorical):
+            path.parent.mkdir(parents=True, exist_ok=True)
+            np.save(path, np.asarray(values))
+        return values
+
+    def _temporal(self, feature: Feature, inputs: list) -> np.ndarray:
+        """
+        Run a temporal kernel on the station x hour grid and gather the
+        result back onto the frame's rows. The grid of each set of inputs
+        is built once and shared by the features reading it.
+
+        Args:
+            feature (Feature): Temporal feature.
+            inputs (list): Input columns aligned with the frame.
+        Returns:
+            np.ndarray: float32 values aligned with the frame's rows.
+        """
+        if feature.inputs not in self._tensors:
+            grid = pd.DataFrame({"station": self.df["station"].to_numpy(),
+                                 "datetime": self.df["datetime"].to_numpy()})
+            for col, values in zip(feature.inputs, inputs):
+                grid[col] = np.asarray(values)
+            tensor = StationTensor.from_frame(grid, list(feature.inputs))
+            self._tensors[feature.inputs] = (tensor, tensor.positions(grid))
+
+        tensor, positions = self._tensors[feature.inputs]
+        arrays = [tensor.variable(col) for col in feature.inputs]
+        return feature.kernel(*arrays)[positions]
+
+    def frame(self, names: list) -> pd.DataFrame:
+        """
+        The frame with the requested features added.
+
+        Args:
+            names (list): Columns or features to include.
+        Returns:
+            pd.DataFrame: Copy of the frame plus the missing features.
+        """
+        df = self.df.copy()
+        for name in names:
+            if name not in df.columns:
+                df[name] = self.get(name)
+        return df
+
+
+def add_features(df: pd.DataFrame, names: list) -> pd.DataFrame:
+    """
+    Add registered features to a frame, computing only what is missing.
+
+    Args:
+        df (pd.DataFrame): Data with the base columns the features read.
+        names (list): Features to add.
+    Returns:
+        pd.DataFrame: Copy of df with the features.
+    """
+    return FeatureStore(df).frame(names)
@@ -0,0 +1,360 @@
+"""
+Compact serialisation of Plotly figures for the dashboard.
+Large numeric trace arrays are narrowed so Plotly encodes them as base64
+typed arrays (float32/int16 instead of float64 text), redundant per-point
+metadata is collapsed, and the payload size of every chart is recorded so
+each page can be held to a byte budget. Figures served by the figure
+cache are compacted once, before they are stored, and carry their
+serialised size, so drawing them costs neither step again. Payloads are
+recorded per scope (the page, or a fragment panel), and a fragment rerun
+replaces the payloads of its own panel, so partial reruns neither
+inflate the page weight nor escape the budget.
+"""
+
+from contextlib import contextmanager
+import base64
+import logging
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import plotly.io as pio
+import streamlit as st
+
+logger = logging.getLogger(__name__)
+
+MIN_POINTS = 500  # Arrays shorter than this are left untouched
+PAGE_BUDGET_BYTES = 2 * 1024 * 1024  # Per-page chart payload budget (2 MB)
+PAGE_SCOPE = "page"  # Scope of charts drawn outside fragment panels
+
+# Trace attributes that may hold one value per point
+ARRAY_PATHS = [
+    ("x",), ("y",), ("z",), ("lat",), ("lon",), ("r",),
+    ("customdata",), ("text",), ("hovertext",),
+    ("marker", "size"), ("marker", "color"), ("marker", "opacity"),
+]
+
+# Attributes that can collapse to a single value when constant
+COLLAPSIBLE = {("text",), ("hovertext",), ("marker", "size"),
+               ("marker", "color"), ("marker", "opacity")}
+
+
+def decode_typed_array(spec: dict) -> np.ndarray:
+    """
+    Decode a Plotly typed-array spec ({"dtype", "bdata", "shape"}).
+
+    Args:
+        spec (dict): Typed-array spec produced by Plotly.
+    Returns:
+        np.ndarray: Decoded array.
+    """
+    values = np.frombuffer(base64.b64decode(spec["bdata"]),
+                           dtype=np.dtype(spec["dtype"]))
+    shape = spec.get("shape")
+    if shape:
+        values = values.reshape([int(n) for n in str(shape).split(",")])
+    return values
+
+
+def _get(trace: dict, path: tuple) -> object:
+    """
+    Read a nested attribute from a trace dict.
+
+    Args:
+        trace (dict): Trace as a plain dict.
+        path (tuple): Attribute path, e.g. ("marker", "size").
+    Returns:
+        object: The attribute value or None.
+    """
+    for key in path:
+        if not isinstance(trace, dict) or key not in trace:
+            return None
+        trace = trace[key]
+    return trace
+
+
+def _set(trace: dict, path: tuple, value: object) -> None:
+    """
+    Write a nested attribute into a trace dict.
+
+    Args:
+        trace (dict): Trace as a plain dict.
+        path (tuple): Attribute path.
+        value (object): New value.
+    """
+    for key in path[:-1]:
+        trace = trace.setdefault(key, {})
+    trace[path[-1]] = value
+
+
+def narrow_array(values: np.ndarray) -> np.ndarray:
+    """
+    Narrow a numeric array to the smallest dtype Plotly can encode as a
+    typed array without visible loss: integers to int8/int16/int32,
+    floats to float32, datetimes to float64 epoch milliseconds.
+
+    Args:
+        values (np.ndarray): Array to narrow.
+    Returns:
+        np.ndarray: Narrowed array (or the input if not numeric).
+    """
+    values = np.asarray(values)
+
+    if np.issubdtype(values.dtype, np.datetime64):
+        # Date axes accept epoch milliseconds; float64 keeps them exact
+        return values.astype("datetime64[ms]").astype("int64")\
+            .astype("float64")
+    if np.issubdtype(values.dtype, np.integer) or values.dtype == bool:
+        lo, hi = (values.min(), values.max()) if values.size else (0, 0)
+        for dtype in ("int8", "int16", "int32"):
+            info = np.iinfo(dtype)
+            if info.min <= lo and hi <= info.max:
+                return values.astype(dtype)
+        return values.astype("float64")
+    if np.issubdtype(values.dtype, np.floating):
+        return values.astype("float32")
+    return values
+
+
+def _constant(values: np.ndarray) -> bool:
+    """
+    Check whether every element of an array is identical.
+
+    Args:
+        values (np.ndarray): Array to check.
+    Returns:
+        bool: True if all elements are equal.
+    """
+    return len(values) > 0 and bool((values == values[0]).all())
+
+
+def _inline_customdata(trace: dict) -> None:
+    """
+    Replace constant customdata columns referenced by the hovertemplate
+    with literal text, dropping customdata when nothing else needs it.
+
+    Args:
+        trace (dict): Trace as a plain dict, modified in place.
+    """
+    custom = trace.get("customdata")
+    template = trace.get("hovertemplate")
+    if custom is None or not isinstance(template, str):
+        return
+
+    custom = np.asarray(custom, dtype=object)
+    if custom.ndim != 2 or len(custom) == 0:
+        return
+    if not all(_constant(custom[:, i]) for i in range(custom.shape[1])):
+        return
+
+    for i in range(custom.shape[1]):
+        template = template.replace(f"%{{customdata[{i}]}}",
+                                    str(custom[0, i]))
+    trace["hovertemplate"] = template
+    del trace["customdata"]
+
+
+def _single_position(trace: dict) -> None:
+    """
+    Replace the per-point category of single-position box and violin
+    traces (e.g. every point of the "winter" box) with x0/y0.
+
+    Args:
+        trace (dict): Trace as a plain dict, modified in place.
+    """
+    if trace.get("type") not in ("box", "violin"):
+        return
+
+    # The position axis is x for vertical traces, y for horizontal ones
+    axis = "y" if trace.get("orientation") == "h" else "x"
+    values = trace.get(axis)
+    if values is None or isinstance(values, (str, dict)):
+        return
+
+    values = np.asarray(values)
+    if values.ndim == 1 and _constant(values):
+        trace[f"{axis}0"] = values[0].item() \
+            if hasattr(values[0], "item") else values[0]
+        del trace[axis]
+
+
+def compact_figure(fig: go.Figure,
+                   min_points: int = MIN_POINTS) -> go.Figure:
+    """
+    Return a copy of a figure with large arrays narrowed and redundant
+    per-point metadata removed.
+
+    Args:
+        fig (go.Figure): Figure to compact.
+        min_points (int): Minimum array length worth narrowing.
+    Returns:
+        go.Figure: Compacted figure.
+    """
+    spec = fig.to_plotly_json()
+    date_axes = set()
+
+    for trace in spec["data"]:
+        _inline_customdata(trace)
+        _single_position(trace)
+
+        for path in ARRAY_PATHS:
+            values = _get(trace, path)
+            if isinstance(values, dict) and "bdata" in values:
+                values = decode_typed_array(values)
+            if values is None or isinstance(values, (str, dict)) \
+                    or np.isscalar(values):
+                continue
+            values = np.asarray(values)
+            if values.ndim == 0 or len(values) < min_points:
+                continue
+
+            # Collapse per-point styling that is the same for every point
+            if path in COLLAPSIBLE and values.ndim == 1 \
+                    and _constant(values):
+                _set(trace, path, values[0].item()
+                     if hasattr(values[0], "item") else values[0])
+                continue
+
+            if np.issubdtype(values.dtype, np.datetime64) \
+                    and path in (("x",), ("y",)):
+                axis = trace.get(f"{path[0]}axis", path[0])
+                date_axes.add(axis.replace("x", "xaxis", 1)
+                              .replace("y", "yaxis", 1))
+            _set(trace, path, narrow_array(values))
+
+    compact = go.Figure(spec, skip_invalid=True)
+
+    # Epoch milliseconds must be shown on date axes
+    for axis in date_axes:
+        compact.layout[axis].type = "date"
+
+    return compact
+
+
+def payload_bytes(fig: go.Figure) -> int:
+    """
+    Size in bytes of the JSON the browser receives for a figure.
+
+    Args:
+        fig (go.Figure): Figure to measure.
+    Returns:
+        int: Serialised payload size in bytes.
+    """
+    return len(pio.to_json(fig, validate=False).encode("utf-8"))
+
+
+def compact_payload(fig: go.Figure) -> tuple[go.Figure, str]:
+    """
+    Compact a figure and serialise it, keeping the payload size on the
+    figure for plotly_chart.
+
+    Args:
+        fig (go.Figure): Figure to compact.
+    Returns:
+        tuple: Compacted figure and its JSON.
+    """
+    fig = compact_figure(fig)
+    text = pio.to_json(fig, validate=False)
+    mark_compacted(fig, len(text.encode("utf-8")))
+    return fig, text
+
+
+def mark_compacted(fig: go.Figure, size: int) -> go.Figure:
+    """
+    Record that a figure is already compacted and its payload size.
+
+    Args:
+        fig (go.Figure): Compacted figure.
+        size (int): Serialised size in bytes.
+    Returns:
+        go.Figure: The same figure.
+    """
+    fig._payload_bytes = size  # Not part of the figure's JSON
+    return fig
+
+
+def start_page_payloads(page: str = None) -> None:
+    """
+    Reset the per-page payload record at the start of a script run.
+
+    Args:
+        page (str): Page title, used by check_page_budget after fragment
+            reruns.
+    """
+    st.session_state["chart_payloads"] = {}
+    st.session_state["payload_page"] = page
+    st.session_state["payload_scope"] = PAGE_SCOPE
+
+
+@contextmanager
+def payload_scope(name: str):
+    """
+    Record the charts drawn in a block under their own scope, replacing
+    what that scope recorded before (a fragment rerun redraws them).
+
+    Args:
+        name (str): Scope name, e.g. the fragment panel name.
+    """
+    st.session_state.setdefault("chart_payloads", {})[name] = []
+    previous = st.session_state.get("payload_scope", PAGE_SCOPE)
+    st.session_state["payload_scope"] = name
+    try:
+        yield
+    finally:
+        st.session_state["payload_scope"] = previous
+
+
+def page_payloads() -> pd.DataFrame:
+    """
+    Payload sizes recorded for the charts currently on the page.
+
+    Returns:
+        pd.DataFrame: One row per chart with 'scope', 'chart' and 'bytes'
+        columns.
+    """
+    rows = [(scope, chart, size) for scope, charts in
+            st.session_state.get("chart_payloads", {}).items()
+            for chart, size in charts]
+    return pd.DataFrame(rows, columns=["scope", "chart", "bytes"])
+
+
+def check_page_budget(page: str = None,
+                      budget: int = PAGE_BUDGET_BYTES) -> int:
+    """
+    Log a warning when the charts of a page exceed the payload budget.
+
+    Args:
+        page (str): Page title, used in the log message; defaults to the
+            page given to start_page_payloads.
+        budget (int): Budget in bytes.
+    Returns:
+        int: Total chart payload of the page in bytes.
+    """
+    page = page or st.session_state.get("payload_page")
+    total = int(page_payloads()["bytes"].sum())
+    if total > budget:
+        logger.warning("Page %s chart payload %.0f kB exceeds budget "
+                       "of %.0f kB", page, total / 1024, budget / 1024)
+    return total
+
+
+def plotly_chart(fig: go.Figure, **kwargs) -> None:
+    """
+    Compact a figure, record its payload size and draw it with
+    st.plotly_chart. Figures from the figure cache are already compacted
+    and carry their size.
+
+    Args:
+        fig (go.Figure): Figure to draw.
+        **kwargs: Passed through to st.plotly_chart.
+    """
+    size = getattr(fig, "_payload_bytes", None)
+    if size is None:
+        fig = compact_figure(fig)
+        size = payload_bytes(fig)
+
+    title = fig.layout.title.text or "untitled"
+    scope = st.session_state.get("payload_scope", PAGE_SCOPE)
+    st.session_state.setdefault("chart_payloads", {})\
+        .setdefault(scope, []).append((title, size))
+
+    st.plotly_chart(fig, **kwargs)
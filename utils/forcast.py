@@ -7,6 +7,25 @@ import pandas as pd
 import numpy as np
 
 
+def encode_categoricals(df: pd.DataFrame, season_dtype, area_dtype,
+                        station_dtype) -> pd.DataFrame:
+    """
+    Apply the categorical encoding used during training.
+    Parameters:
+        df (pd.DataFrame): Data with 'season', 'area_type' and 'station'.
+        season_dtype, area_dtype, station_dtype: Categorical dtypes saved
+            with the model.
+    Returns:
+        pd.DataFrame: Copy with the three columns as int16 category codes.
+    """
+    df = df.copy()
+    for col, dtype in (("season", season_dtype),
+                       ("area_type", area_dtype),
+                       ("station", station_dtype)):
+        df[col] = df[col].astype(dtype).cat.codes.astype("int16")
+    return df
+
+
 def forecast_horizon(df_station: pd.DataFrame, model: object,
                      features: list, horizon: int = 24) -> pd.DataFrame:
     """
@@ -0,0 +1,77 @@
+"""
+Helpers for fragment-scoped partial reruns.
+A panel wraps a function in st.fragment so widgets drawn inside it rerun
+only that panel. Each panel counts its runs (showing that untouched
+panels did no work), is profiled as a span and records its chart payloads
+in its own scope; a rerun of the panel alone checks the page budget
+again.
+"""
+
+import functools
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from utils.figure_payload import check_page_budget, payload_scope
+from utils.profiling import span
+
+
+def panel(name: str):
+    """
+    Decorator turning a function into an isolated, counted fragment.
+
+    Args:
+        name (str): Panel name used in the run counters.
+    Returns:
+        callable: Decorator producing the fragment function.
+    """
+
+    def decorator(func):
+
+        @functools.wraps(func)
+        def counted(*args, **kwargs):
+            runs = st.session_state.setdefault("fragment_runs", {})
+            runs[name] = runs.get(name, 0) + 1
+            with span(name, kind="panel"), payload_scope(name):
+                result = func(*args, **kwargs)
+            if fragment_rerun():
+                check_page_budget()
+            return result
+
+        counted.panel_name = name
+        return st.fragment(counted)
+
+    return decorator
+
+
+def fragment_rerun() -> bool:
+    """
+    Check whether the current run reruns fragments only.
+
+    Returns:
+        bool: True during a fragment rerun, False in a full script run.
+    """
+    ctx = get_script_run_ctx()
+    return bool(ctx is not None and ctx.fragment_ids_this_run)
+
+
+def count_script_run(page: str) -> None:
+    """
+    Count a full script run of a page.
+
+    Args:
+        page (str): Page title.
+    """
+    runs = st.session_state.setdefault("script_runs", {})
+    runs[page] = runs.get(page, 0) + 1
+
+
+def run_counts() -> dict:
+    """
+    Full script runs per page and runs per fragment panel this session.
+
+    Returns:
+        dict: {"script_runs": {...}, "fragment_runs": {...}}
+    """
+    return {
+        "script_runs": dict(st.session_state.get("script_runs", {})),
+        "fragment_runs": dict(st.session_state.get("fragment_runs", {})),
+    }
@@ -0,0 +1,130 @@
+"""
+Statistics behind the hypothesis pages.
+Each function takes the engineered data and returns plain Python values so
+the pages, their caches and the benchmarks share one implementation.
+The spatial and temporal statistics also accept the dense StationTensor,
+whose station rows and time axis give the groups and calendar values
+without grouping the long frame.
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+from utils.eta_squared import eta_squared_anova
+from utils.station_tensor import StationTensor
+
+
+def _groups(df: pd.DataFrame, by: str, value: str = "pm25") -> list:
+    """
+    Non-empty value arrays for each group of a column.
+
+    Args:
+        df (pd.DataFrame): Input data.
+        by (str): Grouping column.
+        value (str): Value column.
+    Returns:
+        list[np.ndarray]: One array of non-null values per group.
+    """
+    return [group[value].dropna().values
+            for _, group in df.groupby(by, observed=False)
+            if group[value].notna().sum() > 0]
+
+
+def spatial_anova(df: pd.DataFrame | StationTensor) -> dict:
+    """
+    One-way ANOVA of PM2.5 across stations and across area types, with
+    eta-squared effect sizes (Hypothesis 2).
+
+    Args:
+        df (pd.DataFrame | StationTensor): Engineered data, or a tensor
+            holding pm25 with area_type as a static attribute.
+    Returns:
+        dict: "Stations" and "Area Types" results with 'type',
+        'F-statistic', 'p-value' and 'eta-squared' keys.
+    """
+    results = {}
+    for label, column in (("Stations", "station"),
+                          ("Area Types", "area_type")):
+        if isinstance(df, StationTensor):
+            by = None if column == "station" else column
+            groups = [g for g in df.groups("pm25", by).values() if len(g)]
+        else:
+            groups = _groups(df, column)
+        f_stat, p_value = stats.f_oneway(*groups)
+        results[label] = {
+            "type": label,
+            "F-statistic": float(f_stat),
+            "p-value": float(p_value),
+            "eta-squared": float(eta_squared_anova(groups)),
+        }
+    return results
+
+
+def weather_correlations(df: pd.DataFrame,
+                         weather_vars: list) -> tuple[dict, dict]:
+    """
+    Pearson correlations of weather variables against PM2.5
+    (Hypothesis 3).
+
+    Args:
+        df (pd.DataFrame): Engineered data.
+        weather_vars (list): Weather variable names.
+    Returns:
+        tuple[dict, dict]: Correlation coefficients and p-values per variable.
+    """
+    corrs = {}
+    pvals = {}
+    for var in weather_vars:
+        valid = df[[var, "pm25"]].dropna()
+        r, p = stats.pearsonr(valid[var], valid["pm25"])
+        corrs[var] = float(r)
+        pvals[var] = float(p)
+    return corrs, pvals
+
+
+def _calendar(times: pd.DatetimeIndex, var: str) -> np.ndarray:
+    """
+    Calendar variable of the engineered data for timestamps.
+
+    Args:
+        times (pd.DatetimeIndex): Timestamps.
+        var (str): "hour", "day_of_week", "month" or "year".
+    Returns:
+        np.ndarray: Values per timestamp.
+    """
+    attr = "dayofweek" if var == "day_of_week" else var
+    return getattr(times, attr).to_numpy()
+
+
+def temporal_correlations(df: pd.DataFrame | StationTensor,
+                          time_vars: list) -> dict:
+    """
+    Spearman correlations of calendar variables against PM2.5
+    (Hypothesis 4).
+
+    Args:
+        df (pd.DataFrame | StationTensor): Engineered data, or a tensor
+            holding pm25 (calendar values come from its time axis).
+        time_vars (list): Calendar variable names, e.g. "hour".
+    Returns:
+        dict: Variable -> {"coef": float, "p": float}.
+    """
+    results = {}
+    if isinstance(df, StationTensor):
+        # Spearman is Pearson on ranks: rank PM2.5 once, and each calendar
+        # variable on the time axis before broadcasting it to the stations
+        pm25 = df.variable("pm25")
+        valid = ~np.isnan(pm25)
+        t_index = np.nonzero(valid)[1]
+        pm25_ranks = stats.rankdata(pm25[valid])
+        for var in time_vars:
+            calendar = _calendar(df.times, var)[t_index]
+            coef, p = stats.pearsonr(pm25_ranks, stats.rankdata(calendar))
+            results[var] = {"coef": float(coef), "p": float(p)}
+        return results
+
+    for var in time_vars:
+        coef, p = stats.spearmanr(df["pm25"], df[var])
+        results[var] = {"coef": float(coef), "p": float(p)}
+    return results
+
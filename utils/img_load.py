@@ -1,22 +1,154 @@
+"""
+Serve the static figures as pre-sized, compressed images.
+Each PNG in figures/ is converted once into WebP copies at a few widths
+(PNG when Pillow lacks WebP support). A copy's name carries the content
+hash of its source, so a redrawn figure gets new copies and stale ones
+are removed. Pages pass the bytes of the smallest copy at least as wide
+as the column to st.image, which serves them as a media file instead of
+serialising every pixel into a Plotly figure.
+
+Usage:
+    python -m utils.img_load            # build copies of every figure
+"""
+
 from pathlib import Path
-import plotly.express as px
+import argparse
 import PIL.Image as Image
+import streamlit as st
+from PIL import features
+from utils.metadata_builder import content_hash
+from utils.profiling import profiled
 
 ROOT = Path(__file__).parent.parent
 IMG_PATH = ROOT / "figures"
+WEB_PATH = ROOT / ".cache" / "static_images"
+
+WIDTHS = (480, 960, 1440)  # Widths of the copies, in pixels
+FORMAT = "webp" if features.check("webp") else "png"
+WEBP_QUALITY = 85
+
+
+def _variant_path(path: Path, digest: str, width: int) -> Path:
+    """Copy of a figure at a width, named after its source hash."""
+    name = f"{path.stem}.{digest[:12]}.{width}.{FORMAT}"
+    return WEB_PATH / path.parent / name
 
 
-def load_img(path: Path) -> bytes:
+def optimise(path: Path) -> dict:
     """
-    Load an image from the figures directory and return as a Plotly figure.
+    Write the resized copies of a figure that do not exist yet and remove
+    copies of earlier versions.
+
+    Args:
+        path (Path): Figure relative to the figures folder.
+    Returns:
+        dict: Width -> copy path. Widths above the figure's own width are
+        served by the full-size copy.
+    """
+    path = Path(path)
+    digest = content_hash(IMG_PATH / path)
+    with Image.open(IMG_PATH / path) as img:
+        widths = sorted({w for w in WIDTHS if w < img.width} | {img.width})
+        variants = {w: _variant_path(path, digest, w) for w in widths}
+        pending = {w: p for w, p in variants.items() if not p.exists()}
+        if pending:
+            img.load()
+            # WebP and PNG both keep transparency; drop palettes first
+            source = img.convert("RGBA" if "A" in img.getbands() else "RGB")
+    for width, target in pending.items():
+        height = round(source.height * width / source.width)
+        resized = (source if width == source.width
+                   else source.resize((width, height), Image.LANCZOS))
+        target.parent.mkdir(parents=True, exist_ok=True)
+        if FORMAT == "webp":
+            resized.save(target, "WEBP", quality=WEBP_QUALITY, method=6)
+        else:
+            resized.save(target, "PNG", optimize=True)
+
+    keep = set(variants.values())
+    for stale in (WEB_PATH / path.parent).glob(f"{path.stem}.*.{FORMAT}"):
+        if stale not in keep:
+            stale.unlink()
+    return variants
+
+
+@profiled(cache=st.cache_data)
+def _load_variant(path: str, width: int, version: tuple) -> bytes:
+    """
+    Bytes of the copy of a figure for a width, building the copies when
+    missing. Cached per file version (size, mtime), so the source is only
+    hashed again after it changes.
+
+    Args:
+        path (str): Figure relative to the figures folder.
+        width (int): Display width in pixels.
+        version (tuple): Size and mtime of the figure file.
+    Returns:
+        bytes: Encoded image.
+    """
+    variants = optimise(Path(path))
+    fits = [w for w in variants if w >= width]
+    return variants[min(fits) if fits else max(variants)].read_bytes()
+
+
+def load_img(path: Path, width: int = WIDTHS[1]) -> bytes:
+    """
+    Load an image from the figures directory, as the smallest optimised
+    copy at least width pixels wide.
+
+    Args:
+        path (Path): Relative path to the image file within the
+        figures directory.
+        width (int): Display width in pixels.
+    Returns:
+        bytes: WebP (or PNG) image for st.image.
+    """
+    stat = (IMG_PATH / path).stat()
+    return _load_variant(Path(path).as_posix(), width,
+                         (stat.st_size, stat.st_mtime_ns))
+
+
+def show_img(path: Path, caption: str = None,
+             width: int = WIDTHS[1]) -> None:
+    """
+    Show a static figure at the container width. Call it inside the tab
+    or expander that shows the figure, so only the figures of rendered
+    sections are loaded.
+
     Args:
         path (Path): Relative path to the image file within the
         figures directory.
+        caption (str): Optional caption.
+        width (int): Expected display width in pixels.
+    """
+    st.image(load_img(path, width), caption=caption,
+             use_container_width=True)
+
+
+def parse_args(argv: list = None) -> argparse.Namespace:
+    """
+    Parse command line arguments.
+
+    Args:
+        argv (list): Arguments, defaults to sys.argv.
     Returns:
-        fig (px.Figure): Plotly figure containing the image.
+        argparse.Namespace: Parsed arguments.
     """
-    img = Image.open(IMG_PATH / path)  # Load image from figures directory
-    fig = px.imshow(img)  # Create Plotly figure
-    fig.update_layout(height=500)  # Set figure height
+    parser = argparse.ArgumentParser(
+        prog="python -m utils.img_load",
+        description="Write resized copies of the static figures.")
+    parser.add_argument("figures", nargs="*", type=Path,
+                        help="figures relative to figures/, default all")
+    return parser.parse_args(argv)
+
 
-    return fig
+if __name__ == "__main__":
+    args = parse_args()
+    paths = args.figures or sorted(p.relative_to(IMG_PATH)
+                                   for p in IMG_PATH.rglob("*.png"))
+    source = written = 0
+    for path in paths:
+        source += (IMG_PATH / path).stat().st_size
+        written += sum(p.stat().st_size for p in optimise(path).values())
+    print(f"{len(paths)} figures: {source / 1e6:.1f} MB of PNG, "
+          f"{written / 1e6:.1f} MB of {FORMAT} copies in {WEB_PATH}")
@@ -0,0 +1,414 @@
+"""
+Incremental append of new raw readings.
+A watermark per station records the last engineered timestamp. Only rows
+after it are cleaned and feature engineered, together with a short
+look-back of already-cleaned rows so gaps at the start of the new rows are
+interpolated across the boundary. As in utils.cleaning's streamed
+cleaning, rows after a station's last complete reading are held back (in
+data/engineered/_pending) and cleaned with the next append, so every gap
+is interpolated from its true neighbours and the result equals cleaning
+the full history. Cleaned rows are appended as new parquet parts
+(station=<name>/part-<start>-<end>.parquet) of the raw combined dataset and
+of the engineered dataset in data/engineered/beijing_engineered.
+Only the pyramid buckets of the affected stations and periods are rebuilt.
+
+Usage:
+    python -m utils.incremental --bootstrap   # engineer the combined data
+    python -m utils.incremental --all new_readings.csv [...]
+
+Both paths drop readings from CLEANED_UNTIL (2017-01-01) on, as the
+published dataset does, unless --all or another --until is given.
+"""
+
+from pathlib import Path
+import argparse
+import json
+import os
+import tempfile
+import pandas as pd
+from utils.cleaning import (CHUNK_ROWS, CLEANED_COLUMNS, CLEANED_UNTIL,
+                            MAX_PENDING_CHUNKS, clean_station,
+                            complete_rows)
+from utils.column_stats import (DatasetStats, dataset_stats, parts_stats,
+                                read_state)
+from utils.feature_engineering import add_engineered_features
+from utils.ingest import COMBINED_PATH, RAW_DTYPES, load_combined
+from utils.load_csv import DataVersion
+from utils.time_pyramid import (LEVELS, PYRAMID_PATH, bucket_start,
+                                read_level, save_level, update_level)
+
+ROOT = Path(__file__).parent.parent
+ENGINEERED_DATASET = ROOT / "data" / "engineered" / "beijing_engineered"
+WATERMARK_PATH = ROOT / "data" / "engineered" / "_watermarks.json"
+PENDING_PATH = ROOT / "data" / "engineered" / "_pending"
+STATION_META_PATH = ROOT / "data" / "metadata" / "station_metadata.csv"
+
+# Cleaned rows read before the new ones to bridge interpolation gaps
+LOOKBACK = pd.Timedelta(hours=48)
+# Held-back rows beyond this are cleaned anyway, as in utils.cleaning
+MAX_PENDING_ROWS = MAX_PENDING_CHUNKS * CHUNK_ROWS
+
+
+def read_watermarks(path: Path = WATERMARK_PATH) -> dict:
+    """
+    Read the last ingested timestamp of each station.
+
+    Args:
+        path (Path): Watermark file.
+    Returns:
+        dict: Station -> pd.Timestamp; empty before the first append.
+    """
+    try:
+        marks = json.loads(Path(path).read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return {}
+    return {station: pd.Timestamp(ts) for station, ts in marks.items()}
+
+
+def write_watermarks(marks: dict, path: Path = WATERMARK_PATH) -> None:
+    """
+    Write the watermarks atomically, so readers never see a partial file.
+
+    Args:
+        marks (dict): Station -> timestamp.
+        path (Path): Watermark file.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile("w", dir=path.parent, suffix=".tmp",
+                                     delete=False, encoding="utf-8") as tmp:
+        json.dump({s: str(ts) for s, ts in sorted(marks.items())}, tmp,
+                  indent=2)
+    os.replace(tmp.name, path)
+
+
+def write_part(df: pd.DataFrame, dataset: Path, station: str) -> Path:
+    """
+    Append rows of one station to a station-partitioned dataset as a new
+    part named after the time range it covers.
+
+    Args:
+        df (pd.DataFrame): Rows with a datetime column (or year/month/
+            day/hour for raw readings).
+        dataset (Path): Dataset directory.
+        station (str): Station partition.
+    Returns:
+        Path: Part written.
+    """
+    times = (df["datetime"] if "datetime" in df.columns else
+             pd.to_datetime(df[["year", "month", "day", "hour"]]))
+    name = f"part-{times.min():%Y%m%d%H}-{times.max():%Y%m%d%H}.parquet"
+    path = Path(dataset) / f"station={station}" / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    df.drop(columns="station", errors="ignore").to_parquet(path, index=False)
+    return path
+
+
+def read_station(dataset: Path, station: str,
+                 since: pd.Timestamp = None) -> pd.DataFrame:
+    """
+    Read one station of the engineered dataset, optionally from a time on
+    (pushed down to parquet as a filter, so row groups before it are
+    skipped from the part footers).
+
+    Args:
+        dataset (Path): Dataset directory.
+        station (str): Station partition.
+        since (pd.Timestamp): First timestamp to read.
+    Returns:
+        pd.DataFrame: Rows sorted by datetime, with a station column.
+    """
+    path = Path(dataset) / f"station={station}"
+    if not path.exists():
+        return pd.DataFrame()
+    filters = [("datetime", ">=", pd.Timestamp(since))] if since else None
+    df = pd.read_parquet(path, filters=filters)
+    return df.assign(station=station).sort_values("datetime",
+                                                  ignore_index=True)
+
+
+def read_engineered(dataset: Path = ENGINEERED_DATASET,
+                    watermark_path: Path = WATERMARK_PATH) -> pd.DataFrame:
+    """
+    Read the whole engineered dataset in the layout of the engineered CSV.
+    The data version (kept by the star schema) follows the watermarks.
+
+    Args:
+        dataset (Path): Dataset directory.
+        watermark_path (Path): Watermark file.
+    Returns:
+        pd.DataFrame: Engineered rows sorted by station then datetime.
+    """
+    df = pd.read_parquet(dataset).sort_values(["station", "datetime"],
+                                              ignore_index=True)
+    df = df[CLEANED_COLUMNS
+            + [c for c in df.columns if c not in CLEANED_COLUMNS]]
+    stat = Path(watermark_path).stat()
+    df.attrs["version"] = DataVersion(f"{Path(dataset).name}:"
+                                      f"{stat.st_mtime_ns}")
+    return df
+
+
+def _station_rows(raw: pd.DataFrame) -> dict:
+    """
+    Split raw readings by station, naming stations as in the metadata.
+
+    Args:
+        raw (pd.DataFrame): Raw readings with a station column.
+    Returns:
+        dict: Station -> its raw readings.
+    """
+    names = raw["station"].astype(str).str.lower()
+    return {station: rows for station, rows in raw.groupby(names)}
+
+
+def _raw_times(raw: pd.DataFrame) -> pd.Series:
+    """Timestamp of each raw reading."""
+    return pd.to_datetime(raw[["year", "month", "day", "hour"]])
+
+
+def read_pending(station: str, pending: Path = PENDING_PATH) -> pd.DataFrame:
+    """
+    Raw readings of a station held back by the last append.
+
+    Args:
+        station (str): Station name.
+        pending (Path): Held-back readings directory.
+    Returns:
+        pd.DataFrame: Raw readings, empty when none were held back.
+    """
+    path = Path(pending) / f"{station}.parquet"
+    return pd.read_parquet(path) if path.exists() else pd.DataFrame()
+
+
+def write_pending(raw: pd.DataFrame, station: str,
+                  pending: Path = PENDING_PATH) -> None:
+    """
+    Replace the held-back raw readings of a station, removing the file
+    when there are none.
+
+    Args:
+        raw (pd.DataFrame): Raw readings waiting for a later reading.
+        station (str): Station name.
+        pending (Path): Held-back readings directory.
+    """
+    path = Path(pending) / f"{station}.parquet"
+    if raw.empty:
+        path.unlink(missing_ok=True)
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=path.parent, suffix=".tmp",
+                                     delete=False) as tmp:
+        raw.astype(RAW_DTYPES).to_parquet(tmp.name, index=False)
+    os.replace(tmp.name, path)
+
+
+def append_station(raw: pd.DataFrame,
+                   station: str,
+                   station_meta: pd.DataFrame,
+                   watermark: pd.Timestamp = None,
+                   dataset: Path = ENGINEERED_DATASET,
+                   combined: Path = None,
+                   pending: Path = PENDING_PATH,
+                   until: str = None) -> dict | None:
+    """
+    Clean, engineer and append the readings of one station newer than its
+    watermark, up to its last complete reading. Later rows are held back
+    with write_pending and cleaned by the next append.
+
+    Args:
+        raw (pd.DataFrame): Raw readings of the station.
+        station (str): Station name.
+        station_meta (pd.DataFrame): Station metadata.
+        watermark (pd.Timestamp): Last engineered timestamp, None if the
+            station has not been ingested.
+        dataset (Path): Engineered dataset directory.
+        combined (Path): Raw combined dataset to append the new raw rows
+            to, None to skip (e.g. when bootstrapping from it).
+        pending (Path): Held-back readings directory.
+        until (str): Drop readings from this timestamp on (None for all).
+    Returns:
+        dict | None: 'start', 'end' and 'rows' of the appended rows and
+        the 'part' written, or None when no row could be appended.
+    """
+    if watermark is not None:
+        raw = raw[_raw_times(raw) > watermark]
+    if not raw.empty and combined is not None:
+        write_part(raw.astype(RAW_DTYPES), combined, station)
+
+    # Held-back rows first, so a repeated reading replaces them
+    held = read_pending(station, pending)
+    if not held.empty:
+        raw = pd.concat([held, raw.astype(RAW_DTYPES)], ignore_index=True)
+    if raw.empty:
+        return None
+    raw = raw.iloc[_raw_times(raw).argsort(kind="stable")]
+    raw = raw.reset_index(drop=True)
+
+    # Rows after the last complete reading wait for a later one, unless
+    # the backlog outgrows the memory bound. Readings after the cut-off
+    # still bound the gaps before it.
+    ready = complete_rows(raw)
+    if len(raw) - ready > MAX_PENDING_ROWS:
+        ready = len(raw)
+    times = _raw_times(raw)
+    keep = times < pd.Timestamp(until) if until else times.notna()
+    write_pending(raw.iloc[ready:][keep.iloc[ready:]], station, pending)
+    if ready == 0:
+        return None
+
+    context = (read_station(dataset, station, watermark - LOOKBACK)
+               if watermark is not None else None)
+    cleaned = clean_station(raw, station, station_meta, context)
+    last = times.iloc[ready - 1]
+    if until:
+        last = min(last, pd.Timestamp(until) - pd.Timedelta(hours=1))
+    cleaned = cleaned[cleaned["datetime"] <= last]
+    if cleaned.empty:
+        return None
+
+    engineered = add_engineered_features(cleaned)
+    part = write_part(engineered, dataset, station)
+    return {"start": engineered["datetime"].min(),
+            "end": engineered["datetime"].max(),
+            "rows": len(engineered), "part": part}
+
+
+def append_readings(raw: pd.DataFrame,
+                    dataset: Path = ENGINEERED_DATASET,
+                    combined: Path = COMBINED_PATH,
+                    watermark_path: Path = WATERMARK_PATH,
+                    pyramid: Path = PYRAMID_PATH,
+                    pending: Path = PENDING_PATH,
+                    until: str = CLEANED_UNTIL) -> dict:
+    """
+    Append new raw readings of any number of stations, refresh the
+    affected pyramid buckets and merge the statistics of the new parts
+    into the column statistics of the dataset (a full scan only when no
+    current accumulator state exists). Watermarks are advanced only after
+    a station's parts are written, so an interrupted run is safe to
+    repeat.
+
+    Args:
+        raw (pd.DataFrame): Raw readings (data/raw schema).
+        dataset (Path): Engineered dataset directory.
+        combined (Path): Raw combined dataset, None to skip.
+        watermark_path (Path): Watermark file.
+        pyramid (Path): Pyramid directory, refreshed if it exists.
+        pending (Path): Held-back readings directory.
+        until (str): Drop readings from this timestamp on, as
+            utils.cleaning does for the published dataset (None for all).
+    Returns:
+        dict: Station -> {'start', 'end', 'rows', 'part'} of the appended
+        rows.
+    """
+    marks = read_watermarks(watermark_path)
+    stats = read_state(dataset) if Path(dataset).exists() else DatasetStats()
+    station_meta = pd.read_csv(STATION_META_PATH)
+
+    affected = {}
+    for station, rows in _station_rows(raw).items():
+        appended = append_station(rows, station, station_meta,
+                                  marks.get(station), dataset, combined,
+                                  pending, until)
+        if appended:
+            affected[station] = appended
+            marks[station] = appended["end"]
+            write_watermarks(marks, watermark_path)
+
+    if affected and Path(pyramid).exists():
+        refresh_pyramid(affected, dataset, pyramid)
+    if affected:
+        if stats is None:
+            stats = dataset_stats(dataset)
+        else:
+            stats.merge(parts_stats(dataset, [info["part"] for info
+                                              in affected.values()]))
+        stats.write(dataset, state=True)
+    return affected
+
+
+def _first_bucket(timestamp: pd.Timestamp, level: str) -> pd.Timestamp:
+    """
+    Start of the pyramid bucket containing a timestamp.
+
+    Args:
+        timestamp (pd.Timestamp): Timestamp.
+        level (str): Pyramid level name.
+    Returns:
+        pd.Timestamp: Bucket start.
+    """
+    return bucket_start(pd.Series([timestamp]), level).iloc[0]
+
+
+def refresh_pyramid(affected: dict,
+                    dataset: Path = ENGINEERED_DATASET,
+                    directory: Path = PYRAMID_PATH) -> list[Path]:
+    """
+    Rebuild the pyramid buckets of the affected stations and periods.
+
+    Args:
+        affected (dict): Output of append_readings.
+        dataset (Path): Engineered dataset directory.
+        directory (Path): Pyramid directory.
+    Returns:
+        list[Path]: Levels rewritten.
+    """
+    # Read each station from the start of its coarsest touched bucket
+    coarsest = list(LEVELS)[-1]
+    rows = pd.concat([
+        read_station(dataset, station,
+                     _first_bucket(info["start"], coarsest))
+        for station, info in affected.items()
+    ], ignore_index=True)
+
+    written = []
+    for level in LEVELS:
+        path = Path(directory) / f"{level}.npz"
+        if not path.exists():
+            continue
+        since = rows["station"].map({
+            station: _first_bucket(info["start"], level)
+            for station, info in affected.items()})
+        level_df = update_level(read_level(path), rows[rows["datetime"]
+                                                       >= since], level)
+        written.append(save_level(level_df, path))
+    return written
+
+
+def parse_args(argv: list = None) -> argparse.Namespace:
+    """
+    Parse command line arguments.
+
+    Args:
+        argv (list): Arguments, defaults to sys.argv.
+    Returns:
+        argparse.Namespace: Parsed arguments.
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m utils.incremental",
+        description="Append new raw readings to the engineered dataset.")
+    parser.add_argument("files", nargs="*", type=Path,
+                        help="raw CSV files (data/raw schema)")
+    parser.add_argument("--bootstrap", action="store_true",
+                        help="engineer the combined dataset up to now")
+    parser.add_argument("--until", default=CLEANED_UNTIL,
+                        help="drop readings from this timestamp on")
+    parser.add_argument("--all", action="store_true",
+                        help="keep every reading (no --until cut-off)")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    until = None if args.all else args.until
+    if args.bootstrap:
+        new = load_combined()
+        affected = append_readings(new, combined=None, until=until)
+    else:
+        new = pd.concat([pd.read_csv(f, dtype=RAW_DTYPES)
+                         for f in args.files], ignore_index=True)
+        affected = append_readings(new, until=until)
+    for station, info in affected.items():
+        print(f"{station}: {info['rows']} rows "
+              f"{info['start']} -> {info['end']}")
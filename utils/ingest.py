@@ -0,0 +1,228 @@
+"""
+Parallel ingestion of the raw station CSV files.
+Each station file is parsed in its own worker process with explicit dtypes
+and written as one partition of a hive-partitioned parquet dataset
+(data/combined/beijing_combined/station=<name>/part-0.parquet), so ingest
+time scales with the number of cores rather than the number of stations.
+Replaces the serial read/concat/to_csv of notebook 01.
+
+Usage:
+    python -m utils.ingest
+    python -m utils.ingest --raw data/synthetic/10x/data/raw --workers 8
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import argparse
+import os
+import time
+import pandas as pd
+from utils.column_stats import DatasetStats
+from utils.metadata_builder import MetadataBuilder, stage_is_current
+
+ROOT = Path(__file__).parent.parent
+RAW_PATH = ROOT / "data" / "raw"
+COMBINED_PATH = ROOT / "data" / "combined" / "beijing_combined"
+
+# Explicit dtypes of the raw files; the station column is derived from
+# the file name and stored in the partition path
+RAW_DTYPES = {
+    "No": "int32",
+    "year": "int16",
+    "month": "int8",
+    "day": "int8",
+    "hour": "int8",
+    "PM2.5": "float32",
+    "PM10": "float32",
+    "SO2": "float32",
+    "NO2": "float32",
+    "CO": "float32",
+    "O3": "float32",
+    "TEMP": "float32",
+    "PRES": "float32",
+    "DEWP": "float32",
+    "RAIN": "float32",
+    "wd": "category",
+    "WSPM": "float32",
+}
+
+
+def read_station(path: Path) -> pd.DataFrame:
+    """
+    Parse one raw station file with explicit dtypes.
+
+    Args:
+        path (Path): Raw station CSV.
+    Returns:
+        pd.DataFrame: Station records without the station column.
+    """
+    return pd.read_csv(path, usecols=list(RAW_DTYPES), dtype=RAW_DTYPES,
+                       engine="pyarrow")
+
+
+def partition_path(output: Path, station: str) -> Path:
+    """
+    Parquet file of one station partition.
+
+    Args:
+        output (Path): Dataset directory.
+        station (str): Station name.
+    Returns:
+        Path: <output>/station=<station>/part-0.parquet
+    """
+    return Path(output) / f"station={station}" / "part-0.parquet"
+
+
+def ingest_station(path: Path, output: Path) -> tuple[dict, DatasetStats]:
+    """
+    Parse a raw station file and write its partition.
+
+    Args:
+        path (Path): Raw station CSV.
+        output (Path): Dataset directory.
+    Returns:
+        tuple: Partition stats (station, path, records, file_size and
+        seconds) and the column statistics of the partition.
+    """
+    start = time.perf_counter()
+    station = Path(path).stem  # Station name from the file name
+    df = read_station(path)
+
+    target = partition_path(output, station)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    df.to_parquet(target, index=False)
+    key = target.relative_to(output).as_posix()
+
+    return {
+        "station": station,
+        "path": key,
+        "records": len(df),
+        "file_size": target.stat().st_size,
+        "seconds": round(time.perf_counter() - start, 3),
+    }, DatasetStats().update(df, partition=key)
+
+
+def ingest(raw_dir: Path = RAW_PATH,
+           output: Path = COMBINED_PATH,
+           workers: int = None) -> list[dict]:
+    """
+    Ingest every station file of a raw folder in parallel, and write the
+    column statistics and per-partition zone maps of the dataset.
+
+    Args:
+        raw_dir (Path): Folder of raw station CSV files.
+        output (Path): Dataset directory to write.
+        workers (int): Worker processes, defaults to the CPU count.
+    Returns:
+        list[dict]: Partition stats sorted by station.
+    """
+    files = sorted(Path(raw_dir).glob("*.csv"))
+    if not files:
+        raise FileNotFoundError(f"No station files in {raw_dir}")
+
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        results = list(pool.map(ingest_station, files,
+                                [Path(output)] * len(files)))
+
+    stats = DatasetStats()
+    for _, partition_stats in results:
+        stats.merge(partition_stats)
+    stats.write(output)
+    return sorted((p for p, _ in results), key=lambda p: p["station"])
+
+
+def load_combined(path: Path = COMBINED_PATH,
+                  stations: list = None,
+                  columns: list = None) -> pd.DataFrame:
+    """
+    Read the combined dataset, optionally only some stations and columns.
+
+    Args:
+        path (Path): Dataset directory.
+        stations (list): Stations to read, all by default.
+        columns (list): Columns to read, all by default.
+    Returns:
+        pd.DataFrame: Combined records with a categorical station column.
+    """
+    filters = [("station", "in", list(stations))] if stations else None
+    return pd.read_parquet(path, columns=columns, filters=filters)
+
+
+def metadata_path(output: Path) -> Path:
+    """
+    Metadata file of a combined dataset, which also records its lineage.
+
+    Args:
+        output (Path): Dataset directory.
+    Returns:
+        Path: _metadata.yml next to the dataset.
+    """
+    return Path(output).parent / "_metadata.yml"
+
+
+def write_metadata(partitions: list[dict], output: Path,
+                   seconds: float, raw_dir: Path = RAW_PATH) -> None:
+    """
+    Document the combined dataset next to it with MetadataBuilder.
+
+    Args:
+        partitions (list[dict]): Output of ingest.
+        output (Path): Dataset directory.
+        seconds (float): Total ingest time.
+        raw_dir (Path): Folder the raw station files were read from.
+    """
+    builder = MetadataBuilder(
+        dataset_path=output,
+        dataset_name="Beijing Air Quality – Combined Dataset",
+        description="All raw station CSV files combined into one parquet "
+                    "dataset partitioned by station.")
+    builder.add_source_info()
+    builder.add_licence()
+    builder.add_creation_script("utils/ingest.py")
+    builder.add_step(f"Parsed {len(partitions)} raw station CSV files in "
+                     "parallel with explicit dtypes")
+    builder.add_step("Derived the station column from the file names")
+    builder.add_step(f"Wrote one parquet partition per station in "
+                     f"{seconds:.1f} s")
+    builder.add_columns(list(RAW_DTYPES) + ["station"])
+    builder.add_partitions(partitions)
+    builder.add_lineage([raw_dir], [output], [__file__], seconds=seconds)
+    builder.write(metadata_path(output))
+
+
+def parse_args(argv: list = None) -> argparse.Namespace:
+    """
+    Parse command line arguments.
+
+    Args:
+        argv (list): Arguments, defaults to sys.argv.
+    Returns:
+        argparse.Namespace: Parsed arguments.
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m utils.ingest",
+        description="Ingest raw station files into partitioned parquet.")
+    parser.add_argument("--raw", type=Path, default=RAW_PATH,
+                        help="folder of raw station CSV files")
+    parser.add_argument("--output", type=Path, default=COMBINED_PATH,
+                        help="dataset directory to write")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--force", action="store_true",
+                        help="rebuild even if the inputs are unchanged")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if not args.force and stage_is_current(metadata_path(args.output),
+                                           [args.raw], [args.output],
+                                           [__file__]):
+        print("Raw files and code unchanged, skipping:", args.output)
+        raise SystemExit(0)
+    start = time.perf_counter()
+    partitions = ingest(args.raw, args.output, args.workers)
+    seconds = time.perf_counter() - start
+    write_metadata(partitions, args.output, seconds, args.raw)
+    print(f"Ingested {sum(p['records'] for p in partitions):,} records "
+          f"from {len(partitions)} stations in {seconds:.1f} s to:",
+          args.output)
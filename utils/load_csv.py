@@ -1,17 +1,171 @@
 """
 Utility functions for loading CSV files.
+Loaded frames are downcast to the smallest dtypes that hold their values:
+integers to int8/int16/int32 within the observed (or schema declared)
+range, and floats to float32 when that is within a relative tolerance.
+Dtype kinds never change, so integer columns stay integer and model
+inputs keep the kinds they were trained with. Only the dashboard loaders
+optimise: notebooks and CLIs that write data products load full
+precision, so rebuilt products match the published ones.
+
+Usage:
+    python -m utils.load_csv data/engineered/beijing_engineered.csv
 """
 
-import pandas as pd
 from pathlib import Path
+import argparse
+import functools
+import json
+import numpy as np
+import pandas as pd
+from utils.profiling import annotate
+
+ROOT = Path(__file__).parent.parent
+SCHEMA_PATH = ROOT / "model_outputs" / "regression" / \
+    "regression_metadata.json"
+
+FLOAT_TOLERANCE = 1e-6  # Allowed relative error of a float32 downcast
+INT_DTYPES = ["int8", "int16", "int32"]
+
+
+class DataVersion(str):
+    """
+    Version token of a loaded frame, stored in df.attrs["version"].
+    pandas deep-copies attrs into every frame derived from another (a
+    filter, sort, column selection, astype...); the deep copy of a
+    DataVersion is None, so only the frame a loader returned (or a
+    pickled copy of it, as served by st.cache_data) carries the version.
+    """
+
+    def __deepcopy__(self, memo: dict) -> None:
+        return None
+
+
+@functools.cache
+def load_schema(path: Path = SCHEMA_PATH) -> dict:
+    """
+    Declared column ranges, from the feature schema saved with the
+    regression model.
+
+    Args:
+        path (Path): Regression metadata JSON.
+    Returns:
+        dict: Column -> {'min', 'max', optional 'tolerance'}; empty when
+        the metadata is missing.
+    """
+    try:
+        metadata = json.loads(Path(path).read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return {}
+    return metadata.get("feature_schema", {})
+
+
+def _int_dtype(values: np.ndarray, spec: dict) -> str:
+    """
+    Smallest integer dtype holding the values and the declared range.
+
+    Args:
+        values (np.ndarray): Integer values.
+        spec (dict): Declared range, may be empty.
+    Returns:
+        str: Integer dtype name.
+    """
+    low = min(values.min(initial=0), spec.get("min", 0))
+    high = max(values.max(initial=0), spec.get("max", 0))
+    for dtype in INT_DTYPES:
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return dtype
+    return str(values.dtype)
 
 
-def load_csv(path: Path) -> pd.DataFrame:
+def _float_fits(values: np.ndarray, tolerance: float) -> bool:
+    """
+    Whether a float32 copy is within a relative tolerance of the values.
+
+    Args:
+        values (np.ndarray): float64 values.
+        tolerance (float): Allowed relative error, 0 for lossless.
+    Returns:
+        bool: True when float32 holds the values closely enough.
+    """
+    finite = values[np.isfinite(values)]
+    if finite.size and np.abs(finite).max() > np.finfo("float32").max:
+        return False
+    error = np.abs(finite.astype("float32").astype("float64") - finite)
+    return bool((error <= tolerance * np.abs(finite)).all())
+
+
+def optimise_dtypes(df: pd.DataFrame, schema: dict = None,
+                    tolerance: float = FLOAT_TOLERANCE) -> pd.DataFrame:
+    """
+    Downcast 64-bit numeric columns to the smallest dtypes that fit.
+
+    Args:
+        df (pd.DataFrame): Data to optimise.
+        schema (dict): Column -> {'min', 'max', 'tolerance'}; ranges make
+            the chosen integer dtype stable across data versions.
+        tolerance (float): Default relative tolerance for floats.
+    Returns:
+        pd.DataFrame: Frame with downcast columns (other columns shared),
+        keeping the version stamp of df.
+    """
+    schema = schema or {}
+    dtypes = {}
+    for col in df.columns:
+        if not isinstance(df[col].dtype, np.dtype):
+            continue  # category, string and other extension dtypes
+        spec = schema.get(col, {})
+        values = df[col].to_numpy()
+        if values.dtype.kind in "iu":
+            dtype = _int_dtype(values, spec)
+            if dtype != str(values.dtype):
+                dtypes[col] = dtype
+        elif values.dtype.kind == "f" and values.dtype.itemsize > 4:
+            if _float_fits(values, spec.get("tolerance", tolerance)):
+                dtypes[col] = "float32"
+    if not dtypes:
+        return df
+    optimised = df.astype(dtypes)
+    if "version" in df.attrs:
+        optimised.attrs["version"] = df.attrs["version"]
+    return optimised
+
+
+def memory_report(before: pd.DataFrame,
+                  after: pd.DataFrame) -> pd.DataFrame:
+    """
+    Per-column dtypes and memory of a frame before and after optimising.
+
+    Args:
+        before (pd.DataFrame): Original frame.
+        after (pd.DataFrame): Optimised frame.
+    Returns:
+        pd.DataFrame: dtype_before, dtype_after, bytes_before, bytes_after
+        and saving per column, plus a total row.
+    """
+    report = pd.DataFrame({
+        "dtype_before": before.dtypes.astype(str),
+        "dtype_after": after.dtypes.astype(str),
+        "bytes_before": before.memory_usage(index=False, deep=True),
+        "bytes_after": after.memory_usage(index=False, deep=True),
+    })
+    report.loc["total"] = ["", "", report["bytes_before"].sum(),
+                           report["bytes_after"].sum()]
+    report["saving"] = 1 - report["bytes_after"] / report["bytes_before"]
+    return report
+
+
+def load_csv(path: Path, optimise: bool = False,
+             schema: dict = None) -> pd.DataFrame:
     """
     Load a CSV file into a DataFrame.
 
     Args:
         path (Path): Path to the CSV file.
+        optimise (bool): Downcast numeric columns (see optimise_dtypes),
+            for read-only use such as the dashboard.
+        schema (dict): Declared column ranges, defaults to load_schema().
     Returns:
         pd.DataFrame: Loaded DataFrame.
     """
@@ -26,4 +180,39 @@ def load_csv(path: Path) -> pd.DataFrame:
         if col != "datetime":
             df[col] = df[col].astype("category")
 
+    if optimise:
+        before = df.memory_usage(deep=True).sum()
+        df = optimise_dtypes(df, load_schema() if schema is None else schema)
+        after = df.memory_usage(deep=True).sum()
+        annotate(memory_kb=round(after / 1024),
+                 memory_saved_kb=round((before - after) / 1024))
+
+    # Stamp a cheap version token (name, mtime, size), kept by the star
+    # schema and used as the figure cache key of this frame
+    stat = Path(path).stat()
+    df.attrs["version"] = DataVersion(f"{Path(path).name}:"
+                                      f"{stat.st_mtime_ns}:{stat.st_size}")
     return df
+
+
+def parse_args(argv: list = None) -> argparse.Namespace:
+    """
+    Parse command line arguments.
+
+    Args:
+        argv (list): Arguments, defaults to sys.argv.
+    Returns:
+        argparse.Namespace: Parsed arguments.
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m utils.load_csv",
+        description="Report the memory saved by dtype optimisation.")
+    parser.add_argument("files", nargs="+", type=Path, help="CSV files")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    for csv in parse_args().files:
+        print(f"\n{csv}")
+        print(memory_report(load_csv(csv),
+                            load_csv(csv, optimise=True)).to_string())
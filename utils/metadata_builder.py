@@ -8,9 +8,177 @@ Author: Robert Steven Elliott
 
 import os
 import datetime
+import hashlib
 from pathlib import Path
 import yaml
 
+ROOT = Path(__file__).parent.parent
+HASH_CHUNK = 1024 * 1024  # Bytes read at a time when hashing files
+
+
+def _files(path: Path) -> list[Path]:
+    """
+    Files making up a path: the file itself, or every file below a
+    directory except metadata and hidden files.
+
+    Args:
+        path (Path): File or directory.
+    Returns:
+        list[Path]: Files in a stable order.
+    """
+    path = Path(path)
+    if path.is_file():
+        return [path]
+    return sorted(f for f in path.rglob("*")
+                  if f.is_file() and f.name != "_metadata.yml"
+                  and not any(part.startswith(".")
+                              for part in f.relative_to(path).parts))
+
+
+def _key(path: Path) -> str:
+    """
+    Path as recorded in metadata: relative to the repository when inside.
+
+    Args:
+        path (Path): File or directory.
+    Returns:
+        str: POSIX path.
+    """
+    path = Path(path).resolve()
+    try:
+        return path.relative_to(ROOT).as_posix()
+    except ValueError:
+        return path.as_posix()
+
+
+def file_stat(path: Path) -> dict:
+    """
+    Cheap summary of a file or directory: total bytes and latest mtime.
+
+    Args:
+        path (Path): File or directory.
+    Returns:
+        dict: 'bytes' and 'mtime_ns', or None values when it is missing.
+    """
+    files = _files(path) if Path(path).exists() else []
+    if not files:
+        return {"bytes": None, "mtime_ns": None}
+    stats = [f.stat() for f in files]
+    return {"bytes": sum(s.st_size for s in stats),
+            "mtime_ns": max(s.st_mtime_ns for s in stats)}
+
+
+def content_hash(path: Path) -> str | None:
+    """
+    SHA-256 of the content of a file, or of every file below a directory
+    together with their relative paths.
+
+    Args:
+        path (Path): File or directory.
+    Returns:
+        str | None: Hex digest, None when the path does not exist.
+    """
+    path = Path(path)
+    if not path.exists():
+        return None
+    h = hashlib.sha256()
+    for f in _files(path):
+        if path.is_dir():
+            h.update(f.relative_to(path).as_posix().encode() + b"\0")
+        with open(f, "rb") as stream:
+            while chunk := stream.read(HASH_CHUNK):
+                h.update(chunk)
+    return h.hexdigest()
+
+
+def fingerprint(path: Path) -> dict:
+    """
+    Content hash plus the cheap summary used to avoid rehashing.
+
+    Args:
+        path (Path): File or directory.
+    Returns:
+        dict: 'sha256', 'bytes' and 'mtime_ns'.
+    """
+    return {"sha256": content_hash(path), **file_stat(path)}
+
+
+def unchanged(path: Path, recorded: dict) -> bool:
+    """
+    Whether a path still has the content of a recorded fingerprint. An
+    identical size and mtime is trusted; otherwise the content is hashed,
+    so a touched but identical file still counts as unchanged.
+
+    Args:
+        path (Path): File or directory.
+        recorded (dict): Fingerprint from the metadata.
+    Returns:
+        bool: True when the content matches.
+    """
+    if recorded is None or not Path(path).exists():
+        return False
+    if file_stat(path) == {"bytes": recorded.get("bytes"),
+                           "mtime_ns": recorded.get("mtime_ns")}:
+        return True
+    return content_hash(path) == recorded.get("sha256")
+
+
+def _plain(params: dict) -> dict:
+    """
+    Stage parameters as YAML-safe values (paths become strings).
+
+    Args:
+        params (dict): Parameters.
+    Returns:
+        dict: Parameters with Path values as strings.
+    """
+    return {k: str(v) if isinstance(v, Path) else v
+            for k, v in (params or {}).items()}
+
+
+def read_metadata(path: Path) -> dict:
+    """
+    Read a metadata YAML file.
+
+    Args:
+        path (Path): Metadata file.
+    Returns:
+        dict: Metadata, empty when the file does not exist.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return yaml.safe_load(f) or {}
+    except FileNotFoundError:
+        return {}
+
+
+def stage_is_current(metadata_path: Path, inputs: list, outputs: list,
+                     code: list, params: dict = None) -> bool:
+    """
+    Whether a stage can be skipped: its metadata records the same inputs,
+    code and parameters, and its outputs are still as it wrote them.
+
+    Args:
+        metadata_path (Path): The stage's metadata file.
+        inputs (list): Files or directories the stage reads.
+        outputs (list): Files or directories the stage writes.
+        code (list): Source files of the stage.
+        params (dict): Parameters that affect the outputs.
+    Returns:
+        bool: True when nothing the outputs depend on has changed.
+    """
+    lineage = read_metadata(metadata_path).get("lineage")
+    if not lineage or lineage.get("params", {}) != _plain(params):
+        return False
+    for group, paths in (("inputs", inputs), ("outputs", outputs),
+                         ("code", code)):
+        recorded = lineage.get(group, {})
+        if set(recorded) != {_key(p) for p in paths}:
+            return False
+        if not all(unchanged(p, recorded[_key(p)]) for p in paths):
+            return False
+    return True
+
 
 class MetadataBuilder:
     """
@@ -148,6 +316,47 @@ class MetadataBuilder:
         """
         self.metadata["record_count"] = int(df.shape[0])
 
+    def add_partitions(self, partitions):
+        """
+        Add per-partition record counts and file sizes, and set the total
+        record_count and file_size of a partitioned dataset.
+
+        Args:
+            partitions (list of dict): One dict per partition with at
+            least 'path', 'records' and 'file_size' (bytes).
+        """
+        self.metadata["partitions"] = [
+            {**p, "file_size": f"{p['file_size'] / (1024 * 1024):.2f} MB"}
+            for p in partitions
+        ]
+        self.metadata["record_count"] = int(
+            sum(p["records"] for p in partitions))
+        size_mb = sum(p["file_size"] for p in partitions) / (1024 * 1024)
+        self.metadata["file_size"] = f"{size_mb:.2f} MB"
+
+    def add_lineage(self, inputs, outputs, code, params=None,
+                    seconds=None):
+        """
+        Record content hashes of the stage's inputs, outputs and code,
+        its parameters and its duration, so an unchanged stage can be
+        skipped (see stage_is_current).
+
+        Args:
+            inputs (list): Files or directories read.
+            outputs (list): Files or directories written.
+            code (list): Source files of the stage.
+            params (dict, optional): Parameters that affect the outputs.
+            seconds (float, optional): Build time.
+        """
+        self.metadata["lineage"] = {
+            group: {_key(p): fingerprint(p) for p in paths}
+            for group, paths in (("inputs", inputs), ("outputs", outputs),
+                                 ("code", code))
+        }
+        self.metadata["lineage"]["params"] = _plain(params)
+        if seconds is not None:
+            self.metadata["lineage"]["seconds"] = round(seconds, 2)
+
     def write(self, output_path=None):
         """
         Write metadata YAML file to disk.
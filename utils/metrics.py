@@ -0,0 +1,341 @@
+"""
+Prometheus metrics for the dashboard process.
+Metrics are fed by the profiling spans (cache hits, model loads, forecast
+latency, page renders) and served in the Prometheus text exposition format
+by a small HTTP server running on a daemon thread.
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import logging
+import os
+import threading
+import time
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from utils.figure_cache import CACHE_DIR
+from utils.profiling import add_listener
+
+logger = logging.getLogger(__name__)
+
+PORT_ENV = "DASHBOARD_METRICS_PORT"  # Port to serve /metrics on
+HOST_ENV = "DASHBOARD_METRICS_HOST"  # Bind address, local by default
+ACTIVE_WINDOW = 300  # Seconds since the last run for a session to count
+
+# Histogram bucket upper bounds in seconds
+LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Span names whose latency is reported as forecast latency
+FORECAST_SPANS = {"forecast_all_stations"}
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histogram:
+    """
+    Cumulative histogram with fixed bucket bounds.
+    """
+
+    def __init__(self, buckets: tuple = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        """
+        Record one observation.
+
+        Args:
+            value (float): Observed value in seconds.
+        """
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.total += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """
+    Thread-safe store of the dashboard metrics.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.cache_requests = {}  # (function, kind, result) -> count
+        self.model_load_seconds = {}  # model -> seconds of the last load
+        self.forecast_latency = {}  # cache result -> Histogram
+        self.page_render = {}  # page -> Histogram
+        self.sessions = {}  # session id -> time of the last run
+
+    def record_span(self, record: dict) -> None:
+        """
+        Update the metrics from a finished profiling span.
+
+        Args:
+            record (dict): Span record produced by utils.profiling.span.
+        """
+        seconds = record["wall_ms"] / 1000
+        cache = record.get("cache")
+
+        with self.lock:
+            if cache is not None:
+                key = (record["name"], record["kind"], cache)
+                self.cache_requests[key] = self.cache_requests.get(key, 0) + 1
+
+            if record["kind"] == "model" and cache == "miss":
+                self.model_load_seconds[record["name"]] = seconds
+
+            if record["name"] in FORECAST_SPANS:
+                self.forecast_latency.setdefault(cache or "none",
+                                                 Histogram()).observe(seconds)
+
+            if record["kind"] == "page":
+                self.page_render.setdefault(record["name"],
+                                            Histogram()).observe(seconds)
+
+    def record_session(self, session_id: str) -> None:
+        """
+        Mark a session as active now.
+
+        Args:
+            session_id (str): Streamlit session id.
+        """
+        now = time.time()
+        with self.lock:
+            self.sessions[session_id] = now
+
+            # Forget sessions that have been idle for long
+            for sid, seen in list(self.sessions.items()):
+                if now - seen > 10 * ACTIVE_WINDOW:
+                    del self.sessions[sid]
+
+    def active_sessions(self) -> int:
+        """
+        Number of sessions that ran a script recently.
+
+        Returns:
+            int: Active session count.
+        """
+        now = time.time()
+        with self.lock:
+            return sum(now - seen <= ACTIVE_WINDOW
+                       for seen in self.sessions.values())
+
+
+REGISTRY = MetricsRegistry()
+add_listener(REGISTRY.record_span)
+
+_server = None
+_server_started = False
+_server_lock = threading.Lock()
+
+
+def track_session() -> None:
+    """
+    Mark the session of the current script run as active.
+    """
+    ctx = get_script_run_ctx()
+    if ctx is not None:
+        REGISTRY.record_session(ctx.session_id)
+
+
+def process_rss_bytes() -> int | None:
+    """
+    Resident set size of this process, read from /proc.
+
+    Returns:
+        int | None: RSS in bytes, or None where /proc is unavailable.
+    """
+    try:
+        with open("/proc/self/status", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def figure_cache_size() -> tuple[int, int]:
+    """
+    Number of entries and total bytes of the on-disk figure cache.
+
+    Returns:
+        tuple[int, int]: (entries, bytes)
+    """
+    entries, size = 0, 0
+    for path in CACHE_DIR.glob("*.json"):
+        try:
+            size += path.stat().st_size
+        except FileNotFoundError:
+            continue  # evicted meanwhile
+        entries += 1
+    return entries, size
+
+
+def _labels(**labels) -> str:
+    """
+    Format a Prometheus label set.
+
+    Args:
+        **labels: Label names and values.
+    Returns:
+        str: Label set such as '{page="Home"}'.
+    """
+    def escape(value):
+        return str(value).replace("\\", "\\\\").replace('"', '\\"')\
+            .replace("\n", "\\n")
+
+    return "{" + ",".join(f'{k}="{escape(v)}"'
+                          for k, v in labels.items()) + "}"
+
+
+def _histogram_lines(name: str, histograms: dict, label: str) -> list[str]:
+    """
+    Exposition lines for a family of labelled histograms.
+
+    Args:
+        name (str): Metric name.
+        histograms (dict): Label value -> Histogram.
+        label (str): Label name.
+    Returns:
+        list[str]: Sample lines.
+    """
+    lines = []
+    for value, hist in sorted(histograms.items()):
+        for bound, count in zip(hist.buckets, hist.counts):
+            lines.append(f"{name}_bucket"
+                         f"{_labels(**{label: value, 'le': bound})} {count}")
+        lines.append(f"{name}_bucket{_labels(**{label: value, 'le': '+Inf'})}"
+                     f" {hist.count}")
+        lines.append(f"{name}_sum{_labels(**{label: value})} {hist.total}")
+        lines.append(f"{name}_count{_labels(**{label: value})} {hist.count}")
+    return lines
+
+
+def render_metrics(registry: MetricsRegistry = REGISTRY) -> str:
+    """
+    Render every metric in the Prometheus text exposition format.
+
+    Args:
+        registry (MetricsRegistry): Metrics to render.
+    Returns:
+        str: Exposition text.
+    """
+    active = registry.active_sessions()
+    entries, size = figure_cache_size()
+    rss = process_rss_bytes()
+
+    with registry.lock:
+        lines = [
+            "# HELP dashboard_cache_requests_total Cached function calls "
+            "by result.",
+            "# TYPE dashboard_cache_requests_total counter",
+        ]
+        for (func, kind, result), count in \
+                sorted(registry.cache_requests.items()):
+            lines.append("dashboard_cache_requests_total"
+                         f"{_labels(function=func, kind=kind, result=result)}"
+                         f" {count}")
+
+        lines += [
+            "# HELP dashboard_model_load_seconds Duration of the last load "
+            "of each model.",
+            "# TYPE dashboard_model_load_seconds gauge",
+        ]
+        for model, seconds in sorted(registry.model_load_seconds.items()):
+            lines.append(f"dashboard_model_load_seconds{_labels(model=model)}"
+                         f" {seconds}")
+
+        lines += [
+            "# HELP dashboard_forecast_latency_seconds Latency of forecasts "
+            "for all stations.",
+            "# TYPE dashboard_forecast_latency_seconds histogram",
+        ]
+        lines += _histogram_lines("dashboard_forecast_latency_seconds",
+                                  registry.forecast_latency, "cache")
+
+        lines += [
+            "# HELP dashboard_page_render_seconds Full script run duration "
+            "per page.",
+            "# TYPE dashboard_page_render_seconds histogram",
+        ]
+        lines += _histogram_lines("dashboard_page_render_seconds",
+                                  registry.page_render, "page")
+
+    lines += [
+        "# HELP dashboard_figure_cache_entries Figures in the disk cache.",
+        "# TYPE dashboard_figure_cache_entries gauge",
+        f"dashboard_figure_cache_entries {entries}",
+        "# HELP dashboard_figure_cache_bytes Size of the figure disk cache.",
+        "# TYPE dashboard_figure_cache_bytes gauge",
+        f"dashboard_figure_cache_bytes {size}",
+        "# HELP dashboard_active_sessions Sessions with a script run in the "
+        f"last {ACTIVE_WINDOW} seconds.",
+        "# TYPE dashboard_active_sessions gauge",
+        f"dashboard_active_sessions {active}",
+    ]
+    if rss is not None:
+        lines += [
+            "# HELP process_resident_memory_bytes Resident memory size.",
+            "# TYPE process_resident_memory_bytes gauge",
+            f"process_resident_memory_bytes {rss}",
+        ]
+    return "\n".join(lines) + "\n"
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """
+    Serve the metrics on GET /metrics.
+    """
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_metrics().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # keep scrapes out of the Streamlit log
+
+
+def start_metrics_server(port: int = None,
+                         host: str = None) -> ThreadingHTTPServer | None:
+    """
+    Start the metrics server once per process on a daemon thread.
+    Does nothing when no port is given and DASHBOARD_METRICS_PORT is unset.
+
+    Args:
+        port (int): Port to listen on, defaults to DASHBOARD_METRICS_PORT.
+        host (str): Bind address, defaults to DASHBOARD_METRICS_HOST or
+            127.0.0.1.
+    Returns:
+        ThreadingHTTPServer | None: The running server, if any.
+    """
+    global _server, _server_started
+    with _server_lock:
+        if _server_started:
+            return _server
+
+        port = port or os.environ.get(PORT_ENV)
+        if not port:
+            return None
+        _server_started = True  # start (or fail) only once per process
+        host = host or os.environ.get(HOST_ENV, "127.0.0.1")
+
+        try:
+            _server = ThreadingHTTPServer((host, int(port)), MetricsHandler)
+        except OSError as exc:
+            logger.warning("Metrics server not started on %s:%s: %s",
+                           host, port, exc)
+            return None
+        _server.daemon_threads = True
+        threading.Thread(target=_server.serve_forever,
+                         name="metrics-server", daemon=True).start()
+        logger.info("Serving metrics on http://%s:%s/metrics", host, port)
+        return _server
@@ -0,0 +1,211 @@
+"""
+Utility functions to evaluate stored model predictions.
+MAE, RMSE, R² and bias are computed for every slice of the test set
+(station, season, hour of day or PM2.5 band) in one grouped pass over
+weighted sums. Bootstrap replicates are rows of a multinomial weight
+matrix, so the point estimate (all weights 1) and every replicate are
+computed by the same pass, and the models of a page share their
+replicates (paired comparison).
+"""
+
+import numpy as np
+import pandas as pd
+from utils.cleaning import SEASONS
+from utils.prediction_store import PredictionStore
+
+# PM2.5 bands of China's air quality index (µg/m³)
+PM25_BANDS = [0, 35, 75, 115, 150, 250, np.inf]
+BAND_LABELS = ["Good (0-35)", "Moderate (35-75)", "Light (75-115)",
+               "Medium (115-150)", "Heavy (150-250)", "Severe (250+)"]
+
+METRICS = ["MAE", "RMSE", "R2", "Bias"]
+N_BOOT = 200  # Bootstrap replicates
+CONFIDENCE = 0.95
+BATCH = 50  # Replicates per weight matrix batch
+
+
+def available_slices(store: PredictionStore) -> list:
+    """
+    Slices a store can be evaluated by: station, season and hour need
+    the stored row index.
+
+    Args:
+        store (PredictionStore): Stored predictions.
+    Returns:
+        list: Slice names.
+    """
+    indexed = ["station", "season", "hour"] if store.station is not None \
+        else []
+    return ["all"] + indexed + ["band"]
+
+
+def slice_codes(store: PredictionStore, by: str,
+                truth: str = "y_true") -> tuple[np.ndarray, list]:
+    """
+    Slice of every row as an integer code.
+
+    Args:
+        store (PredictionStore): Stored predictions.
+        by (str): 'all', 'station', 'season', 'hour' or 'band'.
+        truth (str): Array of actual values (PM2.5 bands).
+    Returns:
+        tuple: Codes (rows,) and the label of each code.
+    """
+    rows = len(store[truth])
+    if by == "all":
+        return np.zeros(rows, dtype="int8"), ["All"]
+    if by == "band":
+        codes = np.searchsorted(PM25_BANDS, store[truth], side="right") - 1
+        return np.clip(codes, 0, len(BAND_LABELS) - 1), BAND_LABELS
+    if store.datetime is None:
+        raise ValueError(f"Slicing by {by} needs the stored row index")
+    if by == "station":
+        return np.asarray(store.station), store.stations
+    hours = store.datetime.astype("datetime64[h]").astype("int64")
+    if by == "hour":
+        return hours % 24, [f"{h:02d}:00" for h in range(24)]
+    if by == "season":
+        months = store.datetime.astype("datetime64[M]").astype("int64") % 12
+        labels = list(dict.fromkeys(SEASONS.values()))
+        lookup = np.array([labels.index(SEASONS[m + 1])
+                           for m in range(12)])
+        return lookup[months], labels
+    raise ValueError(f"Unknown slice: {by}")
+
+
+def bootstrap_weights(rows: int, n_boot: int = N_BOOT, seed: int = 0,
+                      batch: int = BATCH):
+    """
+    Multinomial resampling counts in batches: row b of a batch says how
+    often each row is drawn in that bootstrap replicate.
+
+    Args:
+        rows (int): Rows resampled.
+        n_boot (int): Replicates.
+        seed (int): Random seed, fixed so reruns and models agree.
+        batch (int): Replicates per yielded matrix, bounding memory.
+    Yields:
+        np.ndarray: (batch, rows) float32 counts.
+    """
+    rng = np.random.default_rng(seed)
+    for first in range(0, n_boot, batch):
+        size = min(batch, n_boot - first)
+        yield rng.multinomial(rows, np.full(rows, 1 / rows),
+                              size=size).astype("float32")
+
+
+def _grouped_sums(weights: np.ndarray, values: np.ndarray,
+                  order: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    """
+    Weighted sums of values per group for every weight row.
+
+    Args:
+        weights (np.ndarray): (replicates, rows) weights.
+        values (np.ndarray): (stats, rows) per-row values.
+        order (np.ndarray): Row order grouping the codes.
+        starts (np.ndarray): First sorted row of each group.
+    Returns:
+        np.ndarray: (stats, replicates, groups) sums.
+    """
+    weighted = weights[None, :, order] * values[:, None, order]
+    return np.add.reduceat(weighted, starts, axis=2)
+
+
+def evaluate(y_true: np.ndarray, y_pred: np.ndarray,
+             codes: np.ndarray = None, labels: list = None,
+             n_boot: int = N_BOOT, confidence: float = CONFIDENCE,
+             seed: int = 0) -> pd.DataFrame:
+    """
+    MAE, RMSE, R² and bias (mean of predicted - actual) per slice, with
+    percentile bootstrap intervals.
+
+    Args:
+        y_true (np.ndarray): Actual values.
+        y_pred (np.ndarray): Predicted values, same rows.
+        codes (np.ndarray): Slice code of each row, None for one slice.
+        labels (list): Label of each code.
+        n_boot (int): Bootstrap replicates, 0 for none.
+        confidence (float): Interval coverage.
+        seed (int): Bootstrap seed.
+    Returns:
+        pd.DataFrame: One row per non-empty slice: rows, each metric and
+        <metric>_low / <metric>_high.
+    """
+    y_true = np.asarray(y_true, dtype="float64")
+    error = np.asarray(y_pred, dtype="float64") - y_true
+    if len(error) != len(y_true):
+        raise ValueError("Predictions and actual values differ in length")
+    codes = np.zeros(len(y_true), int) if codes is None else codes
+    labels = labels or ["All"]
+
+    order = np.argsort(codes, kind="stable")
+    present, starts = np.unique(codes[order], return_index=True)
+    values = np.stack([np.ones_like(error), error, np.abs(error),
+                       error ** 2, y_true, y_true ** 2])
+
+    # Row 0 is the original sample, the rest are bootstrap replicates
+    sums = [_grouped_sums(np.ones((1, len(error))), values, order, starts)]
+    sums += [_grouped_sums(weights, values, order, starts)
+             for weights in bootstrap_weights(len(error), n_boot, seed)]
+    n, e, abs_e, sq_e, y, sq_y = np.concatenate(sums, axis=1)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        metrics = {"MAE": abs_e / n,
+                   "RMSE": np.sqrt(sq_e / n),
+                   "R2": 1 - sq_e / (sq_y - y ** 2 / n),
+                   "Bias": e / n}
+
+    alpha = (1 - confidence) / 2
+    out = pd.DataFrame({"rows": n[0].astype(int)},
+                       index=pd.Index([labels[c] for c in present],
+                                      name="slice"))
+    for name, value in metrics.items():
+        out[name] = value[0]
+        if n_boot:
+            low, high = np.nanquantile(value[1:], [alpha, 1 - alpha],
+                                       axis=0)
+            out[f"{name}_low"], out[f"{name}_high"] = low, high
+    return out
+
+
+def slice_metrics(store: PredictionStore, prediction: str, by: str = "all",
+                  truth: str = "y_true", n_boot: int = N_BOOT,
+                  seed: int = 0) -> pd.DataFrame:
+    """
+    Metrics of a stored prediction array per slice.
+
+    Args:
+        store (PredictionStore): Stored predictions.
+        prediction (str): Array of predicted values.
+        by (str): Slice, see available_slices.
+        truth (str): Array of actual values.
+        n_boot (int): Bootstrap replicates.
+        seed (int): Bootstrap seed.
+    Returns:
+        pd.DataFrame: See evaluate.
+    """
+    codes, labels = slice_codes(store, by, truth)
+    return evaluate(store[truth], store[prediction], codes, labels,
+                    n_boot, seed=seed)
+
+
+def format_metrics(metrics: pd.DataFrame) -> pd.DataFrame:
+    """
+    Metrics per slice as display text, 'value (low–high)' when intervals
+    were computed.
+
+    Args:
+        metrics (pd.DataFrame): Output of evaluate or slice_metrics.
+    Returns:
+        pd.DataFrame: Rows and one text column per metric.
+    """
+    out = metrics[["rows"]].copy()
+    for name in METRICS:
+        digits = 3 if name == "R2" else 2
+        text = metrics[name].map(f"{{:.{digits}f}}".format)
+        if f"{name}_low" in metrics:
+            text += (" (" + metrics[f"{name}_low"].map(
+                f"{{:.{digits}f}}".format) + "–" + metrics[
+                f"{name}_high"].map(f"{{:.{digits}f}}".format) + ")")
+        out[name] = text
+    return out
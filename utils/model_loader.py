@@ -6,6 +6,7 @@ from pathlib import Path
 import joblib
 import streamlit as st
 import json
+from utils.profiling import profiled
 
 # Define the root directory and model path
 ROOT = Path(__file__).parent.parent
@@ -13,42 +14,49 @@ MODEL_PATH = ROOT / "models"
 MODEL_OUTPUT = ROOT / "model_outputs"
 
 
-@st.cache_resource
+@profiled(kind="model", cache=st.cache_resource)
 def load_best_model():
     """Load the XGBoost regression model used in the analysis."""
     with open(MODEL_PATH / "regression" / "best_regression_model.joblib", "rb") as f:
         return joblib.load(f)
 
 
-@st.cache_resource
+@profiled(kind="model", cache=st.cache_resource)
 def load_cluster_model():
     """Load the clustering model used in the analysis."""
     with open(MODEL_PATH / "kmeans_cluster_model.pkl", "rb") as f:
         return joblib.load(f)
 
 
-@st.cache_resource
+@profiled(kind="model", cache=st.cache_resource)
 def load_scaler():
     """If you used StandardScaler or MinMaxScaler in clustering."""
     with open(MODEL_PATH / "scaler_cluster.joblib", "rb") as f:
         return joblib.load(f)
 
 
-@st.cache_resource
+@profiled(kind="model", cache=st.cache_resource)
+def load_pca_model():
+    """Load the incremental PCA used to project clustering observations."""
+    with open(MODEL_PATH / "clustering" / "pca_model.joblib", "rb") as f:
+        return joblib.load(f)
+
+
+@profiled(kind="model", cache=st.cache_resource)
 def load_baseline_model():
     """Load a baseline model for comparison."""
     with open(MODEL_PATH / "rf_baseline_model.joblib", "rb") as f:
         return joblib.load(f)
 
 
-@st.cache_resource
+@profiled(kind="model", cache=st.cache_resource)
 def load_lag_model():
     """Load a lag-based model for time series forecasting."""
     with open(MODEL_PATH / "rf_lag_model.joblib", "rb") as f:
         return joblib.load(f)
 
 
-@st.cache_resource
+@profiled(kind="model", cache=st.cache_resource)
 def load_metadata():
     """Load regression metadata."""
     metadata_path = MODEL_OUTPUT / "regression" / "regression_metadata.json"
@@ -56,7 +64,7 @@ def load_metadata():
         return json.load(f)
 
 
-@st.cache_resource
+@profiled(kind="model", cache=st.cache_resource)
 def load_encoders():
     """Load categorical encoders used in the models."""
     ENCODERS_PATH = MODEL_OUTPUT / "regression"
@@ -2,12 +2,15 @@
 Utility functions for creating modelling-related charts using Plotly.
 """
 
+import numpy as np
 import plotly.express as px
-import plotly.figure_factory as ff
+import plotly.graph_objects as go
 import pandas as pd
 from utils.charts import MARGINS
+from utils.figure_cache import cached_figure
 
 
+@cached_figure
 def bar_chart(df, metric: str = "RMSE") -> px.bar:
     """
     Creates a horizontal bar chart ranking models based on a specified metric.
@@ -31,53 +34,45 @@ def bar_chart(df, metric: str = "RMSE") -> px.bar:
     return fig
 
 
-def prediction_vs_actual_chart(actual: list, predicted: list) -> px.scatter:
+@cached_figure
+def prediction_vs_actual_chart(bins: dict) -> go.Figure:
     """
-    Creates a scatter plot comparing predicted values against actual values.
+    Creates a density heatmap of predicted against actual values over the
+    whole test set, with the y = x line and the mean prediction per bin.
     Args:
-        actual (array-like): Actual target values.
-        predicted (array-like): Predicted target values from the model.
+        bins (dict): Binned predictions from
+            utils.residual_diagnostics.residual_bins(kind="prediction").
     Returns:
-        px.scatter: A Plotly scatter plot figure.
+        go.Figure: A Plotly heatmap figure.
     """
-    fig = px.scatter(
-        x=actual[:300],
-        y=predicted[:300],
-        title="Prediction vs Actual",
-        labels={"Actual": "Actual Values", "Predicted": "Predicted Values"},
-        trendline="ols",
-    )  # define parameters of the scatter plot
-
-    # Customize trendline appearance
-    for trace in fig.data:
-        if trace.mode == "lines":
-            trace.line.color = "red"
-            trace.line.width = 3
-
-    fig.update_layout(margin=MARGINS,
-                      height=400)  # set layout properties
-    return fig  # return the figure
+    fig = _binned_chart(bins, "Prediction vs Actual")
+    low, high = bins["x_edges"][0], bins["x_edges"][-1]
+    fig.add_shape(type="line", x0=low, y0=low, x1=high, y1=high,
+                  line={"color": "grey", "dash": "dash"})
+    return fig
 
 
-def residuals_distribution_chart(residuals: list) -> px.histogram:
+@cached_figure
+def residuals_distribution_chart(hist: dict) -> go.Figure:
     """
-    Creates a distribution plot of residuals.
+    Creates a distribution plot of residuals: a density histogram with a
+    KDE curve, drawn from precomputed bins.
     Args:
-        residuals (array-like): Residuals from the model predictions.
+        hist (dict): Binned residuals from
+            utils.residual_diagnostics.residual_histogram().
     Returns:
-        px.histogram: A Plotly histogram figure.
+        go.Figure: A Plotly histogram figure.
     """
-    binsize = residuals.std() / 5
-    fig = ff.create_distplot(
-        [residuals],
-        group_labels=["Residuals"],
-        bin_size=binsize,
-        show_hist=True,
-        show_rug=False
-    )
+    fig = go.Figure()
+    fig.add_trace(go.Bar(x=hist["centers"], y=hist["density"],
+                         width=hist["width"], name="Residuals",
+                         opacity=0.7))
+    fig.add_trace(go.Scatter(x=hist["centers"], y=hist["kde"],
+                             mode="lines", name="KDE"))
     fig.update_layout(
         title="Residuals Distribution",
         xaxis_title="Residuals",
+        bargap=0,
         margin=MARGINS,
         height=400,
         showlegend=False
@@ -85,31 +80,57 @@ def residuals_distribution_chart(residuals: list) -> px.histogram:
     return fig
 
 
-def residuals_vs_predicted_chart(residuals: list,
-                                 predicted: list) -> px.scatter:
+@cached_figure
+def residuals_vs_predicted_chart(bins: dict) -> go.Figure:
     """
-    Creates a scatter plot of residuals versus predicted values.
+    Creates a density heatmap of residuals against predicted values over
+    the whole test set, with the zero line and the mean residual per bin.
     Args:
-        residuals (array-like): Residuals from the model predictions.
-        predicted (array-like): Predicted target values from the model.
+        bins (dict): Binned residuals from
+            utils.residual_diagnostics.residual_bins().
     Returns:
-        px.scatter: A Plotly scatter plot figure.
+        go.Figure: A Plotly heatmap figure.
     """
-    fig = px.scatter(
-        x=predicted,
-        y=residuals,
-        title="Residuals vs Predicted",
-        labels={"x": "Predicted Values", "y": "Residuals"},
-        trendline="ols",
-    )
-    for trace in fig.data:
-        if trace.mode == "lines":
-            trace.line.color = "red"
-            trace.line.width = 3
-    fig.update_layout(margin=MARGINS, height=400)
+    fig = _binned_chart(bins, "Residuals vs Predicted")
+    fig.add_hline(y=0, line={"color": "grey", "dash": "dash"})
+    return fig
+
+
+def _binned_chart(bins: dict, title: str) -> go.Figure:
+    """
+    Heatmap of 2D histogram counts on a log colour scale, with the mean
+    of y per x bin drawn in place of a fitted trendline.
+    Args:
+        bins (dict): Output of utils.residual_diagnostics.residual_bins.
+        title (str): Chart title.
+    Returns:
+        go.Figure: A Plotly heatmap figure.
+    """
+    x_centres = (bins["x_edges"][:-1] + bins["x_edges"][1:]) / 2
+    y_centres = (bins["y_edges"][:-1] + bins["y_edges"][1:]) / 2
+    counts = bins["counts"].T  # rows of a heatmap are y bins
+    with np.errstate(divide="ignore"):
+        log_counts = np.where(counts > 0, np.log10(counts), np.nan)
+
+    fig = go.Figure(go.Heatmap(
+        x=x_centres, y=y_centres, z=log_counts, customdata=counts,
+        colorscale="Viridis",
+        colorbar={"title": "Rows", "tickvals": [0, 1, 2, 3, 4],
+                  "ticktext": ["1", "10", "100", "1k", "10k"]},
+        hovertemplate=(f"{bins['x_label']}: %{{x:.1f}}<br>"
+                       f"{bins['y_label']}: %{{y:.1f}}<br>"
+                       "Rows: %{customdata}<extra></extra>")))
+    fig.add_trace(go.Scatter(
+        x=x_centres, y=bins["y_mean"], mode="lines", name="Mean",
+        line={"color": "red", "width": 3}))
+    fig.update_layout(title=f"{title} ({bins['rows']:,} rows)",
+                      xaxis_title=bins["x_label"],
+                      yaxis_title=bins["y_label"],
+                      showlegend=False, margin=MARGINS, height=400)
     return fig
 
 
+@cached_figure
 def feature_importance_chart(feature_imp: pd.DataFrame) -> px.bar:
     """
     Creates a horizontal bar chart of the top 10 feature importances.
@@ -134,6 +155,7 @@ def feature_importance_chart(feature_imp: pd.DataFrame) -> px.bar:
     return fig
 
 
+@cached_figure
 def forecast_line_chart(all_forecasts: pd.DataFrame,
                         horizon: int) -> px.line:
     """
@@ -0,0 +1,180 @@
+"""
+Utility functions for the clustering PCA projection.
+Fits the PCA incrementally over chunks, persists it next to the clustering
+models and stores projected coordinates as a float32 memory-mappable array.
+"""
+
+from pathlib import Path
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.decomposition import IncrementalPCA
+
+# Define the root directory and artefact paths
+ROOT = Path(__file__).parent.parent
+PCA_MODEL_PATH = ROOT / "models" / "clustering" / "pca_model.joblib"
+PCA_COORDS_PATH = ROOT / "model_outputs" / "clustering" / "pca_coords.npy"
+
+PCA_COLUMNS = ["pc1", "pc2", "cluster", "pm25"]  # Column order on disk
+CHUNK_SIZE = 10_000  # Rows per partial fit / transform chunk
+
+
+def fit_incremental_pca(X: np.ndarray,
+                        n_components: int = 2,
+                        chunk_size: int = CHUNK_SIZE) -> IncrementalPCA:
+    """
+    Fit a PCA incrementally over row chunks of a scaled feature matrix.
+
+    Args:
+        X (np.ndarray): Scaled feature matrix (rows x features).
+        n_components (int): Number of principal components to keep.
+        chunk_size (int): Number of rows passed to each partial fit.
+    Returns:
+        IncrementalPCA: Fitted PCA model.
+    """
+    # Every chunk must hold at least n_components rows
+    chunk_size = max(chunk_size, n_components)
+    pca = IncrementalPCA(n_components=n_components)
+
+    start = 0
+    while start < len(X):
+        stop = start + chunk_size
+
+        # Fold a too-short trailing remainder into this chunk
+        if len(X) - stop < n_components:
+            stop = len(X)
+        pca.partial_fit(X[start:stop])
+        start = stop
+
+    return pca
+
+
+def project(pca: IncrementalPCA,
+            X: np.ndarray,
+            chunk_size: int = CHUNK_SIZE) -> np.ndarray:
+    """
+    Project observations onto the fitted components chunk by chunk.
+
+    Args:
+        pca (IncrementalPCA): Fitted PCA model.
+        X (np.ndarray): Scaled feature matrix to project.
+        chunk_size (int): Number of rows transformed at a time.
+    Returns:
+        np.ndarray: float32 array of shape (rows, n_components).
+    """
+    coords = np.empty((len(X), pca.n_components_), dtype="float32")
+    for start in range(0, len(X), chunk_size):
+        stop = start + chunk_size
+        coords[start:stop] = pca.transform(X[start:stop])
+    return coords
+
+
+def project_observations(df: pd.DataFrame,
+                         scaler: object,
+                         pca: IncrementalPCA) -> np.ndarray:
+    """
+    Scale and project new observations on demand.
+
+    Args:
+        df (pd.DataFrame): Observations containing the scaler's features.
+        scaler (object): Fitted scaler used for clustering.
+        pca (IncrementalPCA): Fitted PCA model.
+    Returns:
+        np.ndarray: float32 array of projected coordinates.
+    """
+    features = list(scaler.feature_names_in_)
+    return project(pca, scaler.transform(df[features]))
+
+
+def save_pca_model(pca: IncrementalPCA, path: Path = PCA_MODEL_PATH) -> Path:
+    """
+    Persist the fitted PCA alongside the clustering models.
+
+    Args:
+        pca (IncrementalPCA): Fitted PCA model.
+        path (Path): Output path of the joblib file.
+    Returns:
+        Path: Path the model was written to.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    joblib.dump(pca, path, compress=3)
+    return path
+
+
+def save_pca_coords(coords: np.ndarray,
+                    clusters: np.ndarray,
+                    pm25: np.ndarray,
+                    path: Path = PCA_COORDS_PATH) -> Path:
+    """
+    Store projected coordinates, cluster labels and PM2.5 as one
+    uncompressed float32 array so it can be memory mapped.
+
+    Args:
+        coords (np.ndarray): Projected coordinates (rows x 2).
+        clusters (np.ndarray): Cluster label of each row.
+        pm25 (np.ndarray): PM2.5 value of each row.
+        path (Path): Output path of the .npy file.
+    Returns:
+        Path: Path the array was written to.
+    """
+    table = np.column_stack([
+        np.asarray(coords, dtype="float32")[:, :2],
+        np.asarray(clusters, dtype="float32"),
+        np.asarray(pm25, dtype="float32"),
+    ])  # Stack into (rows, 4) in PCA_COLUMNS order
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.save(path, table)
+    return path
+
+
+def load_pca_array(path: Path = PCA_COORDS_PATH) -> np.ndarray:
+    """
+    Memory map the stored PCA coordinates.
+
+    Args:
+        path (Path): Path of the .npy file.
+    Returns:
+        np.ndarray: Read-only (rows, 4) float32 memory map.
+    """
+    return np.load(path, mmap_mode="r")
+
+
+def pca_frame(table: np.ndarray) -> pd.DataFrame:
+    """
+    Wrap the stored coordinate table in a DataFrame without copying the
+    coordinate columns.
+
+    Args:
+        table (np.ndarray): (rows, 4) array in PCA_COLUMNS order.
+    Returns:
+        pd.DataFrame: DataFrame with 'pc1', 'pc2', 'cluster' and 'pm25'.
+    """
+    df = pd.DataFrame(table, columns=PCA_COLUMNS, copy=False)
+    df["cluster"] = df["cluster"].astype("int8")  # labels back to integers
+    return df
+
+
+def convert_csv_coords(csv_path: Path,
+                       path: Path = PCA_COORDS_PATH) -> Path:
+    """
+    Convert a legacy pca_coords.csv export into the binary format.
+
+    Args:
+        csv_path (Path): Path of the legacy CSV file.
+        path (Path): Output path of the .npy file.
+    Returns:
+        Path: Path the array was written to.
+    """
+    df = pd.read_csv(csv_path)
+    return save_pca_coords(df[["pc1", "pc2"]].to_numpy(),
+                           df["cluster"].to_numpy(),
+                           df["pm25"].to_numpy(),
+                           path)
+
+
+if __name__ == "__main__":
+    legacy = PCA_COORDS_PATH.with_suffix(".csv")
+    print("Converted PCA coordinates to:", convert_csv_coords(legacy))
@@ -0,0 +1,333 @@
+"""
+Build the data products of notebooks 01-12 as a DAG of stages.
+Each stage declares the files and directories it reads and writes; a
+stage depends on every stage writing one of its inputs. Stages whose
+dependencies are done run concurrently on a process pool, so the
+hypothesis figures, clustering and the hyperparameter search proceed in
+parallel once the engineered data exists. A stage is skipped when its
+recorded lineage (content hashes of inputs, outputs and code, see
+utils.metadata_builder) still matches, so a rerun only rebuilds what
+changed. Stage output is written to .cache/pipeline/<stage>.log.
+
+Usage:
+    python -m utils.pipeline                       # everything
+    python -m utils.pipeline --only engineer h1    # just these stages
+    python -m utils.pipeline --from engineer       # a stage and downstream
+    python -m utils.pipeline --list
+"""
+
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+import argparse
+import contextlib
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from utils.metadata_builder import MetadataBuilder, stage_is_current
+
+ROOT = Path(__file__).parent.parent
+NOTEBOOKS = ROOT / "notebooks"
+STATE_PATH = ROOT / ".cache" / "pipeline"
+
+RAW = "data/raw"
+STATION_META = "data/metadata/station_metadata.csv"
+CLEANED = "data/cleaned/beijing_cleaned.csv"
+ENGINEERED = "data/engineered/beijing_engineered.csv"
+
+
+class Stage:
+    """
+    One step of the build: a notebook or a utils module, with the paths
+    it reads and writes (relative to the repository root).
+    """
+
+    def __init__(self, name: str, inputs: list, outputs: list,
+                 notebook: str = None, module: str = None,
+                 args: list = ()):
+        """
+        Args:
+            name (str): Stage name used by --only and --from.
+            inputs (list): Files or directories read.
+            outputs (list): Files or directories written.
+            notebook (str): Notebook file in notebooks/ to execute.
+            module (str): Module run as python -m <module> otherwise.
+            args (list): Command line arguments of the module.
+        """
+        self.name = name
+        self.inputs = [ROOT / p for p in inputs]
+        self.outputs = [ROOT / p for p in outputs]
+        self.notebook = NOTEBOOKS / notebook if notebook else None
+        self.module = module
+        self.args = list(args)
+
+    def code(self) -> list[Path]:
+        """
+        Source files of the stage: the notebook or module, plus the utils
+        modules it imports.
+
+        Returns:
+            list[Path]: Existing source files.
+        """
+        source = (self.notebook if self.notebook is not None
+                  else ROOT / (self.module.replace(".", "/") + ".py"))
+        modules = sorted(set(re.findall(r"utils\.(\w+)",
+                                        source.read_text("utf-8"))))
+        return [source] + [path for path in
+                           (ROOT / "utils" / f"{m}.py" for m in modules)
+                           if path.exists() and path != source]
+
+    def params(self) -> dict:
+        """
+        Parameters recorded in the lineage.
+
+        Returns:
+            dict: Module arguments, empty for notebooks.
+        """
+        return {"args": self.args} if self.args else {}
+
+
+STAGES = [
+    Stage("ingest", [RAW], ["data/combined/beijing_combined"],
+          module="utils.ingest"),
+    Stage("clean", [RAW, STATION_META], [CLEANED], module="utils.cleaning"),
+    Stage("eda", [CLEANED], ["figures/eda"],
+          notebook="03_initial_eda.ipynb"),
+    Stage("engineer", [CLEANED], [ENGINEERED],
+          notebook="04_feature_engineering.ipynb"),
+    Stage("engineered-stats", [ENGINEERED],
+          ["data/engineered/_beijing_engineered_stats.yml"],
+          module="utils.column_stats", args=[ENGINEERED]),
+    Stage("star", [ENGINEERED], ["data/engineered/star"],
+          module="utils.star_schema"),
+    Stage("pyramid", [ENGINEERED], ["data/pyramid"],
+          module="utils.time_pyramid"),
+    Stage("h1", [ENGINEERED], ["figures/h1"],
+          notebook="05_h1_pm25_season.ipynb"),
+    Stage("h3", [ENGINEERED], ["figures/h3"],
+          notebook="07_h3_pm25_weather.ipynb"),
+    Stage("h4", [CLEANED], ["figures/h4"],
+          notebook="08_h4_pm25_temporal.ipynb"),
+    Stage("h5", [ENGINEERED],
+          ["models/h5", "model_outputs/h5", "figures/h5"],
+          notebook="09_h5_model_comparison.ipynb"),
+    Stage("clustering", [ENGINEERED],
+          ["models/clustering", "model_outputs/clustering",
+           "figures/clustering"],
+          notebook="10_clustering.ipynb"),
+    Stage("regression", [ENGINEERED],
+          ["models/regression", "model_outputs/regression",
+           "figures/modelling"],
+          notebook="11_regression_hyperparameters.ipynb"),
+    Stage("forecasting",
+          [ENGINEERED, "models/regression", "model_outputs/regression"],
+          ["figures/forecasting"],
+          notebook="12_forecasting.ipynb"),
+]
+
+
+def _overlaps(a: Path, b: Path) -> bool:
+    """Whether two paths are the same or one contains the other."""
+    return a == b or a in b.parents or b in a.parents
+
+
+def dependencies(stages: list[Stage]) -> dict:
+    """
+    Upstream stages of each stage: those writing one of its inputs.
+
+    Args:
+        stages (list[Stage]): Stages of the build.
+    Returns:
+        dict: Stage name -> set of upstream stage names.
+    """
+    return {stage.name: {other.name for other in stages
+                         if other is not stage
+                         and any(_overlaps(i, o) for i in stage.inputs
+                                 for o in other.outputs)}
+            for stage in stages}
+
+
+def downstream(stages: list[Stage], names: list) -> set:
+    """
+    Names of the given stages and every stage depending on them.
+
+    Args:
+        stages (list[Stage]): Stages of the build.
+        names (list): Starting stage names.
+    Returns:
+        set: Stage names.
+    """
+    upstream, selected = dependencies(stages), set(names)
+    grown = True
+    while grown:
+        added = {name for name, deps in upstream.items()
+                 if deps & selected} - selected
+        selected |= added
+        grown = bool(added)
+    return selected
+
+
+def run_notebook(path: Path) -> None:
+    """
+    Execute the code cells of a notebook in one namespace, from the
+    notebooks folder (the notebooks resolve the project root from it).
+
+    Args:
+        path (Path): Notebook file.
+    """
+    os.environ.setdefault("MPLBACKEND", "Agg")
+    cells = json.loads(Path(path).read_text("utf-8"))["cells"]
+    namespace = {"__name__": "__main__", "display": print}
+    cwd = os.getcwd()
+    os.chdir(Path(path).parent)
+    try:
+        for index, cell in enumerate(cells):
+            if cell["cell_type"] != "code":
+                continue
+            source = "".join(cell["source"])
+            exec(compile(source, f"{Path(path).name}[{index}]", "exec"),
+                 namespace)
+    finally:
+        os.chdir(cwd)
+        if "matplotlib.pyplot" in sys.modules:
+            sys.modules["matplotlib.pyplot"].close("all")
+
+
+def run_stage(stage: Stage, force: bool = False) -> tuple[str, float]:
+    """
+    Run a stage unless its lineage is current, then record its lineage.
+    Runs in a pool worker; output goes to the stage's log file.
+
+    Args:
+        stage (Stage): Stage to run.
+        force (bool): Run even if nothing changed.
+    Returns:
+        tuple: ('ran' or 'current', seconds).
+    """
+    state = STATE_PATH / f"{stage.name}.yml"
+    code, params = stage.code(), stage.params()
+    if not force and stage_is_current(state, stage.inputs, stage.outputs,
+                                      code, params):
+        return "current", 0.0
+
+    STATE_PATH.mkdir(parents=True, exist_ok=True)
+    with open(STATE_PATH / f"{stage.name}.log", "w",
+              encoding="utf-8") as log, contextlib.redirect_stdout(log):
+        start = time.perf_counter()
+        if stage.notebook is not None:
+            run_notebook(stage.notebook)
+        else:
+            command = [sys.executable, "-m", stage.module, *stage.args]
+            if force and stage.module in ("utils.ingest", "utils.cleaning"):
+                command.append("--force")
+            subprocess.run(command, cwd=ROOT, stdout=log,
+                           stderr=subprocess.STDOUT, check=True)
+        seconds = time.perf_counter() - start
+
+        builder = MetadataBuilder(state, stage.name,
+                                  f"Lineage of pipeline stage {stage.name}")
+        builder.add_lineage(stage.inputs, stage.outputs, code, params,
+                            seconds)
+        builder.write(state)
+    return "ran", seconds
+
+
+def run(stages: list[Stage], selected: set, workers: int = None,
+        force: bool = False) -> dict:
+    """
+    Run the selected stages in dependency order, each as soon as the
+    selected stages it depends on have finished. Stages downstream of a
+    failure are not run.
+
+    Args:
+        stages (list[Stage]): Stages of the build.
+        selected (set): Names of the stages to run; others are taken as
+            built.
+        workers (int): Pool size, defaults to the CPU count.
+        force (bool): Run stages even if their lineage is current.
+    Returns:
+        dict: Stage name -> 'ran', 'current', 'failed' or 'blocked'.
+    """
+    by_name = {stage.name: stage for stage in stages}
+    waiting = {name: deps & selected
+               for name, deps in dependencies(stages).items()
+               if name in selected}
+    status, running = {}, {}
+
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        while waiting or running:
+            for name in [n for n, deps in waiting.items() if not deps]:
+                del waiting[name]
+                running[pool.submit(run_stage, by_name[name], force)] = name
+                print(f"[{name}] started")
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    status[name], seconds = future.result()
+                    print(f"[{name}] {status[name]}"
+                          + (f" in {seconds:.1f} s"
+                             if status[name] == "ran" else ""))
+                except Exception as error:
+                    status[name] = "failed"
+                    print(f"[{name}] failed: {error} "
+                          f"(see {STATE_PATH / name}.log)")
+                    for blocked in downstream(stages, [name]) - {name}:
+                        if waiting.pop(blocked, None) is not None:
+                            status[blocked] = "blocked"
+                            print(f"[{blocked}] blocked by {name}")
+                for deps in waiting.values():
+                    deps.discard(name)
+    return status
+
+
+def parse_args(argv: list = None) -> argparse.Namespace:
+    """
+    Parse command line arguments.
+
+    Args:
+        argv (list): Arguments, defaults to sys.argv.
+    Returns:
+        argparse.Namespace: Parsed arguments.
+    """
+    names = [stage.name for stage in STAGES]
+    parser = argparse.ArgumentParser(
+        prog="python -m utils.pipeline",
+        description="Build data/, models/, model_outputs/ and figures/.")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--only", nargs="+", choices=names, metavar="STAGE",
+                        help="run only these stages")
+    target.add_argument("--from", dest="start", nargs="+", choices=names,
+                        metavar="STAGE",
+                        help="run these stages and everything downstream")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--force", action="store_true",
+                        help="rerun stages even if nothing changed")
+    parser.add_argument("--list", action="store_true",
+                        help="list the stages and their dependencies")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.list:
+        for name, deps in dependencies(STAGES).items():
+            print(f"{name:18} <- {', '.join(sorted(deps)) or '-'}")
+        raise SystemExit(0)
+
+    if args.only:
+        selected = set(args.only)
+    elif args.start:
+        selected = downstream(STAGES, args.start)
+    else:
+        selected = {stage.name for stage in STAGES}
+
+    start = time.perf_counter()
+    status = run(STAGES, selected, args.workers, args.force)
+    counts = {s: list(status.values()).count(s) for s in set(status.values())}
+    print(f"Pipeline finished in {time.perf_counter() - start:.1f} s:",
+          ", ".join(f"{n} {s}" for s, n in sorted(counts.items())))
+    raise SystemExit(1 if {"failed", "blocked"} & set(counts) else 0)
@@ -0,0 +1,254 @@
+"""
+Utility functions for stored model predictions.
+Each prediction array is an uncompressed .npy file in
+model_outputs/<model>/predictions/, memory mapped on load, so reading
+y_true neither decompresses nor copies it. A row index of station and
+datetime is stored alongside, so predictions can be filtered by station
+or time.
+"""
+
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import yaml
+
+# Define the root directory and artefact paths
+ROOT = Path(__file__).parent.parent
+MODEL_OUTPUT = ROOT / "model_outputs"
+
+INDEX_FILE = "_index.yml"  # Station names, row count and array lengths
+STATION_FILE = "_station.npy"  # int8 station code of each row
+DATETIME_FILE = "_datetime.npy"  # datetime64[s] of each row
+
+
+def predictions_path(model: str) -> Path:
+    """
+    Folder of a model's stored predictions.
+
+    Args:
+        model (str): Model output folder name, e.g. 'regression'.
+    Returns:
+        Path: Predictions folder.
+    """
+    return MODEL_OUTPUT / model / "predictions"
+
+
+class PredictionStore:
+    """
+    Read-only view of a model's prediction arrays over a shared row index.
+    store["y_true"] returns an array, like the .npz handle it replaces.
+    Slicing (store[:300], store[mask]) and filter() return a new view.
+    Arrays stored with another length than the index (e.g. the legacy H5
+    baseline, predicted on rows the lag model dropped) are only reachable
+    from the full store.
+    """
+
+    def __init__(self, arrays: dict, station: np.ndarray = None,
+                 datetime: np.ndarray = None, stations: list = ()):
+        """
+        Args:
+            arrays (dict): Array name -> 1-D array.
+            station (np.ndarray): Station code of each row, or None.
+            datetime (np.ndarray): datetime64 of each row, or None.
+            stations (list): Station name of each code.
+        """
+        self.arrays = arrays
+        self.station = station
+        self.datetime = datetime
+        self.stations = list(stations)
+
+    @classmethod
+    def open(cls, path: Path) -> "PredictionStore":
+        """
+        Memory map a stored predictions folder.
+
+        Args:
+            path (Path): Folder written by save_predictions.
+        Returns:
+            PredictionStore: Store over read-only memory maps.
+        """
+        path = Path(path)
+        with open(path / INDEX_FILE, "r", encoding="utf-8") as f:
+            meta = yaml.safe_load(f)
+        arrays = {name: np.load(path / f"{name}.npy", mmap_mode="r")
+                  for name in meta["arrays"]}
+        indexed = (path / STATION_FILE).exists()
+        return cls(arrays,
+                   np.load(path / STATION_FILE, mmap_mode="r")
+                   if indexed else None,
+                   np.load(path / DATETIME_FILE, mmap_mode="r")
+                   if indexed else None,
+                   meta.get("stations", []))
+
+    def __len__(self) -> int:
+        """Rows of the index, or the length most arrays share without
+        one."""
+        if self.station is not None:
+            return len(self.station)
+        lengths = [len(a) for a in self.arrays.values()]
+        return max(set(lengths), key=lengths.count, default=0)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.arrays
+
+    def keys(self) -> list:
+        """
+        Names of the stored arrays.
+
+        Returns:
+            list: Array names.
+        """
+        return list(self.arrays)
+
+    def __getitem__(self, key):
+        """
+        An array by name, or a view of the rows selected by a slice,
+        integer array or boolean mask.
+
+        Args:
+            key (str | slice | np.ndarray): Array name or row selection.
+        Returns:
+            np.ndarray | PredictionStore: Array or view.
+        """
+        if isinstance(key, str):
+            return self.arrays[key]
+        rows = len(self)
+        return PredictionStore(
+            {name: a[key] for name, a in self.arrays.items()
+             if len(a) == rows},
+            None if self.station is None else self.station[key],
+            None if self.datetime is None else self.datetime[key],
+            self.stations)
+
+    def mask(self, station=None, start=None, end=None) -> np.ndarray:
+        """
+        Rows of given stations within a time range.
+
+        Args:
+            station (str | list): Station name(s), None for all.
+            start: First datetime included, None for no bound.
+            end: Last datetime included, None for no bound.
+        Returns:
+            np.ndarray: Boolean row mask.
+        """
+        if self.station is None:
+            raise ValueError("Predictions were stored without a row index")
+        keep = np.ones(len(self), dtype=bool)
+        if station is not None:
+            names = [station] if isinstance(station, str) else station
+            codes = [self.stations.index(name) for name in names]
+            keep &= np.isin(self.station, codes)
+        if start is not None:
+            keep &= self.datetime >= np.datetime64(pd.Timestamp(start))
+        if end is not None:
+            keep &= self.datetime <= np.datetime64(pd.Timestamp(end))
+        return keep
+
+    def filter(self, station=None, start=None,
+               end=None) -> "PredictionStore":
+        """
+        View of the rows of given stations within a time range.
+
+        Args:
+            station (str | list): Station name(s), None for all.
+            start: First datetime included, None for no bound.
+            end: Last datetime included, None for no bound.
+        Returns:
+            PredictionStore: Filtered view.
+        """
+        return self[self.mask(station, start, end)]
+
+    def frame(self, names: list = None) -> pd.DataFrame:
+        """
+        The index and arrays as a DataFrame.
+
+        Args:
+            names (list): Arrays to include, defaults to those of the
+                index length.
+        Returns:
+            pd.DataFrame: 'station' (categorical), 'datetime' and arrays.
+        """
+        rows = len(self)
+        names = names or [name for name, a in self.arrays.items()
+                          if len(a) == rows]
+        df = pd.DataFrame({name: self.arrays[name] for name in names},
+                          copy=False)
+        if self.station is not None:
+            df.insert(0, "station", pd.Categorical.from_codes(
+                self.station, self.stations))
+            df.insert(1, "datetime", self.datetime)
+        return df
+
+
+def save_predictions(path: Path, index: pd.DataFrame = None,
+                     **arrays) -> Path:
+    """
+    Store prediction arrays as uncompressed .npy files with an optional
+    row index, replacing any arrays stored before.
+
+    Args:
+        path (Path): Output folder, see predictions_path.
+        index (pd.DataFrame): 'station' and 'datetime' of each row, or
+            None when the rows cannot be identified.
+        **arrays: Array name -> 1-D array (e.g. y_true, normal_preds).
+    Returns:
+        Path: Folder the predictions were written to.
+    """
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    for old in path.glob("*.npy"):
+        old.unlink()
+
+    meta = {"arrays": {}}
+    if index is not None:
+        station = index["station"].astype("category")
+        meta["stations"] = [str(s) for s in station.cat.categories]
+        meta["rows"] = len(index)
+        np.save(path / STATION_FILE, station.cat.codes.to_numpy("int8"))
+        np.save(path / DATETIME_FILE, pd.to_datetime(index["datetime"])
+                .to_numpy().astype("datetime64[s]"))
+
+    for name, values in arrays.items():
+        values = np.ascontiguousarray(values)
+        np.save(path / f"{name}.npy", values)
+        meta["arrays"][name] = {"dtype": str(values.dtype),
+                                "rows": len(values)}
+
+    with open(path / INDEX_FILE, "w", encoding="utf-8") as f:
+        yaml.safe_dump(meta, f, sort_keys=False)
+    return path
+
+
+def load_predictions(path: Path) -> PredictionStore:
+    """
+    Memory map stored predictions.
+
+    Args:
+        path (Path): Predictions folder.
+    Returns:
+        PredictionStore: Read-only store.
+    """
+    return PredictionStore.open(path)
+
+
+def convert_npz(npz_path: Path, path: Path) -> Path:
+    """
+    Convert a legacy predictions.npz export into the .npy store. The npz
+    files have no row index, so the store has none either.
+
+    Args:
+        npz_path (Path): Path of the legacy .npz file.
+        path (Path): Output folder.
+    Returns:
+        Path: Folder the predictions were written to.
+    """
+    with np.load(npz_path) as data:
+        return save_predictions(path, **dict(data))
+
+
+if __name__ == "__main__":
+    for model in ("h5", "regression"):
+        legacy = MODEL_OUTPUT / model / "predictions.npz"
+        if legacy.exists():
+            print("Converted predictions to:",
+                  convert_npz(legacy, predictions_path(model)))
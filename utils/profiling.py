@@ -0,0 +1,300 @@
+"""
+Lightweight profiling spans for the dashboard.
+A span records wall time, CPU time, rows processed, cache hit/miss and,
+when the server enables memory tracing (DASHBOARD_DEBUG=1), the peak
+traced allocation of a block of work. Spans are written to a rotating
+JSON-lines log and the spans of the current script run can be shown in an
+opt-in debug sidebar panel (?debug=1). tracemalloc is process-wide, so a
+visitor's ?debug=1 never starts it: it would slow every later session and
+concurrent debug runs would reset each other's peaks.
+"""
+
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+import functools
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+import uuid
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# Define the root directory and log location
+ROOT = Path(__file__).parent.parent
+LOG_PATH = Path(os.environ.get("DASHBOARD_PROFILE_LOG",
+                               ROOT / ".cache" / "profile.jsonl"))
+
+LOG_MAX_BYTES = 10 * 1024 * 1024  # Rotate the log at 10 MB
+LOG_BACKUPS = 3  # Rotated logs to keep
+
+# Per-thread state: Streamlit runs each script run in its own thread
+_local = threading.local()
+_listeners = []
+_logger = None
+_logger_lock = threading.Lock()
+
+
+def _profile_logger() -> logging.Logger:
+    """
+    Create the JSON-lines span logger on first use.
+
+    Returns:
+        logging.Logger: Logger writing one JSON record per line.
+    """
+    global _logger
+    with _logger_lock:
+        if _logger is None:
+            LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
+            handler = RotatingFileHandler(LOG_PATH,
+                                          maxBytes=LOG_MAX_BYTES,
+                                          backupCount=LOG_BACKUPS,
+                                          encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger = logging.getLogger("dashboard.profile")
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            logger.addHandler(handler)
+            _logger = logger
+    return _logger
+
+
+def add_listener(callback) -> None:
+    """
+    Register a callback receiving every finished span record.
+
+    Args:
+        callback (callable): Called with the span record dict.
+    """
+    _listeners.append(callback)
+
+
+def debug_enabled() -> bool:
+    """
+    Check whether debug mode is on (?debug=1 or DASHBOARD_DEBUG=1).
+
+    Returns:
+        bool: True in debug mode.
+    """
+    if os.environ.get("DASHBOARD_DEBUG") == "1":
+        return True
+    try:
+        return st.query_params.get("debug") == "1"
+    except Exception:  # outside a Streamlit script run
+        return False
+
+
+def memory_tracing_enabled() -> bool:
+    """
+    Check whether the server enables memory tracing (DASHBOARD_DEBUG=1).
+    Unlike the debug panel, it cannot be switched on from a URL.
+
+    Returns:
+        bool: True when peak allocations are traced.
+    """
+    return os.environ.get("DASHBOARD_DEBUG") == "1"
+
+
+def start_run(page: str, trace_memory: bool = False) -> str:
+    """
+    Start a new script run on this thread.
+
+    Args:
+        page (str): Page title, stored on every span of the run.
+        trace_memory (bool): Record peak allocations with tracemalloc,
+            see memory_tracing_enabled.
+    Returns:
+        str: Run id.
+    """
+    _local.run_id = uuid.uuid4().hex[:12]
+    _local.page = page
+    _local.stack = []
+    _local.records = []
+    _local.trace_memory = trace_memory
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    return _local.run_id
+
+
+def _state() -> threading.local:
+    """
+    Per-thread run state, started lazily (e.g. for fragment reruns).
+
+    Returns:
+        threading.local: State with run id, span stack and records.
+    """
+    if not hasattr(_local, "run_id"):
+        start_run(page=None)
+    return _local
+
+
+def run_records() -> pd.DataFrame:
+    """
+    Spans recorded during the current run on this thread.
+
+    Returns:
+        pd.DataFrame: One row per finished span.
+    """
+    return pd.DataFrame(_state().records)
+
+
+def count_rows(value: object) -> int | None:
+    """
+    Number of rows in a result, when it has rows.
+
+    Args:
+        value (object): Result of a profiled function.
+    Returns:
+        int | None: Row count or None.
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series, np.ndarray)):
+        return len(value)
+    return None
+
+
+@contextmanager
+def span(name: str, kind: str = "section", rows: int = None):
+    """
+    Profile a block of work.
+    Peak allocation is only recorded when the run traces memory; since
+    tracemalloc is process-wide it is approximate under concurrent
+    sessions.
+
+    Args:
+        name (str): Span name, e.g. "load_engineered".
+        kind (str): Span kind (loader, model, chart, section, page).
+        rows (int): Rows processed, if known up front.
+    Yields:
+        dict: The span record; set "rows" or "cache" on it as needed.
+    """
+    state = _state()
+    tracing = state.trace_memory and tracemalloc.is_tracing()
+    parent = state.stack[-1] if state.stack else None
+
+    record = {
+        "run": state.run_id,
+        "page": state.page,
+        "name": name,
+        "kind": kind,
+        "parent": parent["name"] if parent else None,
+        "depth": len(state.stack),
+        "rows": rows,
+        "cache": None,
+    }
+    if tracing:
+        current, peak = tracemalloc.get_traced_memory()
+        if parent is not None:
+            parent["_peak"] = max(parent["_peak"], peak)
+        tracemalloc.reset_peak()
+        record["_base"], record["_peak"] = current, current
+
+    state.stack.append(record)
+    wall, cpu = time.perf_counter(), time.thread_time()
+    try:
+        yield record
+    finally:
+        record["wall_ms"] = (time.perf_counter() - wall) * 1000
+        record["cpu_ms"] = (time.thread_time() - cpu) * 1000
+        state.stack.pop()
+
+        peak_kb = None
+        if tracing:
+            peak = max(record.pop("_peak"),
+                       tracemalloc.get_traced_memory()[1])
+            peak_kb = (peak - record.pop("_base")) / 1024
+            if parent is not None:
+                parent["_peak"] = max(parent["_peak"], peak)
+        record["peak_kb"] = peak_kb
+        record["ts"] = time.time()
+
+        state.records.append(record)
+        _profile_logger().info(json.dumps(record, default=str))
+        for callback in _listeners:
+            callback(record)
+
+
+def mark_cache(status: str) -> None:
+    """
+    Set the cache status ("hit" or "miss") of the innermost open span.
+
+    Args:
+        status (str): Cache status.
+    """
+    state = _state()
+    if state.stack:
+        state.stack[-1]["cache"] = status
+
+
+def annotate(**fields) -> None:
+    """
+    Add fields (e.g. memory figures) to the innermost open span.
+
+    Args:
+        **fields: Values to record on the span.
+    """
+    state = _state()
+    if state.stack:
+        state.stack[-1].update(fields)
+
+
+def profiled(name: str = None, kind: str = "loader", cache=None):
+    """
+    Decorator profiling every call of a function.
+    When a Streamlit cache decorator is given the function is cached with
+    it, and a call counts as a miss only if the function body runs.
+
+    Args:
+        name (str): Span name, defaults to the function name.
+        kind (str): Span kind.
+        cache (callable): Optional cache decorator, e.g. st.cache_data.
+    Returns:
+        callable: Decorator.
+    """
+
+    def decorator(func):
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        def compute(*args, **kwargs):
+            mark_cache("miss")
+            return func(*args, **kwargs)
+
+        cached = cache(compute) if cache is not None else func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name, kind=kind) as record:
+                if cache is not None:
+                    record["cache"] = "hit"
+                result = cached(*args, **kwargs)
+                record["rows"] = count_rows(result)
+            return result
+
+        # Keep the cache controls of the Streamlit cached function
+        if hasattr(cached, "clear"):
+            wrapper.clear = cached.clear
+        return wrapper
+
+    return decorator
+
+
+def render_debug_panel() -> None:
+    """
+    Show the spans of the current run in a sidebar expander.
+    """
+    records = run_records()
+    with st.sidebar.expander("Profiling", expanded=True):
+        if records.empty:
+            st.write("No spans recorded.")
+            return
+        columns = ["name", "kind", "wall_ms", "cpu_ms", "rows",
+                   "peak_kb", "cache"]
+        columns += [col for col in ("memory_kb", "memory_saved_kb")
+                    if col in records.columns]
+        st.caption(f"Run {records['run'].iloc[0]} · "
+                   f"{records['wall_ms'].max():.0f} ms")
+        st.dataframe(records[columns].round(1), hide_index=True)
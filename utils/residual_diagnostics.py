@@ -0,0 +1,186 @@
+"""
+Utility functions for binned residual diagnostics.
+Predicted-vs-actual and residual plots are drawn from counts on a fixed
+grid (2D histograms for the dashboard, hexagonal bins for the static
+figures) over the whole test set, so the payload does not grow with the
+number of predictions and no rows are left out. Axis ranges come from the
+full artefact, so slices of it are drawn on the same grid. The residual
+distribution is a density histogram with a KDE evaluated from its bins.
+"""
+
+import numpy as np
+from utils.model_evaluation import slice_codes
+from utils.prediction_store import PredictionStore
+
+BINS = 60  # Bins per axis of the 2D histograms
+GRIDSIZE = 40  # Hexagons across the x axis
+RESIDUAL_QUANTILE = 0.005  # Residual tails drawn in the edge bins
+
+
+def residual_range(residuals: np.ndarray,
+                   quantile: float = RESIDUAL_QUANTILE) -> tuple:
+    """
+    Symmetric residual axis range holding all but the given tails.
+
+    Args:
+        residuals (np.ndarray): Residuals.
+        quantile (float): Share of each tail beyond the range.
+    Returns:
+        tuple: (low, high).
+    """
+    limit = np.quantile(np.abs(residuals), 1 - 2 * quantile)
+    return -float(limit), float(limit)
+
+
+def histogram_2d(x: np.ndarray, y: np.ndarray, x_range: tuple,
+                 y_range: tuple, bins: int = BINS) -> dict:
+    """
+    Counts on a regular grid, with values outside the ranges counted in
+    the edge bins so every row is drawn.
+
+    Args:
+        x (np.ndarray): x values.
+        y (np.ndarray): y values.
+        x_range (tuple): (low, high) of the x axis.
+        y_range (tuple): (low, high) of the y axis.
+        bins (int): Bins per axis.
+    Returns:
+        dict: 'x_edges', 'y_edges', 'counts' (x bins, y bins) and the
+        mean of y in each x bin ('y_mean', NaN when empty).
+    """
+    x = np.clip(x, *x_range)
+    y_clipped = np.clip(y, *y_range)
+    x_edges = np.linspace(*x_range, bins + 1)
+    y_edges = np.linspace(*y_range, bins + 1)
+    counts, _, _ = np.histogram2d(x, y_clipped, [x_edges, y_edges])
+
+    column = np.clip(np.searchsorted(x_edges, x, side="right") - 1,
+                     0, bins - 1)
+    rows = np.bincount(column, minlength=bins)
+    with np.errstate(invalid="ignore"):
+        y_mean = np.bincount(column, weights=y, minlength=bins) / rows
+    return {"x_edges": x_edges, "y_edges": y_edges,
+            "counts": counts.astype("int32"), "y_mean": y_mean}
+
+
+def hexbin(x: np.ndarray, y: np.ndarray, extent: tuple,
+           gridsize: int = GRIDSIZE) -> dict:
+    """
+    Counts per hexagon of matplotlib's hexbin lattice (two offset
+    rectangular lattices; a point belongs to the nearer centre).
+    ax.hexbin(x, y, C=counts, reduce_C_function=np.sum, gridsize=gridsize,
+    extent=extent) draws the result exactly.
+
+    Args:
+        x (np.ndarray): x values.
+        y (np.ndarray): y values.
+        extent (tuple): (xmin, xmax, ymin, ymax); values outside are
+            clipped to it.
+        gridsize (int): Hexagons across the x axis.
+    Returns:
+        dict: 'x', 'y' (centres of non-empty hexagons), 'counts',
+        'extent' and 'gridsize'.
+    """
+    xmin, xmax, ymin, ymax = extent
+    nx, ny = gridsize, int(gridsize / np.sqrt(3))
+    sx, sy = (xmax - xmin) / nx, (ymax - ymin) / ny
+    ix = (np.clip(x, xmin, xmax) - xmin) / sx
+    iy = (np.clip(y, ymin, ymax) - ymin) / sy
+
+    i1, j1 = np.round(ix), np.round(iy)
+    i2, j2 = np.floor(ix), np.floor(iy)
+    first = ((ix - i1) ** 2 + 3 * (iy - j1) ** 2
+             < (ix - i2 - 0.5) ** 2 + 3 * (iy - j2 - 0.5) ** 2)
+    cx = np.where(first, i1, i2 + 0.5)
+    cy = np.where(first, j1, j2 + 0.5)
+
+    # Centres are multiples of 0.5: key them as integers on a 2x lattice
+    key = (2 * cx).astype("int64") * (4 * ny + 4) + (2 * cy).astype("int64")
+    cells, counts = np.unique(key, return_counts=True)
+    cx, cy = (cells // (4 * ny + 4)) / 2, (cells % (4 * ny + 4)) / 2
+    return {"x": xmin + cx * sx, "y": ymin + cy * sy,
+            "counts": counts.astype("int32"), "extent": list(extent),
+            "gridsize": gridsize}
+
+
+def _rows(store: PredictionStore, by: str, label: str,
+          truth: str) -> np.ndarray:
+    """Boolean mask of the rows in a slice, all rows without one."""
+    if by == "all" or label is None:
+        return np.ones(len(store[truth]), dtype=bool)
+    codes, labels = slice_codes(store, by, truth)
+    return codes == labels.index(label)
+
+
+def residual_bins(store: PredictionStore, prediction: str,
+                  kind: str = "residual", x: str = "predicted",
+                  by: str = "all", label: str = None,
+                  truth: str = "y_true", bins: int = BINS) -> dict:
+    """
+    2D histogram of a stored prediction for the dashboard: predicted vs
+    actual, or residuals (actual - predicted) vs predicted or actual.
+
+    Args:
+        store (PredictionStore): Stored predictions.
+        prediction (str): Array of predicted values.
+        kind (str): 'prediction' for predicted vs actual, 'residual' for
+            residuals.
+        x (str): x axis of the residual plot, 'predicted' or 'actual'.
+        by (str): Slice, see utils.model_evaluation.available_slices.
+        label (str): Slice label to keep, None for every row.
+        truth (str): Array of actual values.
+        bins (int): Bins per axis.
+    Returns:
+        dict: histogram_2d output plus 'rows', 'x_label' and 'y_label'.
+    """
+    actual = np.asarray(store[truth], dtype="float64")
+    predicted = np.asarray(store[prediction], dtype="float64")
+    residuals = actual - predicted
+    value_range = (0.0, float(max(actual.max(), predicted.max())))
+
+    keep = _rows(store, by, label, truth)
+    if kind == "prediction":
+        out = histogram_2d(actual[keep], predicted[keep], value_range,
+                           value_range, bins)
+        out.update(x_label="Actual PM2.5", y_label="Predicted PM2.5")
+    else:
+        values = {"predicted": predicted, "actual": actual}[x]
+        out = histogram_2d(values[keep], residuals[keep], value_range,
+                           residual_range(residuals), bins)
+        out.update(x_label=f"{x.title()} PM2.5", y_label="Residual")
+    out["rows"] = int(keep.sum())
+    return out
+
+
+def residual_histogram(store: PredictionStore, prediction: str,
+                       truth: str = "y_true") -> dict:
+    """
+    Residual density histogram with a Gaussian KDE for the dashboard's
+    distribution chart. Bins are a fifth of the residuals' standard
+    deviation wide and the KDE uses Scott's bandwidth, evaluated from the
+    bin counts so its cost does not grow with the number of predictions.
+
+    Args:
+        store (PredictionStore): Stored predictions.
+        prediction (str): Array of predicted values.
+        truth (str): Array of actual values.
+    Returns:
+        dict: 'centers', 'width', 'density' and 'kde' (both per unit of
+        residual) and 'rows'.
+    """
+    residuals = (np.asarray(store[truth], dtype="float64")
+                 - np.asarray(store[prediction], dtype="float64"))
+    std = float(residuals.std())
+    width = std / 5
+    edges = np.arange(residuals.min(), residuals.max() + width, width)
+    counts, _ = np.histogram(residuals, edges)
+    centers = (edges[:-1] + edges[1:]) / 2
+
+    bandwidth = std * len(residuals) ** -0.2
+    kernel = np.exp(-0.5 * ((centers[:, None] - centers[None, :])
+                            / bandwidth) ** 2)
+    kernel /= bandwidth * np.sqrt(2 * np.pi)
+    return {"centers": centers, "width": width,
+            "density": counts / (len(residuals) * width),
+            "kde": kernel @ counts / len(residuals),
+            "rows": len(residuals)}
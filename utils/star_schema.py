@@ -0,0 +1,276 @@
+"""
+Star-schema layout of the engineered data.
+The wide engineered frame repeats station attributes and calendar
+attributes on every row. Here it is split into a narrow fact table of
+readings keyed by integer (station_id, hour_id), a station dimension with
+one row per station and a calendar dimension with one row per hour.
+Dimension ids are row positions, so joins are array takes, and calendar
+labels such as month names are computed once per hour rather than once
+per row. Registered features (utils.feature_registry) are not stored and
+are derived from the joined columns on request.
+
+Usage:
+    python -m utils.star_schema   # write data/engineered/star
+"""
+
+from pathlib import Path
+import argparse
+import numpy as np
+import pandas as pd
+from utils.cleaning import SEASONS
+from utils.feature_registry import FEATURES, FeatureStore
+from utils.load_csv import DataVersion
+
+ROOT = Path(__file__).parent.parent
+STAR_PATH = ROOT / "data" / "engineered" / "star"
+
+STATION_COLUMNS = ["station", "latitude", "longitude", "area_type"]
+CALENDAR_COLUMNS = ["datetime", "year", "month", "day", "hour", "season",
+                    "day_of_week", "month_name", "hour_sin", "hour_cos",
+                    "month_sin", "month_cos"]
+# Column order of the engineered CSV
+ENGINEERED_COLUMNS = ["datetime", "year", "month", "day", "hour", "pm25",
+                      "temperature", "pressure", "dew_point", "rain",
+                      "wind_direction", "wind_speed", "station", "latitude",
+                      "longitude", "area_type", "season", "day_of_week",
+                      "hour_sin", "hour_cos", "month_sin", "month_cos",
+                      "dew_point_spread", "temp_pres_interaction",
+                      "rain_binary", "relative_humidity"]
+MONTH_NAMES = ["January", "February", "March", "April", "May", "June",
+               "July", "August", "September", "October", "November",
+               "December"]
+
+
+def month_names(month) -> pd.Categorical:
+    """
+    Month names of month numbers, as an ordered categorical.
+
+    Args:
+        month (array-like): Month numbers 1-12.
+    Returns:
+        pd.Categorical: Names ordered January to December.
+    """
+    codes = np.asarray(month, dtype="int8") - 1
+    return pd.Categorical.from_codes(codes, MONTH_NAMES, ordered=True)
+
+
+def calendar_dimension(start: pd.Timestamp,
+                       periods: int) -> pd.DataFrame:
+    """
+    One row per hour with every calendar attribute of the engineered data.
+
+    Args:
+        start (pd.Timestamp): First hour.
+        periods (int): Number of hours.
+    Returns:
+        pd.DataFrame: Calendar indexed by hour_id (0 = start).
+    """
+    times = pd.date_range(pd.Timestamp(start).floor("h"), periods=periods,
+                          freq="h")
+    calendar = pd.DataFrame({"datetime": times,
+                             "year": times.year,
+                             "month": times.month,
+                             "day": times.day,
+                             "hour": times.hour})
+    calendar["season"] = calendar["month"].map(SEASONS).astype("category")
+    calendar["month_name"] = month_names(calendar["month"])
+
+    features = [col for col in CALENDAR_COLUMNS
+                if col in FEATURES and col not in calendar.columns]
+    calendar = FeatureStore(calendar).frame(features)
+    calendar.index.name = "hour_id"
+    return calendar[CALENDAR_COLUMNS]
+
+
+class StarSchema:
+    """
+    Fact table of hourly readings with station and calendar dimensions.
+    """
+
+    def __init__(self, fact: pd.DataFrame, stations: pd.DataFrame,
+                 calendar: pd.DataFrame, version: str = None):
+        """
+        Args:
+            fact (pd.DataFrame): Readings with integer 'station_id' and
+                'hour_id' columns.
+            stations (pd.DataFrame): Station attributes, row i being
+                station_id i.
+            calendar (pd.DataFrame): Calendar attributes, row i being
+                hour_id i.
+            version (str): Data version stamped on joined frames.
+        """
+        self.fact = fact
+        self.stations = stations
+        self.calendar = calendar
+        self.version = version
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "StarSchema":
+        """
+        Split a wide engineered frame into the fact and dimension tables.
+
+        Args:
+            df (pd.DataFrame): Engineered data.
+        Returns:
+            StarSchema: Normalised layout of the same rows.
+        """
+        station = (df["station"].astype("category")
+                   .cat.remove_unused_categories())
+        codes = station.cat.codes.to_numpy()
+
+        # First row of each station, in category (station_id) order
+        first = np.unique(codes, return_index=True)[1]
+        station_cols = [c for c in STATION_COLUMNS if c in df.columns]
+        stations = df[station_cols].iloc[first].reset_index(drop=True)
+        stations["station"] = station.cat.categories.astype("category")
+        stations.index.name = "station_id"
+
+        times = pd.DatetimeIndex(df["datetime"])
+        start = times.min().floor("h")
+        hour_id = ((times - start) // pd.Timedelta(hours=1)).to_numpy()
+        calendar = calendar_dimension(start, int(hour_id.max()) + 1)
+
+        # Everything not held by a dimension or derivable is a reading
+        derived = set(STATION_COLUMNS) | set(CALENDAR_COLUMNS) | set(FEATURES)
+        fact = df[[c for c in df.columns if c not in derived]].copy()
+        fact.insert(0, "station_id", codes.astype("int16"))
+        fact.insert(1, "hour_id", hour_id.astype("int32"))
+        return cls(fact.reset_index(drop=True), stations, calendar,
+                   df.attrs.get("version"))
+
+    def columns(self) -> list:
+        """
+        Columns stored in the fact and dimension tables.
+
+        Returns:
+            list: Stored column names, keys excluded.
+        """
+        names = list(self.fact.columns[2:]) + list(self.stations.columns)
+        return names + [c for c in self.calendar.columns if c not in names]
+
+    def _lookup(self, name: str):
+        """
+        Values of a stored column for every fact row.
+
+        Args:
+            name (str): Fact or dimension column.
+        Returns:
+            pd.Series | pd.Categorical | np.ndarray: Values in fact order.
+        """
+        if name in self.fact.columns:
+            return self.fact[name].array
+        table, key = ((self.stations, "station_id")
+                      if name in self.stations.columns
+                      else (self.calendar, "hour_id"))
+        ids = self.fact[key].to_numpy()
+        column = table[name]
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            return pd.Categorical.from_codes(column.cat.codes.to_numpy()[ids],
+                                             dtype=column.dtype)
+        return column.to_numpy()[ids]
+
+    def join(self, columns: list = None) -> pd.DataFrame:
+        """
+        Wide frame of the requested columns for every reading. Dimension
+        columns are gathered by integer key and registered features that
+        are not stored are computed from the columns they read.
+
+        Args:
+            columns (list): Column names, None for the engineered layout.
+        Returns:
+            pd.DataFrame: One row per fact row, stamped with the version.
+        Raises:
+            KeyError: When a column is neither stored nor registered.
+        """
+        if columns is None:
+            columns = ENGINEERED_COLUMNS
+        stored, lookups = set(self.columns()), []
+
+        def visit(name):
+            if name in lookups:
+                return
+            if name in stored:
+                lookups.append(name)
+            elif name in FEATURES:
+                feature = FEATURES[name]
+                keys = ("station", "datetime") if feature.temporal else ()
+                for dependency in feature.inputs + keys:
+                    visit(dependency)
+            else:
+                raise KeyError(f"Unknown column or feature: {name}")
+
+        for name in columns:
+            visit(name)
+
+        df = pd.DataFrame({name: self._lookup(name) for name in lookups})
+        df = FeatureStore(df).frame(columns)[list(columns)]
+        if self.version is not None:
+            df.attrs["version"] = DataVersion(self.version)
+        return df
+
+    def save(self, directory: Path = STAR_PATH) -> Path:
+        """
+        Write the three tables as parquet files.
+
+        Args:
+            directory (Path): Output directory.
+        Returns:
+            Path: The directory.
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        self.fact.to_parquet(directory / "fact.parquet", index=False)
+        self.stations.to_parquet(directory / "station.parquet", index=False)
+        self.calendar.to_parquet(directory / "calendar.parquet", index=False)
+        return directory
+
+    @classmethod
+    def load(cls, directory: Path = STAR_PATH) -> "StarSchema":
+        """
+        Read tables written by save.
+
+        Args:
+            directory (Path): Directory of the tables.
+        Returns:
+            StarSchema: Loaded layout, versioned by the fact file.
+        """
+        directory = Path(directory)
+        fact = pd.read_parquet(directory / "fact.parquet")
+        stations = pd.read_parquet(directory / "station.parquet")
+        calendar = pd.read_parquet(directory / "calendar.parquet")
+        stations.index.name = "station_id"
+        calendar.index.name = "hour_id"
+        stat = (directory / "fact.parquet").stat()
+        return cls(fact, stations, calendar,
+                   DataVersion(f"star:{stat.st_mtime_ns}:{stat.st_size}"))
+
+
+def parse_args(argv: list = None) -> argparse.Namespace:
+    """
+    Parse command line arguments.
+
+    Args:
+        argv (list): Arguments, defaults to sys.argv.
+    Returns:
+        argparse.Namespace: Parsed arguments.
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m utils.star_schema",
+        description="Split the engineered data into a star schema.")
+    parser.add_argument("--source", type=Path,
+                        default=ROOT / "data" / "engineered"
+                        / "beijing_engineered.csv",
+                        help="engineered CSV")
+    parser.add_argument("--output", type=Path, default=STAR_PATH,
+                        help="output directory")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    from utils.load_csv import load_csv
+
+    args = parse_args()
+    star = StarSchema.from_frame(load_csv(args.source))
+    star.save(args.output)
+    print(f"{len(star.fact):,} facts, {len(star.stations)} stations, "
+          f"{len(star.calendar):,} hours -> {args.output}")
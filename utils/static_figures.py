@@ -0,0 +1,1353 @@
+"""
+Static (matplotlib/seaborn) figures of the notebooks, rendered in
+parallel and only when their data changed.
+Each figure declares the files (and columns) it reads, a prepare step and
+a draw step. The prepare step runs once per figure in the main process and
+reduces the input to what is drawn: bin counts instead of raw values for
+histograms, box statistics instead of rows for box plots, means with
+normal 95% intervals instead of seaborn's bootstrap, and a fixed sample of
+rows for scatter, violin and pair plots. The draw steps run in a process
+pool. A figure is skipped when its inputs, parameters and code are
+unchanged; when an input changed but the prepared data did not (e.g. the
+rows of another figure's columns), only the fingerprints are refreshed.
+Figures whose inputs are missing are reported and left as they are.
+
+Usage:
+    python -m utils.static_figures                  # every figure
+    python -m utils.static_figures --only h1 eda    # figures under h1/, eda/
+    python -m utils.static_figures --output /tmp/figures --force
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import argparse
+import hashlib
+import inspect
+import os
+import time
+import warnings
+import matplotlib
+import numpy as np
+import pandas as pd
+import yaml
+from utils.img_load import optimise
+from utils.metadata_builder import fingerprint, read_metadata, unchanged
+from utils.prediction_store import load_predictions
+from utils.residual_diagnostics import hexbin, residual_range
+
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt  # noqa: E402
+import seaborn as sns  # noqa: E402
+from matplotlib import cbook  # noqa: E402
+
+ROOT = Path(__file__).parent.parent
+FIGURES_PATH = ROOT / "figures"
+STATE_PATH = ROOT / ".cache" / "static_figures.yml"
+
+CLEANED = "data/cleaned/beijing_cleaned.csv"
+ENGINEERED = "data/engineered/beijing_engineered.csv"
+CLUSTERED = "model_outputs/clustering/beijing_clustered.csv"
+H5_PREDICTIONS = "model_outputs/h5/predictions"
+REGRESSION_PREDICTIONS = "model_outputs/regression/predictions"
+
+SAMPLE_ROWS = 20_000  # Rows drawn by scatter and violin plots
+PAIRPLOT_ROWS = 5_000  # Rows drawn by the pair plot (20 panels)
+WEATHER_VARS = ["temperature", "dew_point", "pressure", "rain",
+                "wind_speed", "relative_humidity"]
+
+
+class StaticFigure:
+    """
+    A figure file with the inputs it reads and how it is drawn.
+    """
+
+    def __init__(self, path: str, inputs: dict, prepare, draw,
+                 params: dict = None):
+        """
+        Args:
+            path (str): Output file relative to the figures folder.
+            inputs (dict): Input file (relative to the repository root) ->
+                columns read, None for every column or non-CSV files.
+            prepare (callable): Reduces the loaded inputs (positional, in
+                input order) to the data drawn.
+            draw (callable): Returns a matplotlib figure of that data.
+            params (dict): Keyword arguments of prepare and draw.
+        """
+        self.path = path
+        self.inputs = inputs
+        self.prepare = prepare
+        self.draw = draw
+        self.params = params or {}
+
+    def code_hash(self) -> str:
+        """
+        Hash of the prepare and draw source and of every repository
+        function and constant they use (e.g. _mean_figure, _draw_hexbin,
+        SAMPLE_ROWS), so editing a figure or a shared helper rebuilds it.
+
+        Returns:
+            str: SHA-256 hex digest.
+        """
+        sha = hashlib.sha256()
+        for name, source in sorted(_code_closure(
+                [self.prepare, self.draw]).items()):
+            sha.update(f"{name}\n{source}\n".encode("utf-8"))
+        return sha.hexdigest()
+
+
+def _names(code) -> set:
+    """Global names used by a code object and the code nested in it."""
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            names |= _names(const)
+    return names
+
+
+def _plain(value) -> bool:
+    """Whether a constant has a stable repr: scalars and containers of
+    them."""
+    if isinstance(value, (bool, int, float, str, type(None))):
+        return True
+    if isinstance(value, (list, tuple)):
+        return all(_plain(item) for item in value)
+    if isinstance(value, dict):
+        return all(_plain(k) and _plain(v) for k, v in value.items())
+    return False
+
+
+def _source_key(func) -> str | None:
+    """Repository file and qualified name of a function, None for
+    functions outside the repository."""
+    try:
+        path = Path(inspect.getsourcefile(func)).resolve()
+    except TypeError:
+        return None
+    if ROOT.resolve() not in path.parents:
+        return None
+    return f"{path.relative_to(ROOT.resolve()).as_posix()}:" \
+        f"{func.__qualname__}"
+
+
+def _code_closure(funcs: list) -> dict:
+    """
+    Source of functions and repr of constants reachable from functions
+    through the globals they use, limited to the repository's own code.
+
+    Args:
+        funcs (list): Functions to start from.
+    Returns:
+        dict: File and qualified name -> source or repr.
+    """
+    found, todo = {}, [inspect.unwrap(func) for func in funcs]
+    while todo:
+        func = todo.pop()
+        key = _source_key(func)
+        if key is None or key in found:
+            continue
+        found[key] = inspect.getsource(func)
+        for name in _names(func.__code__):
+            value = func.__globals__.get(name)
+            if inspect.isfunction(value):
+                todo.append(inspect.unwrap(value))
+            elif name in func.__globals__ and _plain(value):
+                found[f"{key.split(':')[0]}:{name}"] = repr(value)
+    return found
+
+
+FIGURES = {}
+
+
+def figure(path: str, inputs: dict, prepare, **params):
+    """
+    Decorator registering a draw function as a static figure.
+
+    Args:
+        path (str): Output file relative to the figures folder.
+        inputs (dict): Input file -> columns read.
+        prepare (callable): Data reduction step.
+        **params: Keyword arguments of prepare and draw.
+    Returns:
+        callable: Decorator returning the draw function unchanged.
+    """
+    def decorator(draw):
+        FIGURES[path] = StaticFigure(path, inputs, prepare, draw, params)
+        return draw
+    return decorator
+
+
+# ------------------------- Prepare steps -------------------------
+
+def _identity(*inputs, **params):
+    """Inputs drawn as they are (already small)."""
+    return inputs[0] if len(inputs) == 1 else inputs
+
+
+def _sample(df: pd.DataFrame, rows: int = SAMPLE_ROWS,
+            **params) -> pd.DataFrame:
+    """
+    A fixed random sample of rows, in their original order.
+
+    Args:
+        df (pd.DataFrame): Data.
+        rows (int): Rows to keep.
+    Returns:
+        pd.DataFrame: At most rows rows.
+    """
+    df = df.dropna()
+    if len(df) <= rows:
+        return df
+    return df.sample(rows, random_state=0).sort_index()
+
+
+def _bins(values: pd.Series, bins="auto") -> dict:
+    """
+    Histogram of a column: the only thing a histogram draws.
+
+    Args:
+        values (pd.Series): Values.
+        bins (int | str): Bin count or numpy bin rule.
+    Returns:
+        dict: 'edges', 'counts' and 'centers'.
+    """
+    values = values.dropna().to_numpy(float)
+    edges = np.histogram_bin_edges(values, bins)
+    counts, _ = np.histogram(values, edges)
+    return {"edges": edges, "counts": counts,
+            "centers": (edges[:-1] + edges[1:]) / 2}
+
+
+def _column_bins(df: pd.DataFrame, bins="auto", **params) -> dict:
+    """Histogram of every column (see _bins)."""
+    return {col: _bins(df[col], bins) for col in df.columns}
+
+
+def _box_stats(df: pd.DataFrame, by: str = None, **params) -> dict:
+    """
+    Box plot statistics (quartiles, whiskers and fliers) of every
+    non-key column, or of the first non-key column per group of by.
+
+    Args:
+        df (pd.DataFrame): Data.
+        by (str): Grouping column, None for one box per column.
+    Returns:
+        dict: Label -> matplotlib box statistics.
+    """
+    if by is None:
+        return {col: cbook.boxplot_stats(df[col].dropna().to_numpy())[0]
+                for col in df.columns}
+    value = [c for c in df.columns if c != by][0]
+    stats = {}
+    for key, rows in df.groupby(by, observed=True, sort=True)[value]:
+        stats[key] = cbook.boxplot_stats(rows.dropna().to_numpy())[0]
+        stats[key]["label"] = str(key)
+    return stats
+
+
+def _mean_ci(df: pd.DataFrame, by: list, value: str = "pm25",
+             sort: bool = True, **params) -> pd.DataFrame:
+    """
+    Group means with a normal 95% interval (seaborn's default interval
+    bootstraps every row, which dominates the cost on 400k rows).
+
+    Args:
+        df (pd.DataFrame): Data.
+        by (list): Grouping columns (or a key Series).
+        value (str): Averaged column.
+        sort (bool): Sort groups, False keeps first-appearance order.
+    Returns:
+        pd.DataFrame: Group keys, mean, low and high.
+    """
+    grouped = df.groupby(by, observed=True, sort=sort)[value]
+    out = grouped.agg(["mean", "sem"])
+    out["low"] = out["mean"] - 1.96 * out["sem"]
+    out["high"] = out["mean"] + 1.96 * out["sem"]
+    return out.drop(columns="sem").reset_index()
+
+
+def _grouped_mean(df: pd.DataFrame, by, value: str = "pm25",
+                  **params) -> pd.Series:
+    """Mean of a column per group."""
+    return df.groupby(by, observed=False)[value].mean()
+
+
+def _corr(df: pd.DataFrame, method: str = "pearson",
+          **params) -> pd.DataFrame:
+    """Correlation matrix of the numeric columns."""
+    return df.corr(method=method, numeric_only=True)
+
+
+# ------------------------- Draw helpers -------------------------
+
+def _bar_histogram(ax, hist: dict, **kwargs) -> None:
+    """Draw precomputed histogram counts."""
+    ax.hist(hist["centers"], bins=hist["edges"], weights=hist["counts"],
+            **kwargs)
+
+
+def _kde_histogram(ax, hist: dict) -> None:
+    """Draw precomputed counts with seaborn's KDE, fitted to the bins."""
+    sns.histplot(x=hist["centers"], weights=hist["counts"],
+                 bins=list(hist["edges"]), kde=True, ax=ax)
+
+
+def _mean_line(ax, stats: pd.DataFrame, x: str, **kwargs) -> None:
+    """Draw a mean line with its interval band."""
+    line, = ax.plot(stats[x], stats["mean"], **kwargs)
+    ax.fill_between(stats[x], stats["low"], stats["high"],
+                    color=line.get_color(), alpha=0.2)
+
+
+def _mean_bars(ax, stats: pd.DataFrame, x: str) -> None:
+    """Draw mean bars with interval error bars."""
+    labels = stats[x].astype(str)
+    ax.bar(labels, stats["mean"],
+           color=sns.color_palette(n_colors=len(stats)))
+    ax.errorbar(labels, stats["mean"],
+                yerr=[stats["mean"] - stats["low"],
+                      stats["high"] - stats["mean"]],
+                fmt="none", ecolor="0.26", linewidth=2.5)
+
+
+def _hide_unused(axes, used: int) -> None:
+    """Hide the axes of a grid past the used ones."""
+    for ax in axes[used:]:
+        ax.set_visible(False)
+
+
+# ------------------------- EDA (notebook 03) -------------------------
+
+@figure("eda/pm25_distribution.png", {CLEANED: ["pm25"]}, _column_bins)
+def pm25_distribution(hists: dict):
+    """Histogram of PM2.5 with a KDE."""
+    fig, ax = plt.subplots(figsize=(8, 5))
+    _kde_histogram(ax, hists["pm25"])
+    ax.set_xlabel("pm25")
+    ax.set_title("PM2.5 Distribution")
+    return fig
+
+
+@figure("eda/pm25_boxplot.png", {CLEANED: ["pm25"]}, _box_stats)
+def pm25_boxplot(stats: dict):
+    """Box plot of PM2.5."""
+    fig, ax = plt.subplots(figsize=(6, 4))
+    ax.bxp([stats["pm25"]], orientation="horizontal",
+           patch_artist=True)
+    ax.set_yticks([])
+    ax.set_xlabel("pm25")
+    ax.set_title("PM2.5 Boxplot")
+    return fig
+
+
+@figure("eda/weather_variable_distributions.png",
+        {CLEANED: ["temperature", "dew_point", "pressure", "rain"]},
+        _column_bins, bins=30)
+def eda_weather_distributions(hists: dict, **params):
+    """Histogram of every weather variable."""
+    fig, axes = plt.subplots(2, 2, figsize=(10, 6))
+    for ax, (col, hist) in zip(axes.flat, hists.items()):
+        _bar_histogram(ax, hist)
+        ax.set_title(col)
+    fig.suptitle("Weather Variable Distributions")
+    fig.tight_layout()
+    return fig
+
+
+def _daily_mean(df: pd.DataFrame, **params) -> pd.Series:
+    """Mean PM2.5 of every day."""
+    return df.resample("D", on="datetime")["pm25"].mean()
+
+
+@figure("eda/daily_pm25_trend.png", {CLEANED: ["datetime", "pm25"]},
+        _daily_mean)
+def daily_pm25_trend(daily: pd.Series):
+    """Daily mean PM2.5 over the whole period."""
+    fig, ax = plt.subplots(figsize=(14, 5))
+    daily.plot(ax=ax)
+    ax.set_title("Daily PM2.5 Trend")
+    ax.set_xlabel("Date")
+    ax.set_ylabel("PM2.5")
+    return fig
+
+
+@figure("eda/average_pm25_by_season.png", {CLEANED: ["season", "pm25"]},
+        _grouped_mean, by="season")
+def average_by_season(seasonal: pd.Series, **params):
+    """Mean PM2.5 per season."""
+    fig, ax = plt.subplots(figsize=(8, 5))
+    seasonal.plot(kind="bar", ax=ax)
+    ax.set_title("Average PM2.5 by Season")
+    ax.set_xlabel("Season")
+    ax.set_ylabel("PM2.5")
+    ax.tick_params(axis="x", rotation=0)
+    fig.tight_layout()
+    return fig
+
+
+@figure("eda/average_pm25_by_month.png", {CLEANED: ["month", "pm25"]},
+        _grouped_mean, by="month")
+def average_by_month(monthly: pd.Series, **params):
+    """Mean PM2.5 per month."""
+    monthly = monthly.rename(lambda m: pd.Timestamp(2000, m, 1)
+                             .strftime("%B"))
+    fig, ax = plt.subplots(figsize=(10, 5))
+    monthly.plot(kind="bar", ax=ax)
+    ax.set_title("Average PM2.5 by Month (Across All Years)")
+    ax.set_xlabel("Month")
+    ax.set_ylabel("PM2.5")
+    ax.tick_params(axis="x", rotation=45)
+    fig.tight_layout()
+    return fig
+
+
+@figure("eda/average_pm25_by_month_year.png",
+        {CLEANED: ["year", "month", "pm25"]},
+        _grouped_mean, by=["year", "month"])
+def average_by_month_year(monthly: pd.Series, **params):
+    """Mean PM2.5 per month, one line per year."""
+    labels = [f"{year}-{month:02d}" for year, month in monthly.index]
+    fig, ax = plt.subplots(figsize=(14, 5))
+    ax.bar(labels, monthly.to_numpy())
+    ax.tick_params(axis="x", rotation=45)
+    ax.set_title("Average PM2.5 by Month-Year")
+    ax.set_xlabel("Month-Year")
+    ax.set_ylabel("PM2.5")
+    fig.tight_layout()
+    return fig
+
+
+@figure("eda/average_pm25_by_hour.png", {CLEANED: ["hour", "pm25"]},
+        _grouped_mean, by="hour")
+def average_by_hour(hourly: pd.Series, **params):
+    """Mean PM2.5 per hour of the day."""
+    fig, ax = plt.subplots(figsize=(8, 4))
+    hourly.plot(ax=ax)
+    ax.set_title("Average PM2.5 by Hour of Day")
+    ax.set_xlabel("Hour")
+    ax.set_ylabel("PM2.5")
+    return fig
+
+
+@figure("eda/average_pm25_by_year.png", {CLEANED: ["year", "pm25"]},
+        _grouped_mean, by="year")
+def average_by_year(yearly: pd.Series, **params):
+    """Mean PM2.5 per year."""
+    fig, ax = plt.subplots(figsize=(8, 4))
+    yearly.plot(kind="bar", ax=ax)
+    ax.set_title("Average PM2.5 by Year")
+    ax.set_xlabel("Year")
+    ax.set_ylabel("PM2.5")
+    return fig
+
+
+@figure("eda/average_pm25_by_station.png", {CLEANED: ["station", "pm25"]},
+        _grouped_mean, by="station")
+def average_by_station(station_mean: pd.Series, **params):
+    """Mean PM2.5 per station."""
+    fig, ax = plt.subplots(figsize=(12, 5))
+    station_mean.sort_values().plot(kind="bar", ax=ax)
+    ax.set_title("Average PM2.5 by Station")
+    ax.set_ylabel("PM2.5")
+    ax.set_xlabel("Station")
+    ax.tick_params(axis="x", rotation=45)
+    fig.tight_layout()
+    return fig
+
+
+@figure("eda/pairplot_pm25_weather.png",
+        {CLEANED: ["pm25", "temperature", "dew_point", "pressure", "rain"]},
+        _sample, rows=PAIRPLOT_ROWS)
+def pairplot_pm25_weather(sample: pd.DataFrame, **params):
+    """Pair plot of PM2.5 and the weather variables."""
+    return sns.pairplot(sample, diag_kind="kde").figure
+
+
+@figure("eda/correlation_heatmap.png",
+        {CLEANED: ["pm25", "temperature", "dew_point", "pressure", "rain",
+                   "wind_speed", "wind_direction"]}, _corr)
+def eda_correlation_heatmap(corr: pd.DataFrame, **params):
+    """Correlation heatmap of the numeric columns."""
+    fig, ax = plt.subplots(figsize=(6, 6))
+    sns.heatmap(corr, annot=True, cmap="coolwarm", ax=ax)
+    ax.set_title("Correlation Heatmap")
+    return fig
+
+
+# ------------------------- H1 (notebook 05) -------------------------
+
+@figure("h1/seasonal_pm25_boxplot.png", {ENGINEERED: ["season", "pm25"]},
+        _box_stats, by="season")
+def seasonal_boxplot(stats: dict, **params):
+    """PM2.5 box plot per season."""
+    fig, ax = plt.subplots(figsize=(7, 5))
+    ax.bxp(list(stats.values()), patch_artist=True)
+    ax.set_title("Seasonal PM2.5 Distribution")
+    ax.set_xlabel("Season")
+    ax.set_ylabel("PM2.5 Levels (µg/m³)")
+    return fig
+
+
+@figure("h1/monthly_pm25_violinplot.png", {ENGINEERED: ["month", "pm25"]},
+        _sample)
+def monthly_violin(sample: pd.DataFrame, **params):
+    """PM2.5 violin plot per month."""
+    fig, ax = plt.subplots(figsize=(12, 5))
+    sns.violinplot(data=sample, x="month", y="pm25", inner="quartile",
+                   ax=ax)
+    ax.set_title("Monthly PM2.5 Distribution (Violin Plot)")
+    ax.set_xlabel("Month")
+    ax.set_ylabel("PM2.5 Levels (µg/m³)")
+    return fig
+
+
+@figure("h1/monthly_pm25_trends.png",
+        {ENGINEERED: ["year", "month", "pm25"]},
+        _mean_ci, by=["year", "month"])
+def monthly_trends(stats: pd.DataFrame, **params):
+    """Mean PM2.5 per month with 95% intervals, one line per year."""
+    years = sorted(stats["year"].unique())
+    colors = sns.color_palette("viridis", len(years))
+    fig, ax = plt.subplots(figsize=(12, 6))
+    for year, color in zip(years, colors):
+        _mean_line(ax, stats[stats["year"] == year], "month", color=color,
+                   label=str(year))
+    ax.set_title("Monthly PM2.5 Trends by Year")
+    ax.set_xlabel("Month")
+    ax.set_ylabel("PM2.5 Levels (µg/m³)")
+    ax.legend(title="Year")
+    return fig
+
+
+@figure("h1/seasonal_pm25_trends.png",
+        {ENGINEERED: ["year", "season", "pm25"]},
+        _grouped_mean, by=["year", "season"])
+def seasonal_trends(seasonal: pd.Series, **params):
+    """Mean PM2.5 per season across the years."""
+    fig, ax = plt.subplots(figsize=(10, 5))
+    sns.lineplot(data=seasonal.reset_index(), x="year", y="pm25",
+                 hue="season", ax=ax)
+    ax.set_title("Seasonal PM2.5 Trends Across Years")
+    ax.set_xlabel("Year")
+    ax.set_ylabel("Average PM2.5 Levels (µg/m³)")
+    ax.legend(title="Season")
+    return fig
+
+
+def _season_scatter(sample: pd.DataFrame, x: str, title: str,
+                    xlabel: str):
+    """Scatter of PM2.5 against a weather variable, coloured by season."""
+    fig, ax = plt.subplots(figsize=(10, 5))
+    sns.scatterplot(data=sample, x=x, y="pm25", hue="season", alpha=0.4,
+                    ax=ax)
+    ax.set_title(title)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel("PM2.5 Levels (µg/m³)")
+    ax.legend(title="Season")
+    return fig
+
+
+@figure("h1/temp_vs_pm25_season.png",
+        {ENGINEERED: ["temperature", "pm25", "season"]}, _sample)
+def temperature_scatter(sample: pd.DataFrame, **params):
+    """PM2.5 against temperature, coloured by season."""
+    return _season_scatter(sample, "temperature",
+                           "Temperature vs PM2.5 by Season",
+                           "Temperature (°C)")
+
+
+@figure("h1/pressure_vs_pm25_season.png",
+        {ENGINEERED: ["pressure", "pm25", "season"]}, _sample)
+def pressure_scatter(sample: pd.DataFrame, **params):
+    """PM2.5 against pressure, coloured by season."""
+    return _season_scatter(sample, "pressure",
+                           "Pressure vs PM2.5 by Season", "Pressure (hPa)")
+
+
+@figure("h1/dewpoint_vs_pm25_season.png",
+        {ENGINEERED: ["dew_point", "pm25", "season"]}, _sample)
+def dew_point_scatter(sample: pd.DataFrame, **params):
+    """PM2.5 against dew point, coloured by season."""
+    return _season_scatter(sample, "dew_point",
+                           "Dewpoint vs PM2.5 by Season",
+                           "Dew Point (°C)")
+
+
+def _hourly_mean(df: pd.DataFrame, **params) -> pd.Series:
+    """City-wide hourly mean PM2.5, interpolated over missing hours."""
+    hourly = df.groupby("datetime")["pm25"].mean().sort_index()
+    return hourly.asfreq("h").interpolate(method="time")
+
+
+@figure("h1/seasonal_decompose_pm25.png",
+        {ENGINEERED: ["datetime", "pm25"]}, _hourly_mean, period=24 * 30)
+def seasonal_decomposition(ts: pd.Series, period: int = 24 * 30):
+    """Additive trend, seasonal and residual parts of hourly PM2.5."""
+    from statsmodels.tsa.seasonal import seasonal_decompose
+
+    return seasonal_decompose(ts, model="additive", period=period).plot()
+
+
+# ------------------------- H2 (stations) -------------------------
+
+def _by_mean(means: pd.Series) -> list:
+    """Group labels from the highest mean PM2.5 to the lowest."""
+    return [str(key) for key in means.sort_values(ascending=False).index]
+
+
+@figure("h2/mean_pm25_by_area_type.png",
+        {ENGINEERED: ["area_type", "pm25"]}, _mean_ci, by="area_type")
+def mean_by_area_type(stats: pd.DataFrame, **params):
+    """Mean PM2.5 per area type with 95% intervals."""
+    fig, ax = plt.subplots(figsize=(6, 4))
+    _mean_bars(ax, stats, "area_type")
+    ax.set_title("Mean PM2.5 by Area Type")
+    ax.set_xlabel("Area Type")
+    ax.set_ylabel("Mean PM2.5 (µg/m³)")
+    fig.tight_layout()
+    return fig
+
+
+@figure("h2/pm25_distribution_by_station.png",
+        {ENGINEERED: ["station", "pm25"]}, _box_stats, by="station")
+def station_boxplot(stats: dict, **params):
+    """PM2.5 box plot per station, without fliers."""
+    boxes = sorted(stats.values(), key=lambda box: -box["mean"])
+    fig, ax = plt.subplots(figsize=(14, 6))
+    parts = ax.bxp(boxes, showfliers=False, patch_artist=True,
+                   medianprops={"color": "0.26"})
+    for patch in parts["boxes"]:
+        patch.set_facecolor(sns.color_palette()[0])
+    ax.set_title("PM2.5 Distribution by Station")
+    ax.set_xlabel("Station")
+    ax.set_ylabel("PM2.5 (µg/m³)")
+    ax.tick_params(axis="x", labelrotation=45)
+    plt.setp(ax.get_xticklabels(), ha="right")
+    fig.tight_layout()
+    return fig
+
+
+def _station_sample(df: pd.DataFrame, **params) -> dict:
+    """A fixed sample of rows (see _sample) and the stations from the
+    highest mean PM2.5 to the lowest, over every row."""
+    order = _by_mean(df.groupby("station", observed=True)["pm25"].mean())
+    return {"sample": _sample(df).astype({"station": str}),
+            "order": order}
+
+
+@figure("h2/pm25_kde_by_station.png", {ENGINEERED: ["station", "pm25"]},
+        _station_sample)
+def station_kde(stations: dict, **params):
+    """PM2.5 density per station."""
+    fig, ax = plt.subplots(figsize=(10, 6))
+    sns.kdeplot(data=stations["sample"], x="pm25", hue="station",
+                hue_order=stations["order"], common_norm=False,
+                linewidth=1, alpha=0.7, ax=ax)
+    sns.move_legend(ax, "upper left", bbox_to_anchor=(1.05, 1),
+                    title="Station")
+    ax.set_title("PM2.5 Density by Station")
+    ax.set_xlabel("PM2.5 (µg/m³)")
+    ax.set_ylabel("Density")
+    fig.tight_layout()
+    return fig
+
+
+@figure("h2/pm25_violin_distribution_by_station.png",
+        {ENGINEERED: ["station", "pm25"]}, _station_sample)
+def station_violin(stations: dict, **params):
+    """PM2.5 violin plot per station."""
+    fig, ax = plt.subplots(figsize=(14, 6))
+    sns.violinplot(data=stations["sample"], x="station", y="pm25",
+                   order=stations["order"], cut=0, ax=ax)
+    ax.set_title("PM2.5 Distribution by Station (Violin Plot)")
+    ax.set_xlabel("Station")
+    ax.set_ylabel("PM2.5 (µg/m³)")
+    ax.tick_params(axis="x", labelrotation=45)
+    plt.setp(ax.get_xticklabels(), ha="right")
+    fig.tight_layout()
+    return fig
+
+
+def _rolling_top_stations(df: pd.DataFrame, stations: int = 4,
+                          window: int = 7, **params) -> pd.DataFrame:
+    """
+    Rolling mean of the daily PM2.5 of the stations with the highest
+    mean.
+
+    Args:
+        df (pd.DataFrame): datetime, station and pm25.
+        stations (int): Stations drawn.
+        window (int): Rolling window in days.
+    Returns:
+        pd.DataFrame: Day x station rolling means, highest station first.
+    """
+    top = _by_mean(df.groupby("station", observed=True)["pm25"].mean())
+    top = top[:stations]
+    daily = (df[df["station"].astype(str).isin(top)]
+             .groupby([df["datetime"].dt.floor("D"),
+                       df["station"].astype(str)])["pm25"]
+             .mean().unstack()[top])
+    return daily.rolling(window, min_periods=1).mean()
+
+
+@figure("h2/pm25_7day_rolling_top4_stations.png",
+        {ENGINEERED: ["datetime", "station", "pm25"]},
+        _rolling_top_stations, stations=4, window=7)
+def rolling_top_stations(rolling: pd.DataFrame, **params):
+    """Rolling daily mean PM2.5 of the most polluted stations."""
+    fig, ax = plt.subplots(figsize=(12, 6))
+    for station in rolling.columns:
+        ax.plot(rolling.index, rolling[station], label=station)
+    ax.set_title(f"{params.get('window', 7)}-day Rolling Mean PM2.5 – "
+                 f"Top {len(rolling.columns)} Stations")
+    ax.set_xlabel("Date")
+    ax.set_ylabel("PM25 (µg/m³)")
+    ax.legend(title="Station")
+    fig.tight_layout()
+    return fig
+
+
+@figure("h2/station_locations_pm25_mean.png",
+        {ENGINEERED: ["station", "latitude", "longitude", "pm25"]},
+        _grouped_mean, by="station",
+        value=["latitude", "longitude", "pm25"])
+def station_map(stations: pd.DataFrame, **params):
+    """Station coordinates sized and coloured by mean PM2.5."""
+    stations = stations.dropna()
+    fig, ax = plt.subplots(figsize=(7, 7))
+    ax.scatter(stations["longitude"], stations["latitude"],
+               s=stations["pm25"] * 3, c=stations["pm25"], cmap="Reds",
+               alpha=0.75, edgecolors="black")
+    for name, row in stations.iterrows():
+        ax.text(row["longitude"] + 0.02, row["latitude"] + 0.02,
+                str(name), fontsize=8)
+    ax.set_title("Station Locations Sized by Mean PM2.5")
+    ax.set_xlabel("Longitude")
+    ax.set_ylabel("Latitude")
+    fig.tight_layout()
+    return fig
+
+
+# ------------------------- H3 (notebook 07) -------------------------
+
+def _weather_grid():
+    """Two-column grid with a panel per weather variable."""
+    rows = (len(WEATHER_VARS) + 1) // 2
+    fig, axes = plt.subplots(rows, 2, figsize=(12, 4 * rows))
+    return fig, axes.flatten()
+
+
+@figure("h3/weather_variable_distributions.png", {ENGINEERED: WEATHER_VARS},
+        _column_bins, bins=40)
+def weather_distributions(hists: dict, **params):
+    """Histogram with a KDE of every weather variable."""
+    fig, axes = _weather_grid()
+    for ax, (var, hist) in zip(axes, hists.items()):
+        _kde_histogram(ax, hist)
+        ax.set_xlabel(var)
+        ax.set_title(f"Distribution of {var}")
+    _hide_unused(axes, len(hists))
+    fig.tight_layout()
+    return fig
+
+
+@figure("h3/weather_variable_boxplots.png", {ENGINEERED: WEATHER_VARS},
+        _box_stats)
+def weather_boxplots(stats: dict, **params):
+    """Box plot of every weather variable."""
+    fig, axes = _weather_grid()
+    for ax, (var, box) in zip(axes, stats.items()):
+        parts = ax.bxp([box], patch_artist=True)
+        for patch in parts["boxes"]:
+            patch.set_facecolor("skyblue")
+        ax.set_xticks([])
+        ax.set_ylabel(var)
+        ax.set_title(f"Distribution of {var}")
+    _hide_unused(axes, len(stats))
+    fig.tight_layout()
+    return fig
+
+
+@figure("h3/pearson_correlation_matrix_pm25_weather.png",
+        {ENGINEERED: ["pm25"] + WEATHER_VARS}, _corr, method="pearson")
+def pearson_matrix(corr: pd.DataFrame, **params):
+    """Pearson correlations of PM2.5 and the weather variables."""
+    fig, ax = plt.subplots(figsize=(8, 6))
+    sns.heatmap(corr, annot=True, cmap="coolwarm", center=0, ax=ax)
+    ax.set_title("Pearson Correlation Matrix (PM2.5 + Weather Variables)")
+    return fig
+
+
+@figure("h3/spearman_correlation_matrix_pm25_weather.png",
+        {ENGINEERED: ["pm25"] + WEATHER_VARS}, _corr, method="spearman")
+def spearman_matrix(corr: pd.DataFrame, **params):
+    """Spearman correlations of PM2.5 and the weather variables."""
+    fig, ax = plt.subplots(figsize=(8, 6))
+    sns.heatmap(corr, annot=True, cmap="viridis", center=0, ax=ax)
+    ax.set_title("Spearman Correlation Matrix (PM2.5 + Weather Variables)")
+    return fig
+
+
+# ------------------------- H4 (notebook 08) -------------------------
+
+def _mean_figure(stats: pd.DataFrame, x: str, title: str, xlabel: str,
+                 bars: bool = False):
+    """Mean PM2.5 per group as a line or bars with 95% intervals."""
+    fig, ax = plt.subplots(figsize=(12, 6))
+    if bars:
+        _mean_bars(ax, stats, x)
+    else:
+        _mean_line(ax, stats, x)
+    ax.set_title(title)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel("Average PM2.5")
+    return fig
+
+
+@figure("h4/pm25_by_hour.png", {CLEANED: ["hour", "pm25"]}, _mean_ci,
+        by=["hour"])
+def pm25_by_hour(stats: pd.DataFrame, **params):
+    """Mean PM2.5 per hour with 95% intervals."""
+    return _mean_figure(stats, "hour", "Average PM2.5 by Hour of Day",
+                        "Hour of Day")
+
+
+def _day_of_week_ci(df: pd.DataFrame, **params) -> pd.DataFrame:
+    """Mean PM2.5 per day name, in order of first appearance."""
+    days = df["datetime"].dt.day_name().rename("day")
+    return _mean_ci(df.assign(day=days), ["day"], sort=False)
+
+
+@figure("h4/pm25_by_day_of_week.png", {CLEANED: ["datetime", "pm25"]},
+        _day_of_week_ci)
+def pm25_by_day_of_week(stats: pd.DataFrame, **params):
+    """Mean PM2.5 per day of the week with 95% intervals."""
+    return _mean_figure(stats, "day", "Average PM2.5 by Day of Week",
+                        "Day of Week", bars=True)
+
+
+@figure("h4/pm25_by_month.png", {CLEANED: ["month", "pm25"]}, _mean_ci,
+        by=["month"])
+def pm25_by_month(stats: pd.DataFrame, **params):
+    """Mean PM2.5 per month with 95% intervals."""
+    return _mean_figure(stats, "month", "Average PM2.5 by Month", "Month")
+
+
+@figure("h4/pm25_by_year.png", {CLEANED: ["year", "pm25"]}, _mean_ci,
+        by=["year"])
+def pm25_by_year(stats: pd.DataFrame, **params):
+    """Mean PM2.5 per year with 95% intervals."""
+    return _mean_figure(stats, "year", "Average PM2.5 by Year", "Year",
+                        bars=True)
+
+
+def _correlograms(df: pd.DataFrame, lags: int = 48, **params) -> dict:
+    """
+    ACF (FFT based) and Yule-Walker PACF of the non-missing PM2.5
+    readings, with their 95% intervals. plot_acf computes the ACF of the
+    400k readings directly, which takes minutes.
+
+    Args:
+        df (pd.DataFrame): Readings in file order.
+        lags (int): Largest lag.
+    Returns:
+        dict: 'acf' and 'pacf' -> (values, confidence interval).
+    """
+    from statsmodels.tsa.stattools import acf, pacf
+
+    pm = df["pm25"].dropna().to_numpy()
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", FutureWarning)
+        return {"acf": acf(pm, nlags=lags, alpha=0.05, fft=True)[:2],
+                "pacf": pacf(pm, nlags=lags, method="ywm", alpha=0.05)}
+
+
+def _correlogram(ax, values: np.ndarray, interval: np.ndarray) -> None:
+    """Draw correlations as stems with the interval band around zero, as
+    statsmodels does."""
+    lags = np.arange(len(values))
+    ax.vlines(lags, 0, values)
+    ax.plot(lags, values, "o")
+    ax.axhline(0, color="black", linewidth=1)
+    ax.fill_between(lags[1:], interval[1:, 0] - values[1:],
+                    interval[1:, 1] - values[1:], alpha=0.25,
+                    linewidth=0)
+
+
+@figure("h4/pm25_acf_pacf.png", {CLEANED: ["pm25"]}, _correlograms,
+        lags=48)
+def pm25_acf_pacf(correlations: dict, **params):
+    """Autocorrelation and partial autocorrelation of PM2.5."""
+    fig, axes = plt.subplots(2, 1, figsize=(12, 10))
+    _correlogram(axes[0], *correlations["acf"])
+    axes[0].set_title("Autocorrelation Function (ACF)")
+    _correlogram(axes[1], *correlations["pacf"])
+    axes[1].set_title("Partial Autocorrelation Function (PACF)")
+    for ax in axes:
+        ax.set_xlabel("Lags")
+        ax.set_ylabel("Correlation")
+    fig.tight_layout()
+    return fig
+
+
+# ------------------------- Models (notebooks 09-11) -------------------------
+
+def _first(predictions: dict, keys: list, rows: int, **params) -> dict:
+    """The first rows of each prediction array."""
+    return {key: predictions[key][:rows] for key in keys}
+
+
+@figure("h5/pm25_actual_vs_predicted_comparison.png",
+        {H5_PREDICTIONS: None}, _first,
+        keys=["y_true", "baseline_pred", "l_pred"], rows=300)
+def h5_actual_vs_predicted(series: dict, **params):
+    """Actual PM2.5 against the H5 model predictions."""
+    fig, ax = plt.subplots(figsize=(14, 6))
+    ax.plot(series["y_true"], label="Actual", linewidth=2, color="green")
+    ax.plot(series["baseline_pred"], label="Baseline Prediction",
+            alpha=0.8, color="blue")
+    ax.plot(series["l_pred"], label="Lag Model Prediction", alpha=0.8,
+            color="orange")
+    ax.set_title("PM2.5: Actual vs Predicted")
+    ax.set_xlabel("Time Index (sample)")
+    ax.set_ylabel("PM2.5")
+    ax.legend()
+    return fig
+
+
+@figure("h5/lag_model_feature_importances.png",
+        {"model_outputs/h5/feature_importances.csv": None}, _identity)
+def h5_feature_importances(fi: pd.DataFrame):
+    """Feature importances of the lag model."""
+    top = fi.set_index("feature")["importance"].sort_values(
+        ascending=False).head(15)
+    fig, ax = plt.subplots(figsize=(10, 8))
+    top.plot(kind="bar", ax=ax)
+    ax.set_title("Top 15 Feature Importances – Lag Model")
+    ax.set_ylabel("Importance")
+    fig.tight_layout()
+    return fig
+
+
+@figure("modelling/model_performance_comparison.png",
+        {"model_outputs/regression/hyperparameter_results.csv":
+         ["Model", "MAE", "RMSE", "R2"]}, _identity)
+def model_performance(results: pd.DataFrame):
+    """MAE, RMSE and R² of every regression model."""
+    fig, ax = plt.subplots(figsize=(12, 6))
+    for metric in ["MAE", "RMSE", "R2"]:
+        ax.plot(results["Model"], results[metric], marker="o", label=metric)
+    ax.set_title("Model Comparison: MAE, RMSE, and R²")
+    ax.set_xlabel("Model")
+    ax.set_ylabel("Metric Value")
+    ax.tick_params(axis="x", rotation=45)
+    ax.legend()
+    ax.grid(alpha=0.3)
+    fig.tight_layout()
+    return fig
+
+
+@figure("modelling/rmse_ranked_models.png",
+        {"model_outputs/regression/hyperparameter_results.csv":
+         ["Model", "RMSE"]}, _identity)
+def rmse_ranked(results: pd.DataFrame):
+    """Regression models ranked by RMSE."""
+    fig, ax = plt.subplots(figsize=(10, 6))
+    sns.barplot(data=results.sort_values("RMSE"), x="Model", y="RMSE",
+                ax=ax)
+    ax.set_title("RMSE by Model (Lower is Better)")
+    ax.set_ylabel("RMSE")
+    ax.tick_params(axis="x", rotation=45)
+    fig.tight_layout()
+    return fig
+
+
+def _best_residuals(predictions: dict, **params) -> np.ndarray:
+    """Residuals of the best model over the whole test set."""
+    return np.asarray(predictions["y_true"], dtype="float64") \
+        - predictions["normal_preds"]
+
+
+def _best_hexbins(predictions: dict, kind: str, **params) -> dict:
+    """Hexagon counts of the best model's predictions (kind 'prediction')
+    or residuals (kind 'residual') over the whole test set."""
+    actual = np.asarray(predictions["y_true"], dtype="float64")
+    predicted = np.asarray(predictions["normal_preds"], dtype="float64")
+    high = float(max(actual.max(), predicted.max()))
+    if kind == "prediction":
+        return hexbin(actual, predicted, (0.0, high, 0.0, high))
+    residuals = actual - predicted
+    return hexbin(predicted, residuals,
+                  (0.0, high, *residual_range(residuals)))
+
+
+def _draw_hexbin(ax, bins: dict):
+    """Draw precomputed hexagon counts on a log colour scale."""
+    art = ax.hexbin(bins["x"], bins["y"], C=bins["counts"],
+                    reduce_C_function=np.sum, gridsize=bins["gridsize"],
+                    extent=bins["extent"], bins="log", cmap="viridis")
+    ax.figure.colorbar(art, ax=ax, label="Rows")
+
+
+@figure("modelling/predicted_vs_actual_best_model.png",
+        {REGRESSION_PREDICTIONS: None}, _best_hexbins, kind="prediction")
+def predicted_vs_actual(bins: dict, **params):
+    """Hexbin of predicted against actual PM2.5 for the best model."""
+    fig, ax = plt.subplots(figsize=(10, 6))
+    _draw_hexbin(ax, bins)
+    low, high = bins["extent"][:2]
+    ax.plot([low, high], [low, high], color="red", linestyle="--")
+    ax.set_xlabel("Actual PM2.5")
+    ax.set_ylabel("Predicted PM2.5")
+    ax.set_title("Predicted vs Actual – Best Model")
+    ax.grid(alpha=0.3)
+    fig.tight_layout()
+    return fig
+
+
+@figure("modelling/residual_distribution.png",
+        {REGRESSION_PREDICTIONS: None}, _best_residuals)
+def residual_distribution(residuals: np.ndarray, **params):
+    """Histogram of the best model's residuals."""
+    fig, ax = plt.subplots(figsize=(10, 6))
+    sns.histplot(residuals, kde=True, bins=40, ax=ax)
+    ax.set_title("Residual Distribution – Best Model")
+    ax.set_xlabel("Residual (Actual – Predicted)")
+    fig.tight_layout()
+    return fig
+
+
+@figure("modelling/residuals_vs_predicted.png",
+        {REGRESSION_PREDICTIONS: None}, _best_hexbins, kind="residual")
+def residuals_vs_predicted(bins: dict, **params):
+    """Hexbin of the best model's residuals against its predictions."""
+    fig, ax = plt.subplots(figsize=(10, 6))
+    _draw_hexbin(ax, bins)
+    ax.axhline(0, color="red", linestyle="--")
+    ax.set_xlabel("Predicted PM2.5")
+    ax.set_ylabel("Residual")
+    ax.set_title("Residuals vs Predicted Values – Best Model")
+    ax.grid(alpha=0.3)
+    fig.tight_layout()
+    return fig
+
+
+@figure("modelling/feature_importance_best_model.png",
+        {"model_outputs/regression/feature_importances.csv": None},
+        _identity)
+def best_feature_importances(fi: pd.DataFrame):
+    """Top 15 feature importances of the best model."""
+    top = fi.set_index("feature")["importance"].sort_values().tail(15)
+    fig, ax = plt.subplots(figsize=(10, 8))
+    top.plot(kind="barh", ax=ax)
+    ax.set_title("Top 15 Feature Importances – Best Model")
+    ax.set_xlabel("Importance")
+    fig.tight_layout()
+    return fig
+
+
+# ------------------------- Clustering (notebook 10) -------------------------
+
+@figure("clustering/k_selection_elbow_silhouette.png",
+        {"model_outputs/clustering/k_selection.csv": None}, _identity)
+def k_selection(scores: pd.DataFrame):
+    """Inertia and silhouette score per k, with the detected elbow."""
+    elbow = scores.loc[scores["elbow"].astype(bool)]
+    fig, (left, right) = plt.subplots(1, 2, figsize=(14, 5))
+    left.plot(scores["k"], scores["inertia"], marker="o")
+    left.set_title("Elbow Method")
+    left.set_ylabel("Inertia")
+    right.plot(scores["k"], scores["silhouette"], marker="o")
+    right.set_title("Silhouette Score by k")
+    right.set_ylabel("Silhouette Score")
+    for _, row in elbow.iterrows():
+        left.scatter(row["k"], row["inertia"], color="red", s=140,
+                     edgecolor="black", zorder=5)
+        left.text(row["k"] + 0.1, row["inertia"], f"k={row['k']:.0f}",
+                  color="red")
+        for ax in (left, right):
+            ax.axvline(row["k"], color="red", linestyle="--", linewidth=2)
+    for ax in (left, right):
+        ax.set_xlabel("Number of clusters (k)")
+    fig.tight_layout()
+    return fig
+
+
+@figure("clustering/pm25_by_cluster.png", {CLUSTERED: ["cluster", "pm25"]},
+        _box_stats, by="cluster")
+def pm25_by_cluster(stats: dict, **params):
+    """PM2.5 box plot per cluster."""
+    fig, ax = plt.subplots(figsize=(10, 6))
+    ax.bxp(list(stats.values()), patch_artist=True)
+    ax.set_title("PM2.5 Distribution by Cluster")
+    ax.set_xlabel("Cluster")
+    ax.set_ylabel("PM2.5")
+    return fig
+
+
+@figure("clustering/silhouette_plot.png",
+        {"model_outputs/clustering/silhouette_values.csv": None}, _identity)
+def silhouette_plot(sil: pd.DataFrame):
+    """Silhouette coefficients of every point, per cluster."""
+    k = sil["cluster"].nunique()
+    y_lower = 10
+    fig, ax = plt.subplots(figsize=(10, 8))
+    for i in range(k):
+        values = np.sort(sil.loc[sil["cluster"] == i, "silhouette"]
+                         .to_numpy())
+        y_upper = y_lower + len(values)
+        color = matplotlib.colormaps["nipy_spectral"](float(i) / k)
+        ax.fill_betweenx(np.arange(y_lower, y_upper), 0, values,
+                         facecolor=color, edgecolor=color, alpha=0.7)
+        ax.text(-0.05, y_lower + 0.5 * len(values), str(i))
+        y_lower = y_upper + 10
+    ax.set_title(f"Silhouette Plot for K = {k}")
+    ax.set_xlabel("Silhouette Coefficient")
+    ax.set_ylabel("Cluster Label")
+    ax.axvline(x=sil["silhouette"].mean(), color="red", linestyle="--")
+    return fig
+
+
+def _pca_sample(coords: np.ndarray, clustered: pd.DataFrame,
+                rows: int = SAMPLE_ROWS, **params) -> pd.DataFrame:
+    """A fixed sample of PCA coordinates with their clusters."""
+    df = pd.DataFrame({"PC1": coords[:, 0], "PC2": coords[:, 1],
+                       "cluster": clustered["cluster"].astype(str)})
+    return _sample(df, rows)
+
+
+@figure("clustering/pca_clusters.png",
+        {"model_outputs/clustering/pca_coords.npy": None,
+         CLUSTERED: ["cluster"]}, _pca_sample)
+def pca_clusters(sample: pd.DataFrame, **params):
+    """PCA projection of a sample of points, coloured by cluster."""
+    fig, ax = plt.subplots(figsize=(10, 7))
+    sns.scatterplot(data=sample, x="PC1", y="PC2", hue="cluster",
+                    palette="tab10", alpha=0.6, ax=ax)
+    ax.set_title("PCA Projection of Clusters")
+    ax.set_xlabel("PC1")
+    ax.set_ylabel("PC2")
+    return fig
+
+
+# ------------------------- Build -------------------------
+
+def _load(path: Path, columns: list = None):
+    """
+    Read an input: CSV columns (datetime parsed, text as category), a
+    stored predictions folder, an .npz archive as a dict or an .npy
+    array.
+
+    Args:
+        path (Path): Input file.
+        columns (list): CSV columns, None for all.
+    Returns:
+        pd.DataFrame | PredictionStore | dict | np.ndarray: Loaded input.
+    """
+    if path.is_dir():
+        return load_predictions(path)
+    if path.suffix == ".npz":
+        with np.load(path) as data:
+            return dict(data)
+    if path.suffix == ".npy":
+        return np.load(path)
+    df = pd.read_csv(path, usecols=columns)
+    if "datetime" in df.columns:
+        df["datetime"] = pd.to_datetime(df["datetime"])
+    for col in df.select_dtypes(include=["object", "string"]).columns:
+        df[col] = df[col].astype("category")
+    return df
+
+
+def _digest(value) -> str:
+    """
+    Content hash of prepared figure data.
+
+    Args:
+        value: DataFrame, Series, array, scalar or dict/list of them.
+    Returns:
+        str: SHA-256 hex digest.
+    """
+    sha = hashlib.sha256()
+
+    def feed(item):
+        if isinstance(item, (pd.DataFrame, pd.Series)):
+            labels = (item.columns if isinstance(item, pd.DataFrame)
+                      else item.name)
+            sha.update(repr(labels).encode())
+            sha.update(pd.util.hash_pandas_object(item).to_numpy()
+                       .tobytes())
+        elif isinstance(item, np.ndarray):
+            sha.update(np.ascontiguousarray(item).tobytes())
+        elif isinstance(item, dict):
+            for key in item:
+                sha.update(repr(key).encode())
+                feed(item[key])
+        elif isinstance(item, (list, tuple)):
+            for element in item:
+                feed(element)
+        else:
+            sha.update(repr(item).encode())
+
+    feed(value)
+    return sha.hexdigest()
+
+
+def _init_worker() -> None:
+    """Apply the notebooks' plot style in a pool worker."""
+    plt.style.use("seaborn-v0_8")
+    sns.set_theme()
+
+
+def render(spec: StaticFigure, data, output: Path) -> float:
+    """
+    Draw a figure and save it. Runs in a pool worker.
+
+    Args:
+        spec (StaticFigure): Figure to draw.
+        data: Prepared data.
+        output (Path): File to write.
+    Returns:
+        float: Seconds taken.
+    """
+    start = time.perf_counter()
+    fig = spec.draw(data, **spec.params)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    fig.savefig(output)
+    plt.close(fig)
+    return time.perf_counter() - start
+
+
+def build(names: list = None, output: Path = FIGURES_PATH,
+          workers: int = None, force: bool = False,
+          state_path: Path = STATE_PATH) -> dict:
+    """
+    Render the figures whose inputs, parameters or code changed.
+
+    Args:
+        names (list): Figure paths or folders (e.g. 'h1') to build, None
+            for every figure.
+        output (Path): Figures folder.
+        workers (int): Pool size, defaults to the CPU count.
+        force (bool): Render even if nothing changed.
+        state_path (Path): File recording what each figure was built
+            from.
+    Returns:
+        dict: Figure path -> 'rendered', 'current', 'unchanged data' or
+        'missing input'.
+    Raises:
+        Exception: The first failed render, after the state of every
+        finished figure is recorded.
+    """
+    output = Path(output)
+    specs = [spec for path, spec in FIGURES.items()
+             if not names or any(path == n or path.startswith(f"{n}/")
+                                 for n in names)]
+    state = read_metadata(state_path)
+    records = state.setdefault(str(output), {})
+    status, pending = {}, []
+
+    for spec in specs:
+        inputs = {ROOT / p: cols for p, cols in spec.inputs.items()}
+        if not all(path.exists() for path in inputs):
+            status[spec.path] = "missing input"
+            continue
+        record = records.get(spec.path, {})
+        target = output / spec.path
+        same_recipe = (record.get("code") == spec.code_hash()
+                       and record.get("params") == spec.params
+                       and unchanged(target, record.get("output")))
+        if not force and same_recipe and all(
+                unchanged(path, record.get("inputs", {}).get(
+                    path.relative_to(ROOT).as_posix()))
+                for path in inputs):
+            status[spec.path] = "current"
+            continue
+        pending.append((spec, inputs, record, same_recipe))
+
+    # Read each input once, with the columns of every pending figure
+    columns = {}
+    for _, inputs, _, _ in pending:
+        for path, cols in inputs.items():
+            if cols is None or columns.get(path, []) is None:
+                columns[path] = None
+            else:
+                columns[path] = list(dict.fromkeys(
+                    columns.get(path, []) + cols))
+    loaded = {path: _load(path, cols) for path, cols in columns.items()}
+
+    jobs = {}
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(),
+                             initializer=_init_worker) as pool:
+        for spec, inputs, record, same_recipe in pending:
+            args = [loaded[path][cols] if cols is not None
+                    else loaded[path] for path, cols in inputs.items()]
+            data = spec.prepare(*args, **spec.params)
+            digest = _digest(data)
+            entry = {"inputs": {path.relative_to(ROOT).as_posix():
+                                fingerprint(path) for path in inputs},
+                     "params": spec.params, "code": spec.code_hash(),
+                     "data": digest}
+            if not force and same_recipe and record.get("data") == digest:
+                entry["output"] = record["output"]
+                records[spec.path] = entry
+                status[spec.path] = "unchanged data"
+                continue
+            future = pool.submit(render, spec, data, output / spec.path)
+            jobs[future] = (spec, entry)
+
+        errors = []
+        for future, (spec, entry) in jobs.items():
+            try:
+                seconds = future.result()
+            except Exception as error:  # recorded, raised once saved
+                errors.append(error)
+                print(f"Failed {spec.path}: {error!r}")
+                continue
+            entry["output"] = fingerprint(output / spec.path)
+            records[spec.path] = entry
+            status[spec.path] = "rendered"
+            print(f"Rendered {spec.path} in {seconds:.1f} s")
+            if output.resolve() == FIGURES_PATH.resolve():
+                optimise(spec.path)  # Web copies served by the pages
+
+    Path(state_path).parent.mkdir(parents=True, exist_ok=True)
+    with open(state_path, "w", encoding="utf-8") as f:
+        yaml.safe_dump(state, f, sort_keys=False)
+    if errors:
+        raise errors[0]
+    return status
+
+
+def parse_args(argv: list = None) -> argparse.Namespace:
+    """
+    Parse command line arguments.
+
+    Args:
+        argv (list): Arguments, defaults to sys.argv.
+    Returns:
+        argparse.Namespace: Parsed arguments.
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m utils.static_figures",
+        description="Render the static notebook figures in parallel.")
+    parser.add_argument("--only", nargs="+", metavar="FIGURE",
+                        help="figure files or folders, e.g. h1 eda")
+    parser.add_argument("--output", type=Path, default=FIGURES_PATH,
+                        help="figures folder")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--force", action="store_true",
+                        help="render even if nothing changed")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    start = time.perf_counter()
+    status = build(args.only, args.output, args.workers, args.force)
+    for path, result in status.items():
+        if result == "missing input":
+            print(f"Skipped {path}: input missing")
+    counts = {s: list(status.values()).count(s) for s in set(status.values())}
+    print(f"{len(status)} figures in {time.perf_counter() - start:.1f} s:",
+          ", ".join(f"{n} {s}" for s, n in sorted(counts.items())))
@@ -0,0 +1,266 @@
+"""
+Dense station x time x variable representation of the hourly data.
+The engineered data is a regular hourly grid, so it can be held as one
+float32 array with a shared time axis and NaN for gaps. Station
+cross-sections and variables are views, time ranges are index arithmetic
+and lags are slices, with no groupby, sort or boolean mask.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def lag(values: np.ndarray, hours: int) -> np.ndarray:
+    """
+    Shift values forward in time along the last axis.
+
+    Args:
+        values (np.ndarray): (..., T) array.
+        hours (int): Lag in time steps.
+    Returns:
+        np.ndarray: float32 array where out[..., t] = values[..., t - hours]
+        and the first hours steps are NaN.
+    """
+    out = np.full(values.shape, np.nan, dtype="float32")
+    if hours < values.shape[-1]:
+        out[..., hours:] = values[..., :values.shape[-1] - hours]
+    return out
+
+
+def rolling_mean(values: np.ndarray, window: int,
+                 shift: int = 0) -> np.ndarray:
+    """
+    Trailing mean over a window along the last axis, NaN unless every
+    value in the window is present (as pandas rolling(window).mean()).
+
+    Args:
+        values (np.ndarray): (..., T) array.
+        window (int): Window length in time steps.
+        shift (int): Lag applied before the window, e.g. 1 to exclude the
+            current step.
+    Returns:
+        np.ndarray: float32 array of window means.
+    """
+    values = lag(values, shift) if shift else values
+    missing = np.isnan(values)
+
+    # Cumulative sums with a leading zero give window sums by difference
+    pad = [(0, 0)] * (values.ndim - 1) + [(1, 0)]
+    sums = np.pad(np.cumsum(np.where(missing, 0.0, values), axis=-1,
+                            dtype="float64"), pad)
+    gaps = np.pad(np.cumsum(missing, axis=-1), pad)
+
+    out = np.full(values.shape, np.nan, dtype="float32")
+    total = sums[..., window:] - sums[..., :-window]
+    complete = (gaps[..., window:] - gaps[..., :-window]) == 0
+    out[..., window - 1:] = np.where(complete, total / window, np.nan)
+    return out
+
+
+def forward_fill(values: np.ndarray) -> np.ndarray:
+    """
+    Forward fill NaN along the last axis.
+
+    Args:
+        values (np.ndarray): (..., T) array.
+    Returns:
+        np.ndarray: Filled copy; leading NaN stay NaN.
+    """
+    valid = ~np.isnan(values)
+    index = np.where(valid, np.arange(values.shape[-1]), 0)
+    np.maximum.accumulate(index, axis=-1, out=index)
+    return np.take_along_axis(values, index, axis=-1)
+
+
+class StationTensor:
+    """
+    Hourly values of several variables for every station on a shared,
+    regular time axis.
+    """
+
+    def __init__(self, values: np.ndarray, stations: list,
+                 start: pd.Timestamp, variables: list,
+                 freq: str = "h", static: pd.DataFrame = None):
+        """
+        Args:
+            values (np.ndarray): (stations, times, variables) float32.
+            stations (list): Station names, in axis order.
+            start (pd.Timestamp): Time of the first step.
+            variables (list): Variable names, in axis order.
+            freq (str): Step of the time axis.
+            static (pd.DataFrame): Per-station attributes (e.g. area_type)
+                indexed by station.
+        """
+        self.values = values
+        self.stations = list(stations)
+        self.start = pd.Timestamp(start)
+        self.variables = list(variables)
+        self.freq = freq
+        self.step = pd.Timedelta(1, unit=freq)
+        self.static = static
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, variables: list,
+                   static: list = (), freq: str = "h") -> "StationTensor":
+        """
+        Scatter a long frame onto the dense grid.
+
+        Args:
+            df (pd.DataFrame): Rows with 'station', 'datetime' and the
+                variables; duplicate (station, datetime) keep the last.
+            variables (list): Numeric columns to hold.
+            static (list): Per-station constant columns to keep.
+            freq (str): Step of the time axis.
+        Returns:
+            StationTensor: Dense representation.
+        """
+        station = df["station"].astype("category")
+        stations = list(station.cat.categories.astype(str))
+        times = pd.DatetimeIndex(df["datetime"])
+        start = times.min().floor(freq)
+        step = pd.Timedelta(1, unit=freq)
+        t_index = ((times - start) // step).to_numpy()
+
+        values = np.full((len(stations), int(t_index.max()) + 1,
+                          len(variables)), np.nan, dtype="float32")
+        values[station.cat.codes.to_numpy(), t_index] = \
+            df[list(variables)].to_numpy("float32")
+
+        attrs = None
+        if static:
+            attrs = (df[list(static)].groupby(station, observed=True)
+                       .first())
+            attrs.index = attrs.index.astype(str)
+        return cls(values, stations, start, variables, freq, attrs)
+
+    @property
+    def times(self) -> pd.DatetimeIndex:
+        """Timestamps of the time axis."""
+        return pd.date_range(self.start, periods=self.values.shape[1],
+                             freq=self.freq)
+
+    def time_index(self, timestamp: pd.Timestamp) -> int:
+        """
+        Position of a timestamp on the time axis (not bounds checked).
+
+        Args:
+            timestamp (pd.Timestamp): Timestamp.
+        Returns:
+            int: Time index.
+        """
+        return int((pd.Timestamp(timestamp) - self.start) // self.step)
+
+    def station(self, name: str) -> np.ndarray:
+        """
+        (times, variables) view of one station.
+
+        Args:
+            name (str): Station name.
+        Returns:
+            np.ndarray: View into values.
+        """
+        return self.values[self.stations.index(name)]
+
+    def variable(self, name: str) -> np.ndarray:
+        """
+        (stations, times) view of one variable.
+
+        Args:
+            name (str): Variable name.
+        Returns:
+            np.ndarray: View into values.
+        """
+        return self.values[:, :, self.variables.index(name)]
+
+    def between(self, start: pd.Timestamp = None,
+                end: pd.Timestamp = None) -> "StationTensor":
+        """
+        Time range as a view, both ends inclusive.
+
+        Args:
+            start (pd.Timestamp): First timestamp, None for the beginning.
+            end (pd.Timestamp): Last timestamp, None for the end.
+        Returns:
+            StationTensor: Tensor sharing memory with this one.
+        """
+        n = self.values.shape[1]
+        i0 = 0 if start is None else min(max(self.time_index(start), 0), n)
+        i1 = n if end is None else min(max(self.time_index(end) + 1, i0),
+                                       n)
+        return StationTensor(self.values[:, i0:i1], self.stations,
+                             self.start + i0 * self.step, self.variables,
+                             self.freq, self.static)
+
+    def last_valid(self, variable: str) -> np.ndarray:
+        """
+        Time index of each station's last value of a variable.
+
+        Args:
+            variable (str): Variable name.
+        Returns:
+            np.ndarray: int array per station, -1 when it has no values.
+        """
+        valid = ~np.isnan(self.variable(variable))
+        last = valid.shape[1] - 1 - np.argmax(valid[:, ::-1], axis=1)
+        return np.where(valid.any(axis=1), last, -1)
+
+    def groups(self, variable: str, by: str = None) -> dict:
+        """
+        Non-missing values of a variable per station, or per value of a
+        static attribute.
+
+        Args:
+            variable (str): Variable name.
+            by (str): Static attribute to group stations by, None to group
+                by station.
+        Returns:
+            dict: Group -> 1-D array of values.
+        """
+        rows = self.variable(variable)
+        keys = (self.stations if by is None
+                else self.static.loc[self.stations, by].astype(str))
+        groups = {}
+        for key, row in zip(keys, rows):
+            groups.setdefault(key, []).append(row[~np.isnan(row)])
+        return {key: np.concatenate(parts) for key, parts in groups.items()}
+
+    def positions(self, df: pd.DataFrame) -> tuple:
+        """
+        Grid positions of the rows of a long frame.
+
+        Args:
+            df (pd.DataFrame): Rows with 'station' and 'datetime'.
+        Returns:
+            tuple: (station index, time index) arrays, usable to gather
+            tensor values back onto the frame.
+        """
+        s_index = pd.Categorical(df["station"].astype(str),
+                                 categories=self.stations).codes
+        t_index = ((pd.DatetimeIndex(df["datetime"]) - self.start)
+                   // self.step).to_numpy()
+        return s_index, t_index
+
+    def to_frame(self, dropna: bool = True) -> pd.DataFrame:
+        """
+        Convert back to a long frame sorted by station then datetime.
+
+        Args:
+            dropna (bool): Drop grid cells where every variable is NaN.
+        Returns:
+            pd.DataFrame: 'station', 'datetime', the variables and the
+            static attributes.
+        """
+        n_stations, n_times, _ = self.values.shape
+        df = pd.DataFrame(
+            self.values.reshape(n_stations * n_times, -1),
+            columns=self.variables)
+        df.insert(0, "station", pd.Categorical.from_codes(
+            np.repeat(np.arange(n_stations), n_times), self.stations))
+        df.insert(1, "datetime", np.tile(self.times, n_stations))
+
+        if self.static is not None:
+            for col in self.static.columns:
+                df[col] = df["station"].map(self.static[col])
+        if dropna:
+            df = df[~np.isnan(self.values).all(axis=2).ravel()]
+        return df.reset_index(drop=True)
@@ -0,0 +1,460 @@
+"""
+Synthetic Beijing-style station data for stress testing.
+Generates hourly station files with the schema of data/raw/*.csv and a
+matching station_metadata.csv at a configurable multiple of the shipped
+data (12 stations x 4 years). Stations share regional weather and
+pollution episodes and add local autocorrelated noise, with seasonal and
+diurnal cycles, weather-coupled PM2.5 and gaps in the same proportions as
+the raw files.
+The raw files are then run through the ingest, cleaning and feature
+engineering stages into the combined, cleaned and engineered datasets of
+the same tree, so the benchmarks (--data-root) and the dashboard
+(DASHBOARD_DATA_ROOT) can read it in place of data/.
+
+Usage:
+    python -m utils.synthetic_data --scale 10
+    python -m utils.synthetic_data --scale 1000 --years 40 --workers 8
+    python -m utils.synthetic_data --scale 100 --raw-only
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import argparse
+import os
+import numpy as np
+import pandas as pd
+from scipy.signal import lfilter
+from utils.cleaning import CHUNK_ROWS, clean_dataset
+from utils.column_stats import DatasetStats
+from utils.feature_engineering import add_engineered_features
+from utils.ingest import ingest
+from utils.metadata_builder import MetadataBuilder
+
+ROOT = Path(__file__).parent.parent
+SYNTHETIC_PATH = ROOT / "data" / "synthetic"
+
+BASE_STATIONS = 12  # Stations in the shipped data
+BASE_YEARS = 4  # Years in the shipped data
+START = "2013-03-01"  # First hour of the shipped data
+
+RAW_COLUMNS = ["No", "year", "month", "day", "hour", "PM2.5", "PM10", "SO2",
+               "NO2", "CO", "O3", "TEMP", "PRES", "DEWP", "RAIN", "wd",
+               "WSPM", "station"]
+
+WIND_DIRECTIONS = ["N", "NNE", "NE", "ENE", "E", "ESE", "SE", "SSE",
+                   "S", "SSW", "SW", "WSW", "W", "WNW", "NW", "NNW"]
+
+# Share of missing values per column, matching the raw files
+MISSING_RATES = {"PM2.5": 0.021, "PM10": 0.016, "SO2": 0.019,
+                 "NO2": 0.046, "CO": 0.091, "O3": 0.019, "TEMP": 0.001,
+                 "PRES": 0.001, "DEWP": 0.001, "RAIN": 0.001,
+                 "wd": 0.002, "WSPM": 0.001}
+MEAN_GAP_HOURS = 8  # Average length of a run of missing values
+
+# Beijing city centre and the typical log PM2.5 level per area type
+CENTRE = (39.9042, 116.4074)
+AREA_LEVEL = {"urban": 4.05, "residential": 4.00, "suburban": 3.85}
+
+# Regional signals shared by every station, built once per process
+_regional = None
+
+
+def ar1(rng: np.random.Generator, n: int, phi: float,
+        sigma: float) -> np.ndarray:
+    """
+    First-order autoregressive noise.
+
+    Args:
+        rng (np.random.Generator): Random generator.
+        n (int): Number of values.
+        phi (float): Lag-1 autocorrelation.
+        sigma (float): Innovation standard deviation.
+    Returns:
+        np.ndarray: float64 series.
+    """
+    return lfilter([1.0], [1.0, -phi], rng.normal(0.0, sigma, n))
+
+
+def hourly_index(start: str, years: int) -> pd.DatetimeIndex:
+    """
+    Hourly timestamps covering a number of years.
+
+    Args:
+        start (str): First timestamp.
+        years (int): Years to cover.
+    Returns:
+        pd.DatetimeIndex: Hourly index, end exclusive.
+    """
+    start = pd.Timestamp(start)
+    end = start + pd.DateOffset(years=years)
+    return pd.date_range(start, end, freq="h", inclusive="left")
+
+
+def regional_signals(index: pd.DatetimeIndex, seed: int) -> dict:
+    """
+    Weather and pollution signals shared by all stations: seasonal and
+    diurnal cycles plus slow synoptic anomalies.
+
+    Args:
+        index (pd.DatetimeIndex): Hourly timestamps.
+        seed (int): Random seed.
+    Returns:
+        dict: Name -> float64 array aligned with the index.
+    """
+    rng = np.random.default_rng([seed, 0])
+    n = len(index)
+    doy = index.dayofyear.to_numpy()
+    hour = index.hour.to_numpy()
+
+    season = np.cos(2 * np.pi * (doy - 200) / 365.25)  # +1 mid-July
+    spring = np.exp(-((doy - 105) / 25.0) ** 2)  # April dust season
+    diurnal = np.cos(2 * np.pi * (hour - 15) / 24)  # +1 at 15:00
+
+    return {
+        "season": season,
+        "spring": spring,
+        "diurnal": diurnal,
+        "night": np.cos(2 * np.pi * (hour - 22) / 24),  # +1 at 22:00
+        "rush": (np.exp(-((hour - 8) / 1.5) ** 2)
+                 + np.exp(-((hour - 19) / 2.0) ** 2)),
+        "temp": ar1(rng, n, 0.98, 0.4),
+        "pres": ar1(rng, n, 0.995, 0.35),
+        "spread": ar1(rng, n, 0.97, 0.8),
+        "wind": ar1(rng, n, 0.95, 0.15),
+        "angle": ar1(rng, n, 0.97, 12.0),
+        "pm": ar1(rng, n, 0.97, 0.2),
+        "rain": rng.random(n),
+    }
+
+
+def _init_worker(start: str, years: int, seed: int) -> None:
+    """
+    Build the regional signals once in each worker process.
+
+    Args:
+        start (str): First timestamp.
+        years (int): Years to cover.
+        seed (int): Random seed.
+    """
+    global _regional
+    index = hourly_index(start, years)
+    _regional = (index, regional_signals(index, seed))
+
+
+def station_table(n_stations: int, seed: int) -> pd.DataFrame:
+    """
+    Synthetic station metadata around Beijing.
+
+    Args:
+        n_stations (int): Number of stations.
+        seed (int): Random seed.
+    Returns:
+        pd.DataFrame: station, latitude, longitude and area_type columns,
+        as in station_metadata.csv.
+    """
+    rng = np.random.default_rng([seed, 1])
+    lat = CENTRE[0] + rng.normal(0.0, 0.18, n_stations)
+    lon = CENTRE[1] + rng.normal(0.0, 0.22, n_stations)
+
+    # Area type from the distance to the centre (approximate km)
+    km = np.hypot((lat - CENTRE[0]) * 111, (lon - CENTRE[1]) * 85)
+    area = np.where(km < 12, "urban",
+                    np.where(km < 20, "residential", "suburban"))
+
+    return pd.DataFrame({
+        "station": [f"synth{i:05d}" for i in range(1, n_stations + 1)],
+        "latitude": lat.round(6),
+        "longitude": lon.round(6),
+        "area_type": area,
+    })
+
+
+def _gaps(rng: np.random.Generator, n: int, rate: float) -> np.ndarray:
+    """
+    Mask of missing values occurring in runs, like sensor outages.
+
+    Args:
+        rng (np.random.Generator): Random generator.
+        n (int): Number of values.
+        rate (float): Share of values to mask.
+    Returns:
+        np.ndarray: Boolean mask.
+    """
+    mask = np.zeros(n, dtype=bool)
+    n_gaps = rng.poisson(rate * n / MEAN_GAP_HOURS)
+    starts = rng.integers(0, n, n_gaps)
+    lengths = rng.geometric(1 / MEAN_GAP_HOURS, n_gaps)
+    for s, length in zip(starts, lengths):
+        mask[s:s + length] = True
+    return mask
+
+
+def generate_station(station: dict, seed: int,
+                     regional: tuple = None) -> pd.DataFrame:
+    """
+    Generate the hourly raw records of one station.
+
+    Args:
+        station (dict): Row of station_table.
+        seed (int): Random seed of the run.
+        regional (tuple): (index, signals) from regional_signals; defaults
+            to the signals built by the worker initialiser.
+    Returns:
+        pd.DataFrame: Records in the data/raw/*.csv schema.
+    """
+    index, r = regional or _regional
+    number = int(station["station"][5:])
+    rng = np.random.default_rng([seed, 2, number])
+    n = len(index)
+    urban = station["area_type"] != "suburban"
+
+    # Weather: regional cycles and anomalies plus local noise
+    temp = (13.0 + 15.0 * r["season"] + 4.0 * r["diurnal"] + r["temp"]
+            + ar1(rng, n, 0.9, 0.3) + (0.8 if urban else 0.0))
+    pres = (1012.0 - 11.0 * r["season"] + r["pres"]
+            - 0.3 * r["temp"] + rng.normal(0.0, 0.3, n))
+    spread = np.clip(9.0 - 3.0 * r["season"] + 3.0 * r["diurnal"]
+                     + r["spread"] + ar1(rng, n, 0.8, 0.4), 0.0, 40.0)
+    dewp = temp - spread
+    wspm = np.exp(np.log(1.5) + 0.3 * r["spring"] + 0.2 * r["diurnal"]
+                  + r["wind"] + ar1(rng, n, 0.8, 0.15))
+    wspm = wspm * (0.8 if urban else 1.1)
+
+    # Rain: shared events, more likely in summer and when humid
+    p_rain = (0.01 + 0.06 * np.clip(r["season"], 0, None)) \
+        * np.exp(-spread / 6)
+    rain = np.where(r["rain"] < p_rain,
+                    rng.exponential(2.0, n), 0.0)
+
+    # Wind direction: NW in winter, SE/SW in summer
+    angle = (315.0 - 135.0 * (r["season"] + 1) / 2 + r["angle"]
+             + rng.normal(0.0, 30.0, n)) % 360
+    wd = np.array(WIND_DIRECTIONS)[
+        np.round(angle / 22.5).astype(int) % 16]
+
+    # PM2.5: lognormal, winter and night peaks, dispersed by wind and
+    # washed out by rain, with regional episodes
+    log_pm = (AREA_LEVEL[station["area_type"]] + rng.normal(0.0, 0.08)
+              - 0.45 * r["season"] + 0.15 * r["night"] + r["pm"]
+              + ar1(rng, n, 0.9, 0.1)
+              - 0.25 * (wspm - 1.8) - 0.1 * (spread - 8.0)
+              - 0.3 * np.log1p(rain))
+    pm25 = np.clip(np.exp(log_pm), 2.0, 900.0)
+
+    # Other pollutants coupled to PM2.5, season and traffic
+    pm10 = pm25 * (1.15 + 0.5 * r["spring"]) \
+        * np.exp(rng.normal(0.0, 0.15, n))
+    so2 = np.exp(2.3 - 0.9 * r["season"] + 0.3 * r["pm"]
+                 + rng.normal(0.0, 0.3, n))
+    no2 = (20.0 + 2.0 * pm25 ** 0.6 + 15.0 * r["rush"]
+           + rng.normal(0.0, 8.0, n))
+    co = (300.0 + 12.0 * pm25) * np.exp(rng.normal(0.0, 0.2, n))
+    o3 = (55.0 + 40.0 * r["season"] + 35.0 * r["diurnal"]
+          - 0.3 * (no2 - 50.0) + rng.normal(0.0, 10.0, n))
+
+    df = pd.DataFrame({
+        "No": np.arange(1, n + 1),
+        "year": index.year,
+        "month": index.month,
+        "day": index.day,
+        "hour": index.hour,
+        "PM2.5": pm25.round(),
+        "PM10": np.maximum(pm10, pm25).round(),
+        "SO2": np.clip(so2, 2.0, 300.0).round(),
+        "NO2": np.clip(no2, 2.0, 280.0).round(),
+        "CO": np.clip(co, 100.0, 10000.0).round(-2),
+        "O3": np.clip(o3, 2.0, 500.0).round(),
+        "TEMP": temp.round(1),
+        "PRES": pres.round(1),
+        "DEWP": dewp.round(1),
+        "RAIN": rain.round(1),
+        "wd": wd,
+        "WSPM": wspm.round(1),
+        "station": station["station"].capitalize(),
+    }, columns=RAW_COLUMNS)
+
+    # Sensor outages
+    for col, rate in MISSING_RATES.items():
+        df.loc[_gaps(rng, n, rate), col] = np.nan if col != "wd" else None
+    return df
+
+
+def _write_station(station: dict, seed: int, raw_dir: Path) -> str:
+    """
+    Generate one station and write it to <raw_dir>/<station>.csv.
+
+    Args:
+        station (dict): Row of station_table.
+        seed (int): Random seed.
+        raw_dir (Path): Output directory.
+    Returns:
+        str: File name written.
+    """
+    name = f"{station['station']}.csv"
+    generate_station(station, seed).to_csv(raw_dir / name, index=False,
+                                           float_format="%g")
+    return name
+
+
+def station_count(scale: float, years: int) -> int:
+    """
+    Number of stations giving `scale` times the shipped row count.
+
+    Args:
+        scale (float): Row multiple of the shipped data.
+        years (int): Years generated per station.
+    Returns:
+        int: Number of stations.
+    """
+    return max(1, round(BASE_STATIONS * scale * BASE_YEARS / years))
+
+
+def write_dataset(output: Path,
+                  n_stations: int,
+                  years: int = BASE_YEARS,
+                  start: str = START,
+                  seed: int = 0,
+                  workers: int = None) -> Path:
+    """
+    Write a synthetic raw dataset and station metadata under
+    <output>/data/raw and <output>/data/metadata, the layout the loaders
+    and benchmarks (--data-root) read.
+
+    Args:
+        output (Path): Root directory of the synthetic tree.
+        n_stations (int): Number of stations.
+        years (int): Years per station.
+        start (str): First timestamp.
+        seed (int): Random seed; the same seed gives the same data.
+        workers (int): Worker processes, defaults to the CPU count.
+    Returns:
+        Path: The raw data directory.
+    """
+    raw_dir = Path(output) / "data" / "raw"
+    meta_dir = Path(output) / "data" / "metadata"
+    raw_dir.mkdir(parents=True, exist_ok=True)
+    meta_dir.mkdir(parents=True, exist_ok=True)
+
+    stations = station_table(n_stations, seed)
+    stations.to_csv(meta_dir / "station_metadata.csv", index=False)
+
+    # Stations are independent given the regional signals
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(),
+                             initializer=_init_worker,
+                             initargs=(start, years, seed)) as pool:
+        files = list(pool.map(_write_station,
+                              stations.to_dict("records"),
+                              [seed] * n_stations,
+                              [raw_dir] * n_stations,
+                              chunksize=max(1, n_stations // 64)))
+
+    metadata = MetadataBuilder(
+        dataset_path=raw_dir,
+        dataset_name="Synthetic Beijing Stations – Raw",
+        description="Synthetic hourly station files in the schema of the "
+                    "raw Beijing Multi-Site Air Quality data, generated for "
+                    "stress testing.")
+    metadata.add_creation_script("utils/synthetic_data.py")
+    metadata.add_step(f"Generated {n_stations} stations x {years} years "
+                      f"from {start} with seed {seed}")
+    metadata.add_step("Regional seasonal, diurnal and synoptic signals "
+                      "shared by stations, plus local AR(1) noise")
+    metadata.add_step("PM2.5 coupled to wind, humidity and rain; gaps at "
+                      "the raw missing-value rates")
+    metadata.add_columns(RAW_COLUMNS)
+    metadata.add_file_list(files)
+    metadata.write(raw_dir / "_metadata.yml")
+    return raw_dir
+
+
+def engineer_dataset(cleaned: Path, output: Path,
+                     chunk_rows: int = CHUNK_ROWS) -> int:
+    """
+    Add the engineered features to a cleaned CSV chunk by chunk (every
+    feature depends on its own row only) and write the engineered CSV
+    with its column statistics.
+
+    Args:
+        cleaned (Path): Cleaned CSV.
+        output (Path): Engineered CSV to write.
+        chunk_rows (int): Rows read per chunk.
+    Returns:
+        int: Records written.
+    """
+    output = Path(output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    records, stats = 0, DatasetStats(partition_by="station")
+    with open(output, "w", encoding="utf-8", newline="") as f:
+        for chunk in pd.read_csv(cleaned, chunksize=chunk_rows,
+                                 parse_dates=["datetime"]):
+            chunk = add_engineered_features(chunk)
+            chunk.to_csv(f, header=records == 0, index=False)
+            stats.update(chunk)
+            records += len(chunk)
+    stats.write(output)
+    return records
+
+
+def build_products(output: Path, workers: int = None) -> Path:
+    """
+    Run the synthetic raw files through the ingest, cleaning and feature
+    engineering stages, into the layout of data/: combined/, cleaned/ and
+    engineered/. Every reading is kept (no CLEANED_UNTIL cut-off).
+
+    Args:
+        output (Path): Root directory of the synthetic tree.
+        workers (int): Worker processes, defaults to the CPU count.
+    Returns:
+        Path: The engineered CSV.
+    """
+    data = Path(output) / "data"
+    combined = data / "combined" / "beijing_combined"
+    cleaned = data / "cleaned" / "beijing_cleaned.csv"
+    engineered = data / "engineered" / "beijing_engineered.csv"
+
+    ingest(data / "raw", combined, workers)
+    clean_dataset(combined, cleaned, until=None, workers=workers,
+                  station_meta=data / "metadata" / "station_metadata.csv")
+    engineer_dataset(cleaned, engineered)
+    return engineered
+
+
+def parse_args(argv: list = None) -> argparse.Namespace:
+    """
+    Parse command line arguments.
+
+    Args:
+        argv (list): Arguments, defaults to sys.argv.
+    Returns:
+        argparse.Namespace: Parsed arguments.
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m utils.synthetic_data",
+        description="Generate synthetic station data and the datasets "
+                    "derived from it.")
+    parser.add_argument("--scale", type=float, default=10,
+                        help="rows as a multiple of the shipped data")
+    parser.add_argument("--years", type=int, default=BASE_YEARS,
+                        help="years per station")
+    parser.add_argument("--stations", type=int,
+                        help="number of stations (overrides --scale)")
+    parser.add_argument("--start", default=START, help="first timestamp")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--output", type=Path,
+                        help="output root (default data/synthetic/<scale>x)")
+    parser.add_argument("--raw-only", action="store_true",
+                        help="write only the raw files and station metadata")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    n_stations = args.stations or station_count(args.scale, args.years)
+    output = args.output or SYNTHETIC_PATH / f"{args.scale:g}x"
+    written = write_dataset(output, n_stations, args.years, args.start,
+                            args.seed, args.workers)
+    print(f"Saved {n_stations} synthetic stations to:", written)
+    if not args.raw_only:
+        print("Saved the engineered dataset to:",
+              build_products(output, args.workers))
@@ -0,0 +1,228 @@
+"""
+Multi-resolution time pyramid of PM2.5 per station.
+Pre-aggregates the engineered data at hourly, 6-hourly, daily, weekly and
+monthly resolution (mean/min/max/count) so time-series views can draw the
+coarsest level that fills the visible range and only fetch finer levels
+when the user zooms in.
+"""
+
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from utils.load_csv import load_csv
+
+ROOT = Path(__file__).parent.parent
+PYRAMID_PATH = ROOT / "data" / "pyramid"
+
+# Pyramid levels from finest to coarsest: name -> (bucket rule, bucket width)
+LEVELS = {
+    "hourly": ("h", pd.Timedelta(hours=1)),
+    "6-hourly": ("6h", pd.Timedelta(hours=6)),
+    "daily": ("D", pd.Timedelta(days=1)),
+    "weekly": ("W", pd.Timedelta(days=7)),
+    "monthly": ("M", pd.Timedelta(days=30.44)),
+}
+
+AGGREGATES = ["mean", "min", "max", "count"]
+
+
+def bucket_start(datetimes: pd.Series, level: str) -> pd.Series:
+    """
+    Map timestamps to the start of their bucket for a pyramid level.
+
+    Args:
+        datetimes (pd.Series): datetime64 values.
+        level (str): Pyramid level name (a key of LEVELS).
+    Returns:
+        pd.Series: Bucket start timestamps.
+    """
+    rule = LEVELS[level][0]
+    if level in ("weekly", "monthly"):
+        # Calendar buckets have no fixed width, so use periods
+        return datetimes.dt.to_period(rule).dt.start_time
+    return datetimes.dt.floor(rule)
+
+
+def build_level(df: pd.DataFrame, level: str,
+                value: str = "pm25") -> pd.DataFrame:
+    """
+    Aggregate one pyramid level from hourly station data.
+
+    Args:
+        df (pd.DataFrame): Data with 'station', 'datetime' and value columns.
+        level (str): Pyramid level name (a key of LEVELS).
+        value (str): Column to aggregate.
+    Returns:
+        pd.DataFrame: 'station', 'datetime', 'mean', 'min', 'max' and
+        'count' columns, sorted by station then datetime.
+    """
+    buckets = bucket_start(df["datetime"], level).rename("datetime")
+    agg = (df.groupby([df["station"].astype(str), buckets])[value]
+             .agg(AGGREGATES)
+             .reset_index())
+
+    # Compact dtypes: the pyramid is meant to stay small in memory
+    agg["station"] = agg["station"].astype("category")
+    agg[["mean", "min", "max"]] = agg[["mean", "min", "max"]]\
+        .astype("float32")
+    agg["count"] = agg["count"].astype("int32")
+    return agg
+
+
+def build_pyramid(df: pd.DataFrame, value: str = "pm25") -> dict:
+    """
+    Build every level of the pyramid.
+
+    Args:
+        df (pd.DataFrame): Data with 'station', 'datetime' and value columns.
+        value (str): Column to aggregate.
+    Returns:
+        dict: Level name -> aggregated DataFrame.
+    """
+    return {level: build_level(df, level, value) for level in LEVELS}
+
+
+def update_level(level_df: pd.DataFrame, df: pd.DataFrame, level: str,
+                 value: str = "pm25") -> pd.DataFrame:
+    """
+    Rebuild only the buckets touched by new data.
+    For each station in df, buckets from the first bucket df covers
+    onwards are replaced; other stations and earlier buckets are kept.
+    df must therefore hold every row of those stations from the start of
+    that bucket (see bucket_start).
+
+    Args:
+        level_df (pd.DataFrame): Existing level (build_level layout).
+        df (pd.DataFrame): Hourly rows of the affected stations.
+        level (str): Pyramid level name (a key of LEVELS).
+        value (str): Column to aggregate.
+    Returns:
+        pd.DataFrame: Updated level, sorted by station then datetime.
+    """
+    fresh = build_level(df, level, value)
+    first = fresh.groupby("station", observed=True)["datetime"].min()
+
+    # Work on category codes: mapping the station names row by row is
+    # slower than rebuilding the level
+    stations = sorted(set(level_df["station"].cat.categories)
+                      | set(first.index))
+    level_df = level_df.assign(
+        station=level_df["station"].cat.set_categories(stations))
+    fresh = fresh.assign(
+        station=fresh["station"].cat.set_categories(stations))
+
+    # Stations without new data map to NaT and keep every bucket
+    since = first.reindex(stations).to_numpy()[
+        level_df["station"].cat.codes.to_numpy()]
+    kept = level_df[~(level_df["datetime"].to_numpy() >= since)]
+
+    merged = pd.concat([kept, fresh], ignore_index=True)
+    return merged.sort_values(["station", "datetime"], ignore_index=True)
+
+
+def save_level(level_df: pd.DataFrame, path: Path) -> Path:
+    """
+    Save one pyramid level as an uncompressed .npz archive.
+
+    Args:
+        level_df (pd.DataFrame): Output of build_level.
+        path (Path): Output path.
+    Returns:
+        Path: Path the level was written to.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.savez(
+        path,
+        stations=level_df["station"].cat.categories.to_numpy(dtype=str),
+        station_codes=level_df["station"].cat.codes.to_numpy("int16"),
+        datetime=level_df["datetime"].to_numpy("datetime64[s]"),
+        **{agg: level_df[agg].to_numpy() for agg in AGGREGATES},
+    )
+    return path
+
+
+def read_level(path: Path) -> pd.DataFrame:
+    """
+    Read a pyramid level written by save_level.
+
+    Args:
+        path (Path): Path of the .npz archive.
+    Returns:
+        pd.DataFrame: Level DataFrame in the build_level layout.
+    """
+    with np.load(path) as data:
+        df = pd.DataFrame({
+            "station": pd.Categorical.from_codes(data["station_codes"],
+                                                 data["stations"]),
+            "datetime": pd.to_datetime(data["datetime"]),
+            **{agg: data[agg] for agg in AGGREGATES},
+        })
+    return df
+
+
+def write_pyramid(df: pd.DataFrame,
+                  directory: Path = PYRAMID_PATH,
+                  value: str = "pm25") -> list[Path]:
+    """
+    Build and save every pyramid level to a directory.
+
+    Args:
+        df (pd.DataFrame): Data with 'station', 'datetime' and value columns.
+        directory (Path): Output directory, one <level>.npz per level.
+        value (str): Column to aggregate.
+    Returns:
+        list[Path]: Paths of the written levels.
+    """
+    return [save_level(build_level(df, level, value),
+                       Path(directory) / f"{level}.npz")
+            for level in LEVELS]
+
+
+def select_level(start: pd.Timestamp, end: pd.Timestamp,
+                 max_points: int = 1000) -> str:
+    """
+    Pick the finest level whose bucket count over the visible range stays
+    within the point budget, falling back to the coarsest level.
+
+    Args:
+        start (pd.Timestamp): Start of the visible range.
+        end (pd.Timestamp): End of the visible range.
+        max_points (int): Point budget per station.
+    Returns:
+        str: Pyramid level name.
+    """
+    span = pd.Timestamp(end) - pd.Timestamp(start)
+    for level, (_, width) in LEVELS.items():
+        if span / width <= max_points:
+            return level
+    return list(LEVELS)[-1]
+
+
+def query(level_df: pd.DataFrame,
+          start: pd.Timestamp,
+          end: pd.Timestamp,
+          stations: list = None) -> pd.DataFrame:
+    """
+    Select the buckets of a level inside a time range.
+
+    Args:
+        level_df (pd.DataFrame): Pyramid level DataFrame.
+        start (pd.Timestamp): Start of the range (inclusive).
+        end (pd.Timestamp): End of the range (inclusive).
+        stations (list): Optional stations to keep.
+    Returns:
+        pd.DataFrame: Matching buckets.
+    """
+    mask = level_df["datetime"].between(pd.Timestamp(start),
+                                        pd.Timestamp(end))
+    if stations is not None:
+        mask &= level_df["station"].isin(stations)
+    return level_df[mask]
+
+
+if __name__ == "__main__":
+    engineered = load_csv(ROOT / "data" / "engineered" /
+                          "beijing_engineered.csv")
+    for written in write_pyramid(engineered):
+        print("Saved pyramid level to:", written)